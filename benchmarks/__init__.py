@@ -0,0 +1 @@
+# Цей файл може бути порожнім
\ No newline at end of file
@@ -0,0 +1,171 @@
+"""Бенчмарки шару бази даних
+
+    BENCHMARK_DATABASE_URL=postgresql://... python -m benchmarks seed --users 5000
+    BENCHMARK_DATABASE_URL=postgresql://... python -m benchmarks run --output bench.json
+    python -m benchmarks compare before.json after.json
+
+Навантажувальний тест вебхука (бот запускається окремо і ходить у тестовий Bot API):
+    python -m benchmarks fake-api --port 8081 --latency-ms 30 --max-rps 30
+    BOT_API_BASE_URL=http://127.0.0.1:8081/bot BOT_API_FILE_URL=http://127.0.0.1:8081/file/bot \
+        ADMIN_API_TOKEN=secret DATABASE_URL=$BENCHMARK_DATABASE_URL python main.py
+    ADMIN_API_TOKEN=secret python -m benchmarks load --scenario browse like_storm broadcast --rate 50 --duration 30
+З QUERY_BUDGET_MODE=fail у бота звіт показує оновлення, що перевищили бюджет запитів (N+1);
+/query_budgets читається з тим самим ADMIN_API_TOKEN, що й у бота.
+
+Запускаються лише на окремій базі з BENCHMARK_DATABASE_URL: методи, що пишуть, змінюють дані.
+"""
+import argparse
+import json
+import os
+import sys
+
+
+def connect():
+    database_url = os.environ.get('BENCHMARK_DATABASE_URL')
+    if not database_url:
+        print("❌ BENCHMARK_DATABASE_URL не встановлено (бенчмарки не запускаються на робочій базі)")
+        sys.exit(1)
+    os.environ['DATABASE_URL'] = database_url
+    os.environ.setdefault('DB_SSLMODE', 'prefer')
+    from database_postgres import db
+    db.migrate()
+    return db.get()
+
+
+def seed_command(args):
+    from benchmarks.dataset import SyntheticDataset
+    db = connect()
+    dataset = SyntheticDataset(
+        users=args.users, seed=args.seed,
+        likes_per_user=args.likes_per_user, views_per_user=args.views_per_user
+    )
+    print(f"🔄 Заповнення бази: {args.users} користувачів (seed {args.seed})...")
+    print(f"✅ {dataset.seed_database(db)}")
+
+
+def run_command(args):
+    from benchmarks.db_bench import run_benchmarks, save_results, uncovered_methods
+    from benchmarks.dataset import SyntheticDataset
+    from database_postgres import Database
+    db = connect()
+    if args.reseed:
+        SyntheticDataset(users=args.users, seed=args.seed).seed_database(db)
+
+    print(f"🔄 Бенчмарк методів Database ({args.iterations} повторів)...")
+    report = run_benchmarks(db, args.users, args.seed, args.iterations, args.warmup, args.only)
+    missing = uncovered_methods(Database, report['results']) if not args.only else []
+    if missing:
+        print(f"⚠️ Методи без бенчмарку: {', '.join(missing)}")
+    if args.output:
+        save_results(report, args.output)
+        print(f"✅ Результати збережено в {args.output}")
+
+
+def compare_command(args):
+    from benchmarks.db_bench import compare_reports
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    print(f"📊 {args.metric}: {baseline['meta'].get('commit')} -> {current['meta'].get('commit')}")
+    for name, before, after, change, mark in compare_reports(baseline, current, args.metric, args.threshold):
+        before_text = f"{before:.3f}" if before is not None else '-'
+        after_text = f"{after:.3f}" if after is not None else '-'
+        change_text = f"{change:+.1%}" if change is not None else ''
+        print(f"  {name:32} {before_text:>10} {after_text:>10} {change_text:>8} {mark}")
+
+
+def fake_api_command(args):
+    import logging
+    from benchmarks.fake_bot_api import FakeBotApi
+    logging.basicConfig(level=logging.INFO)
+    logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    FakeBotApi(
+        latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, error_share=args.error_share,
+        max_rps=args.max_rps, retry_after=args.retry_after
+    ).serve(args.host, args.port)
+
+
+def load_command(args):
+    import asyncio
+    from benchmarks.load_test import LoadRunner, print_report, save_reports
+    admin_id = args.admin_id or int(os.environ.get('ADMIN_ID', 0))
+    if 'broadcast' in args.scenario and not admin_id:
+        print("❌ Для сценарію broadcast потрібен --admin-id або ADMIN_ID (той самий, що у бота)")
+        sys.exit(1)
+    admin_token = args.admin_token or os.environ.get('ADMIN_API_TOKEN')
+    if not admin_token:
+        print("⚠️ Без --admin-token або ADMIN_API_TOKEN звіт не міститиме перевищень бюджету запитів")
+    runner = LoadRunner(
+        args.webhook, args.api, args.users, args.rate, args.duration, admin_id=admin_id, seed=args.seed,
+        admin_token=admin_token
+    )
+    reports = []
+    for scenario in args.scenario:
+        print(f"🔄 Сценарій {scenario}: {args.rate} оновлень/с протягом {args.duration} с...")
+        report = asyncio.run(runner.run_scenario(scenario))
+        print_report(report)
+        reports.append(report)
+    if args.output:
+        save_reports(reports, args.output)
+        print(f"✅ Результати збережено в {args.output}")
+
+
+def main():
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Бенчмарки шару бази даних")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    seed = commands.add_parser('seed', help="Заповнити базу синтетичними даними")
+    seed.add_argument('--users', type=int, default=5000)
+    seed.add_argument('--seed', type=int, default=42)
+    seed.add_argument('--likes-per-user', type=int, default=15)
+    seed.add_argument('--views-per-user', type=int, default=40)
+    seed.set_defaults(func=seed_command)
+
+    run = commands.add_parser('run', help="Виміряти методи Database")
+    run.add_argument('--users', type=int, default=5000, help="Скільки користувачів у заповненій базі")
+    run.add_argument('--seed', type=int, default=42)
+    run.add_argument('--iterations', type=int, default=200)
+    run.add_argument('--warmup', type=int, default=10)
+    run.add_argument('--only', nargs='*', help="Виміряти лише ці методи")
+    run.add_argument('--reseed', action='store_true', help="Перед вимірюванням заново заповнити базу")
+    run.add_argument('--output', help="Файл для JSON з результатами")
+    run.set_defaults(func=run_command)
+
+    compare = commands.add_parser('compare', help="Порівняти два JSON з результатами")
+    compare.add_argument('baseline')
+    compare.add_argument('current')
+    compare.add_argument('--metric', default='p50_ms')
+    compare.add_argument('--threshold', type=float, default=0.1, help="Зміна, що вважається значущою (частка)")
+    compare.set_defaults(func=compare_command)
+
+    fake_api = commands.add_parser('fake-api', help="Тестовий Bot API з затримкою та 429")
+    fake_api.add_argument('--host', default='127.0.0.1')
+    fake_api.add_argument('--port', type=int, default=8081)
+    fake_api.add_argument('--latency-ms', type=float, default=30.0)
+    fake_api.add_argument('--jitter-ms', type=float, default=20.0)
+    fake_api.add_argument('--error-share', type=float, default=0.0, help="Частка відповідей 429 на відправку")
+    fake_api.add_argument('--max-rps', type=int, help="Понад стільки відправок за секунду - 429")
+    fake_api.add_argument('--retry-after', type=int, default=1)
+    fake_api.set_defaults(func=fake_api_command)
+
+    from benchmarks.load_test import SCENARIOS
+    load = commands.add_parser('load', help="Навантажувальний тест /webhook")
+    load.add_argument('--scenario', nargs='+', choices=sorted(SCENARIOS), default=['browse'])
+    load.add_argument('--webhook', default='http://127.0.0.1:10000/webhook')
+    load.add_argument('--api', default='http://127.0.0.1:8081', help="Адреса тестового Bot API")
+    load.add_argument('--users', type=int, default=5000, help="Скільки синтетичних користувачів у базі")
+    load.add_argument('--rate', type=float, default=50, help="Оновлень на секунду")
+    load.add_argument('--duration', type=float, default=30, help="Тривалість сценарію, с")
+    load.add_argument('--admin-id', type=int, help="ID адміна для сценарію broadcast (за замовчуванням ADMIN_ID)")
+    load.add_argument('--admin-token', help="Токен для /query_budgets (за замовчуванням ADMIN_API_TOKEN)")
+    load.add_argument('--seed', type=int, default=42)
+    load.add_argument('--output', help="Файл для JSON з результатами")
+    load.set_defaults(func=load_command)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+import logging
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from psycopg2.extras import execute_values
+
+from utils.gazetteer import CITIES
+
+logger = logging.getLogger(__name__)
+
+# Синтетичні користувачі мають telegram_id від цього значення (справжні ID Telegram менші)
+TELEGRAM_ID_BASE = 9_000_000_000
+
+FIRST_NAMES = (
+    'Олена', 'Андрій', 'Марія', 'Олександр', 'Ірина', 'Дмитро', 'Наталія', 'Сергій', 'Юлія', 'Максим',
+    'Анна', 'Іван', 'Катерина', 'Богдан', 'Софія', 'Тарас', 'Вікторія', 'Артем', 'Дарина', 'Роман',
+)
+GOALS = ('Серйозні стосунки', 'Дружба', 'Разові зустрічі', 'Активний відпочинок')
+INTERESTS = (
+    'подорожі', 'музика', 'спорт', 'книги', 'кіно', 'кава', 'гори', 'море', 'йога', 'фотографія',
+    'танці', 'кулінарія', 'програмування', 'велосипед', 'театр', 'собаки', 'коти', 'настільні ігри',
+    'біг', 'мистецтво', 'волонтерство', 'рибалка', 'вино', 'концерти', 'плавання',
+)
+
+
+class SyntheticDataset:
+    """Відтворюваний синтетичний набір даних для бенчмарків
+
+    Розподіли навмисно нерівномірні, як у реальному боті: кілька великих міст мають
+    більшість анкет, а невелика частка популярних анкет отримує більшість лайків і переглядів.
+    Однаковий seed дає однакові дані, тож результати різних комітів можна порівнювати.
+    """
+
+    def __init__(self, users=5000, seed=42, likes_per_user=15, views_per_user=40,
+                 popularity_skew=1.2, city_skew=1.1, mutual_share=0.2):
+        self.users = users
+        self.seed = seed
+        self.likes_per_user = likes_per_user
+        self.views_per_user = views_per_user
+        self.popularity_skew = popularity_skew
+        self.city_skew = city_skew
+        self.mutual_share = mutual_share
+        self.rng = np.random.default_rng(seed)
+
+    @property
+    def telegram_ids(self):
+        return TELEGRAM_ID_BASE + np.arange(1, self.users + 1)
+
+    def skewed_weights(self, size, skew):
+        """Ваги за законом Ципфа: елемент з рангом r має вагу 1 / r^skew"""
+        weights = 1.0 / np.arange(1, size + 1) ** skew
+        return weights / weights.sum()
+
+    def user_rows(self, now):
+        rng = self.rng
+        n = self.users
+        city_names = [city[0] for city in CITIES]
+        cities = rng.choice(city_names, size=n, p=self.skewed_weights(len(city_names), self.city_skew))
+        genders = rng.choice(['male', 'female'], size=n)
+        seeking = rng.choice(['male', 'female', 'all'], size=n, p=[0.45, 0.45, 0.1])
+        ages = rng.integers(18, 56, size=n)
+        goals = rng.choice(GOALS, size=n)
+        # Частина анкет незаповнена (вік не вказано), як у справжній базі
+        filled = rng.random(n) > 0.1
+        active_hours = rng.exponential(72, size=n)
+        rows = []
+        for i, telegram_id in enumerate(self.telegram_ids):
+            bio_words = rng.choice(INTERESTS, size=rng.integers(2, 7), replace=False)
+            rows.append((
+                int(telegram_id),
+                f"bench_{telegram_id}",
+                FIRST_NAMES[i % len(FIRST_NAMES)],
+                int(ages[i]) if filled[i] else None,
+                genders[i],
+                cities[i],
+                seeking[i],
+                goals[i],
+                f"Люблю {', '.join(bio_words)}",
+                now - timedelta(hours=float(active_hours[i])),
+            ))
+        return rows
+
+    def edges(self, per_user):
+        """Пари (від, до) за індексами користувачів; цілі обираються з нахилом до популярних анкет"""
+        n = self.users
+        popularity = self.skewed_weights(n, self.popularity_skew)
+        # Популярність не повинна збігатися з порядком telegram_id
+        popularity = popularity[self.rng.permutation(n)]
+        counts = self.rng.poisson(per_user, size=n)
+        sources = np.repeat(np.arange(n), counts)
+        targets = self.rng.choice(n, size=len(sources), p=popularity)
+        pairs = np.unique(np.stack([sources, targets], axis=1), axis=0)
+        return pairs[pairs[:, 0] != pairs[:, 1]]
+
+    def clear(self, db):
+        """Видалення попередніх синтетичних даних (каскадом разом з фото, лайками та переглядами)"""
+        db.execute_safe('DELETE FROM users WHERE telegram_id >= %s', (TELEGRAM_ID_BASE,))
+
+    def seed_database(self, db):
+        """Заповнення бази: користувачі, фото, лайки (частина взаємні) та перегляди"""
+        started = time.perf_counter()
+        self.clear(db)
+        now = datetime.now()
+        cursor = db.connection.checkout()
+
+        execute_values(cursor, '''
+            INSERT INTO users (telegram_id, username, first_name, age, gender, city,
+                               seeking_gender, goal, bio, last_active)
+            VALUES %s
+        ''', self.user_rows(now), page_size=1000)
+
+        cursor.execute('SELECT id, telegram_id FROM users WHERE telegram_id >= %s ORDER BY telegram_id',
+                       (TELEGRAM_ID_BASE,))
+        ids = np.array([row['id'] for row in cursor.fetchall()])
+
+        # Фото: 0-3 на анкету, у більшості є хоча б одне
+        photo_counts = self.rng.choice([0, 1, 2, 3], size=self.users, p=[0.15, 0.35, 0.3, 0.2])
+        photo_rows = [
+            (int(ids[i]), f"BENCH_{i}_{position}", position == 1, position)
+            for i in range(self.users)
+            for position in range(1, photo_counts[i] + 1)
+        ]
+        execute_values(cursor, 'INSERT INTO photos (user_id, file_id, is_main, position) VALUES %s',
+                       photo_rows, page_size=1000)
+
+        likes = self.edges(self.likes_per_user)
+        mutual_mask = self.rng.random(len(likes)) < self.mutual_share
+        likes = np.unique(np.concatenate([likes, likes[mutual_mask][:, ::-1]]), axis=0)
+        like_ages = self.rng.exponential(96, size=len(likes))
+        execute_values(cursor, 'INSERT INTO likes (from_user_id, to_user_id, created_at) VALUES %s', [
+            (int(ids[a]), int(ids[b]), now - timedelta(hours=float(age)))
+            for (a, b), age in zip(likes, like_ages)
+        ], page_size=5000)
+
+        views = self.edges(self.views_per_user)
+        view_ages = self.rng.exponential(48, size=len(views))
+        execute_values(cursor, 'INSERT INTO profile_views (viewer_user_id, viewed_user_id, viewed_at) VALUES %s', [
+            (int(ids[a]), int(ids[b]), now - timedelta(hours=float(age)))
+            for (a, b), age in zip(views, view_ages)
+        ], page_size=5000)
+
+        # Денормалізовані поля, які в боті підтримуються при кожній дії
+        cursor.execute('''
+            UPDATE users u SET
+                has_photo = EXISTS (SELECT 1 FROM photos p WHERE p.user_id = u.id),
+                likes_count = (SELECT COUNT(*) FROM likes l WHERE l.to_user_id = u.id)
+            WHERE u.telegram_id >= %s
+        ''', (TELEGRAM_ID_BASE,))
+        db.update_all_ratings()
+        cursor.execute('ANALYZE users; ANALYZE photos; ANALYZE likes; ANALYZE profile_views')
+
+        summary = {
+            'users': self.users,
+            'photos': len(photo_rows),
+            'likes': len(likes),
+            'mutual_likes': int(mutual_mask.sum()),
+            'views': len(views),
+            'seconds': round(time.perf_counter() - started, 2),
+        }
+        logger.info(f"✅ Синтетичні дані: {summary}")
+        return summary
@@ -0,0 +1,199 @@
+import json
+import random
+import subprocess
+import time
+from datetime import datetime
+
+import numpy as np
+
+from benchmarks.dataset import TELEGRAM_ID_BASE, INTERESTS
+from utils.gazetteer import CITIES
+
+# Методи Database, які не вимірюються: службові, руйнівні або без звернення до БД
+SKIPPED_METHODS = {
+    'detect_features', 'migrate', 'connect_with_retry', 'reconnect', 'close',
+    'execute_safe', 'fetch_safe', 'fetch_one_safe',
+    'init_db', 'fix_profile_views_table_if_needed', 'fix_profile_views_table', 'add_missing_columns',
+    'init_photo_positions', 'create_indexes', 'init_bio_search', 'reset_database',
+    'bio_tsvector_sql', 'bio_tsquery_sql', 'explain_slow_queries',
+}
+
+PERCENTILES = (50, 90, 95, 99)
+
+
+class BenchmarkContext:
+    """Відтворюваний вибір аргументів для викликів (ті самі ID в тому самому порядку при тому самому seed)"""
+
+    def __init__(self, users, seed):
+        self.users = users
+        self.rng = random.Random(seed)
+        self.update_id = int(time.time() * 1000)
+        self.photo_counter = 0
+
+    def user(self):
+        return TELEGRAM_ID_BASE + self.rng.randint(1, self.users)
+
+    def pair(self):
+        first = self.user()
+        second = self.user()
+        while second == first:
+            second = self.user()
+        return first, second
+
+    def city(self):
+        return self.rng.choice(CITIES[:10])[0]
+
+    def interest(self):
+        return self.rng.choice(INTERESTS)
+
+    def next_update_id(self):
+        self.update_id += 1
+        return self.update_id
+
+    def next_photo(self):
+        self.photo_counter += 1
+        return f"BENCH_NEW_{self.photo_counter}"
+
+
+def build_cases(db, ctx):
+    """Назва методу -> функція без аргументів, що робить один виклик з типовими аргументами"""
+    return {
+        # Анкети
+        'add_user': lambda: db.add_user(ctx.user(), 'bench', 'Bench'),
+        'get_user': lambda: db.get_user(ctx.user()),
+        'get_users_brief': lambda: db.get_users_brief([ctx.user() for _ in range(20)]),
+        'get_user_profile': lambda: db.get_user_profile(ctx.user()),
+        'update_user_profile': lambda: db.update_user_profile(ctx.user(), city=ctx.city()),
+        'update_or_create_user_profile': lambda: db.update_or_create_user_profile(
+            ctx.user(), ctx.rng.randint(18, 55), 'female', ctx.city(), 'all', 'Дружба', f"Люблю {ctx.interest()}"),
+        'bump_profile_version': lambda: db.bump_profile_version(ctx.user()),
+        'get_users_count': lambda: db.get_users_count(),
+        'get_statistics': lambda: db.get_statistics(),
+        'get_all_active_users': lambda: db.get_all_active_users(ctx.user()),
+        'get_all_users': lambda: db.get_all_users(),
+        'get_banned_users': lambda: db.get_banned_users(),
+        'ban_user': lambda: db.ban_user(TELEGRAM_ID_BASE + 1),
+        'unban_user': lambda: db.unban_user(TELEGRAM_ID_BASE + 1),
+        'search_user': lambda: db.search_user(ctx.rng.choice(['Олена', 'bench_9000000', str(ctx.user())])),
+        # Фото
+        'add_user_photo': lambda: db.add_user_photo(ctx.user(), ctx.next_photo()),
+        'photos_have_is_main': lambda: db.photos_have_is_main(),
+        'get_user_gallery': lambda: db.get_user_gallery(ctx.user()),
+        'get_profile_photos': lambda: db.get_profile_photos(ctx.user()),
+        'get_main_photo': lambda: db.get_main_photo(ctx.user()),
+        'set_main_photo': lambda: db.set_main_photo(ctx.user(), 'BENCH_0_1'),
+        'delete_photo': lambda: db.delete_photo(ctx.user(), ctx.next_photo()),
+        # Пошук
+        'get_random_user': lambda: db.get_random_user(ctx.user()),
+        'get_discovery_candidates': lambda: db.get_discovery_candidates(ctx.user()),
+        'get_users_by_city': lambda: db.get_users_by_city(ctx.city(), ctx.user()),
+        'get_users_by_cities': lambda: db.get_users_by_cities([ctx.city(), ctx.city()], ctx.user()),
+        'search_users_by_interests': lambda: db.search_users_by_interests(ctx.interest(), ctx.user()),
+        'get_top_users_by_rating': lambda: db.get_top_users_by_rating(10, ctx.rng.choice([None, 'male', 'female'])),
+        # Лайки, матчі, перегляди
+        'add_like': lambda: db.add_like(*ctx.pair()),
+        'has_liked': lambda: db.has_liked(*ctx.pair()),
+        'can_like_today': lambda: db.can_like_today(ctx.user()),
+        'get_user_matches': lambda: db.get_user_matches(ctx.user()),
+        'get_user_likers': lambda: db.get_user_likers(ctx.user()),
+        'add_profile_view': lambda: db.add_profile_view(*ctx.pair()),
+        'add_profile_views_batch': lambda: db.add_profile_views_batch(
+            [(*ctx.pair(), datetime.now()) for _ in range(100)]),
+        'get_profile_views': lambda: db.get_profile_views(ctx.user()),
+        # Обслуговування
+        'claim_update': lambda: db.claim_update(ctx.next_update_id()),
+        'cleanup_processed_updates': lambda: db.cleanup_processed_updates(24),
+        'cleanup_profile_views': lambda: db.cleanup_profile_views(3650),
+        'calculate_user_rating': lambda: db.calculate_user_rating(ctx.user()),
+        'update_all_ratings': lambda: db.update_all_ratings(),
+        'cleanup_old_data': lambda: db.cleanup_old_data(),
+    }
+
+
+# Методи, що обробляють всю таблицю: менше повторів
+HEAVY_CASES = {'get_all_users', 'get_all_active_users', 'update_all_ratings', 'cleanup_old_data', 'get_statistics'}
+
+
+def uncovered_methods(database_class, cases):
+    """Публічні методи Database, для яких немає ні бенчмарку, ні причини пропуску"""
+    public = {
+        name for name, attr in vars(database_class).items()
+        if not name.startswith('_') and callable(attr)
+    }
+    return sorted(public - set(cases) - SKIPPED_METHODS)
+
+
+def summarize(samples):
+    values = np.array(samples) * 1000
+    summary = {f"p{p}_ms": round(float(np.percentile(values, p)), 3) for p in PERCENTILES}
+    summary.update({
+        'mean_ms': round(float(values.mean()), 3),
+        'max_ms': round(float(values.max()), 3),
+        'iterations': len(samples),
+    })
+    return summary
+
+
+def run_case(call, iterations, warmup):
+    for _ in range(warmup):
+        call()
+    samples = []
+    for _ in range(iterations):
+        started = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def run_benchmarks(db, users, seed=42, iterations=200, warmup=10, only=None):
+    """Вимірювання всіх методів; повертає словник, готовий до збереження в JSON"""
+    ctx = BenchmarkContext(users, seed)
+    cases = build_cases(db, ctx)
+    results = {}
+    for name, call in cases.items():
+        if only and name not in only:
+            continue
+        count = max(5, iterations // 20) if name in HEAVY_CASES else iterations
+        results[name] = summarize(run_case(call, count, min(warmup, count)))
+        print(f"  {name:32} p50 {results[name]['p50_ms']:>9.3f} мс   p99 {results[name]['p99_ms']:>9.3f} мс")
+
+    server = db.fetch_one_safe('SHOW server_version')
+    return {
+        'meta': {
+            'commit': git_commit(),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'users': users,
+            'seed': seed,
+            'iterations': iterations,
+            'postgres': server['server_version'] if server else None,
+        },
+        'results': results,
+    }
+
+
+def save_results(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+def compare_reports(baseline, current, metric='p50_ms', threshold=0.1):
+    """Рядки порівняння двох звітів; зміна більше threshold (частка) позначається"""
+    rows = []
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        before = baseline['results'].get(name, {}).get(metric)
+        after = current['results'].get(name, {}).get(metric)
+        if before is None or after is None:
+            rows.append((name, before, after, None, '➕' if before is None else '➖'))
+            continue
+        change = (after - before) / before if before else 0.0
+        mark = '🔴' if change > threshold else '🟢' if change < -threshold else ''
+        rows.append((name, before, after, change, mark))
+    return rows
@@ -0,0 +1,161 @@
+import json
+import logging
+import random
+import threading
+import time
+
+from flask import Flask, request, jsonify
+
+logger = logging.getLogger(__name__)
+
+# Методи, що повертають повідомлення (решта повертає True)
+MESSAGE_METHODS = {
+    'sendMessage', 'sendPhoto', 'sendDocument', 'sendVideo', 'sendAnimation', 'sendSticker',
+    'editMessageText', 'editMessageCaption', 'editMessageReplyMarkup', 'forwardMessage', 'copyMessage',
+}
+# Методи, на які імітуються 429 (як у Telegram, ліміти стосуються відправки повідомлень)
+LIMITED_METHODS = MESSAGE_METHODS | {'sendMediaGroup'}
+
+FAKE_BOT = {'id': 1, 'is_bot': True, 'first_name': 'Load Test', 'username': 'load_test_bot'}
+
+
+class FakeBotApi:
+    """Локальна заміна Telegram Bot API для навантажувального тестування
+
+    Відповідає на виклики бота валідними об'єктами, записує кожен виклик (час, метод,
+    chat_id) і за налаштуванням додає затримку та відповіді 429 з retry_after.
+    Бот спрямовується сюди через BOT_API_BASE_URL=http://host:port/bot.
+    """
+
+    def __init__(self, latency_ms=30.0, jitter_ms=20.0, error_share=0.0, max_rps=None, retry_after=1):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_share = error_share
+        self.max_rps = max_rps
+        self.retry_after = retry_after
+        self.lock = threading.Lock()
+        self.calls = []
+        self.message_id = 0
+        self.window_start = 0.0
+        self.window_count = 0
+        self.app = self.build_app()
+
+    def reset(self, **settings):
+        with self.lock:
+            self.calls = []
+            for name, value in settings.items():
+                if hasattr(self, name) and value is not None:
+                    setattr(self, name, value)
+
+    def rate_limited(self, method):
+        """Чи відповісти 429: випадкова частка або перевищення max_rps у поточній секунді"""
+        if method not in LIMITED_METHODS:
+            return False
+        if self.error_share and random.random() < self.error_share:
+            return True
+        if not self.max_rps:
+            return False
+        with self.lock:
+            now = time.time()
+            if now - self.window_start >= 1.0:
+                self.window_start = now
+                self.window_count = 0
+            self.window_count += 1
+            return self.window_count > self.max_rps
+
+    def message(self, chat_id, params):
+        with self.lock:
+            self.message_id += 1
+            message_id = self.message_id
+        return {
+            'message_id': message_id,
+            'date': int(time.time()),
+            'chat': {'id': int(chat_id or 0), 'type': 'private'},
+            'from': FAKE_BOT,
+            'text': params.get('text') or params.get('caption') or '',
+        }
+
+    def result(self, method, params):
+        chat_id = params.get('chat_id')
+        if method == 'getMe':
+            return FAKE_BOT
+        if method == 'getUpdates':
+            # Long polling тут не тестується: коротка пауза і порожній список
+            time.sleep(1)
+            return []
+        if method == 'getWebhookInfo':
+            return {'url': '', 'has_custom_certificate': False, 'pending_update_count': 0}
+        if method == 'sendMediaGroup':
+            media = json.loads(params.get('media') or '[]')
+            return [self.message(chat_id, {'caption': item.get('caption')}) for item in media]
+        if method in MESSAGE_METHODS:
+            return self.message(chat_id, params)
+        return True
+
+    def handle(self, method):
+        params = request.values.to_dict()
+        if request.is_json:
+            params.update(request.get_json(silent=True) or {})
+        delay = (self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000
+        if delay > 0:
+            time.sleep(delay)
+
+        limited = self.rate_limited(method)
+        call = {
+            'time': time.time(),
+            'method': method,
+            'chat_id': params.get('chat_id'),
+            'callback_query_id': params.get('callback_query_id'),
+            'text': (params.get('text') or params.get('caption') or '')[:200],
+            'status': 429 if limited else 200,
+        }
+        with self.lock:
+            self.calls.append(call)
+
+        if limited:
+            return jsonify({
+                'ok': False,
+                'error_code': 429,
+                'description': f"Too Many Requests: retry after {self.retry_after}",
+                'parameters': {'retry_after': self.retry_after},
+            }), 429
+        return jsonify({'ok': True, 'result': self.result(method, params)})
+
+    def build_app(self):
+        app = Flask(__name__)
+
+        @app.route('/<token>/<method>', methods=['GET', 'POST'])
+        def bot_method(token, method):
+            return self.handle(method)
+
+        @app.route('/_calls')
+        def calls():
+            """Записані виклики з часу since (unix time)"""
+            since = request.args.get('since', 0.0, type=float)
+            with self.lock:
+                return jsonify([call for call in self.calls if call['time'] >= since])
+
+        @app.route('/_reset', methods=['POST'])
+        def reset():
+            self.reset(**(request.get_json(silent=True) or {}))
+            return jsonify({'ok': True})
+
+        @app.route('/_stats')
+        def stats():
+            with self.lock:
+                by_method = {}
+                for call in self.calls:
+                    by_method[call['method']] = by_method.get(call['method'], 0) + 1
+                return jsonify({
+                    'calls': len(self.calls),
+                    'rate_limited': sum(1 for call in self.calls if call['status'] == 429),
+                    'by_method': by_method,
+                })
+
+        return app
+
+    def serve(self, host='127.0.0.1', port=8081):
+        """Запуск сервера (блокує потік)"""
+        from werkzeug.serving import make_server
+        logger.info(f"🤖 Тестовий Bot API: http://{host}:{port}/bot (затримка {self.latency_ms} мс)")
+        make_server(host, port, self.app, threaded=True).serve_forever()
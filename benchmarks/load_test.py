@@ -0,0 +1,285 @@
+import asyncio
+import json
+import random
+import time
+from collections import defaultdict
+
+import httpx
+import numpy as np
+
+from benchmarks.dataset import TELEGRAM_ID_BASE
+
+# Маркер у тексті розсилки, за яким рахуються доставлені повідомлення
+BROADCAST_MARKER = 'LOADTEST-BROADCAST'
+
+# Скільки чекати на відповіді бота після останнього оновлення, с
+DRAIN_SECONDS = 10
+
+
+def user_payload(telegram_id):
+    return {'id': telegram_id, 'is_bot': False, 'first_name': 'Load', 'username': f"load_{telegram_id}"}
+
+
+def text_update(update_id, telegram_id, text):
+    return {
+        'update_id': update_id,
+        'message': {
+            'message_id': update_id,
+            'date': int(time.time()),
+            'chat': {'id': telegram_id, 'type': 'private', 'first_name': 'Load'},
+            'from': user_payload(telegram_id),
+            'text': text,
+        },
+    }
+
+
+class Scenario:
+    """Генератор кроків: (telegram_id, текст повідомлення)"""
+
+    name = None
+
+    def __init__(self, users, seed):
+        self.users = users
+        self.rng = random.Random(seed)
+        self.started = set()
+
+    def user(self):
+        return TELEGRAM_ID_BASE + self.rng.randint(1, self.users)
+
+    def setup_steps(self, admin_id):
+        return []
+
+    def next_step(self):
+        raise NotImplementedError
+
+
+class BrowseScenario(Scenario):
+    """Перегляд стрічки: пошук, кілька «Далі», зрідка лайк або топ"""
+
+    name = 'browse'
+
+    def next_step(self):
+        telegram_id = self.user()
+        if telegram_id not in self.started:
+            self.started.add(telegram_id)
+            return telegram_id, '💕 Пошук анкет'
+        return telegram_id, self.rng.choices(
+            ['➡️ Далі', '❤️ Лайк', '🏆 Топ', '💌 Мої матчі'], weights=[70, 20, 5, 5])[0]
+
+
+class LikeStormScenario(BrowseScenario):
+    """Шквал лайків: невелика група активних користувачів лайкає все підряд"""
+
+    name = 'like_storm'
+
+    def user(self):
+        return TELEGRAM_ID_BASE + self.rng.randint(1, max(1, self.users // 20))
+
+    def next_step(self):
+        telegram_id = self.user()
+        if telegram_id not in self.started:
+            self.started.add(telegram_id)
+            return telegram_id, '💕 Пошук анкет'
+        return telegram_id, '❤️ Лайк'
+
+
+class BroadcastScenario(BrowseScenario):
+    """Розсилка адміна всім користувачам на тлі звичайного перегляду"""
+
+    name = 'broadcast'
+
+    def setup_steps(self, admin_id):
+        return [(admin_id, '📢 Розсилка'), (admin_id, f"{BROADCAST_MARKER} {int(time.time())}")]
+
+
+SCENARIOS = {scenario.name: scenario for scenario in (BrowseScenario, LikeStormScenario, BroadcastScenario)}
+
+
+def percentiles(values_ms):
+    if not values_ms:
+        return {'p50_ms': None, 'p95_ms': None, 'p99_ms': None, 'max_ms': None}
+    values = np.array(values_ms)
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 1),
+        'p95_ms': round(float(np.percentile(values, 95)), 1),
+        'p99_ms': round(float(np.percentile(values, 99)), 1),
+        'max_ms': round(float(values.max()), 1),
+    }
+
+
+def match_responses(sent, calls):
+    """Час до першого виклику Bot API в той самий чат після відправки оновлення
+
+    Виклики кожного чату зараховуються по черзі, кожен - лише одному оновленню, тож
+    кілька оновлень підряд в один чат не отримують ту саму відповідь. Повідомлення
+    розсилки відповіддю не вважаються.
+    """
+    calls_by_chat = defaultdict(list)
+    for call in calls:
+        if call['chat_id'] is not None and BROADCAST_MARKER not in call['text']:
+            calls_by_chat[str(call['chat_id'])].append(call['time'])
+    for times in calls_by_chat.values():
+        times.sort()
+
+    positions = defaultdict(int)
+    latencies = []
+    missing = 0
+    last_answer = None
+    for telegram_id, sent_at in sorted(sent, key=lambda item: item[1]):
+        chat = str(telegram_id)
+        times = calls_by_chat.get(chat, [])
+        index = positions[chat]
+        # Виклики до відправки оновлення - додаткові повідомлення у відповідь на попередні
+        while index < len(times) and times[index] < sent_at:
+            index += 1
+        if index < len(times):
+            latencies.append((times[index] - sent_at) * 1000)
+            last_answer = max(last_answer or 0.0, times[index])
+            index += 1
+        else:
+            missing += 1
+        positions[chat] = index
+    return latencies, missing, last_answer
+
+
+def broadcast_summary(calls, started):
+    delivered = sorted(
+        call['time'] for call in calls
+        if BROADCAST_MARKER in call['text'] and call['status'] == 200
+    )
+    if not delivered:
+        return {'delivered': 0}
+    duration = delivered[-1] - started
+    return {
+        'delivered': len(delivered),
+        'rate_limited': sum(1 for call in calls if BROADCAST_MARKER in call['text'] and call['status'] == 429),
+        'seconds': round(duration, 2),
+        'messages_per_second': round(len(delivered) / duration, 1) if duration > 0 else None,
+    }
+
+
+def budget_summary(before, after):
+    """Перевищення бюджету запитів за час сценарію"""
+    by_route = {
+        route: count - before['by_route'].get(route, 0)
+        for route, count in after['by_route'].items()
+        if count > before['by_route'].get(route, 0)
+    }
+    return {
+        'mode': after['mode'],
+        'checked': after['checked'] - before['checked'],
+        'violations': after['violations'] - before['violations'],
+        'by_route': by_route,
+    }
+
+
+class LoadRunner:
+    """Відправка оновлень на /webhook з заданою частотою (відкритий цикл: не чекаємо відповідей)"""
+
+    def __init__(self, webhook_url, api_url, users, rate, duration, admin_id=None, seed=42, admin_token=None):
+        self.webhook_url = webhook_url
+        self.budgets_url = webhook_url.rsplit('/', 1)[0] + '/query_budgets'
+        self.api_url = api_url.rstrip('/')
+        self.users = users
+        self.rate = rate
+        self.duration = duration
+        self.admin_id = admin_id
+        self.admin_token = admin_token
+        self.seed = seed
+        self.update_id = int(time.time() * 1000)
+
+    def next_update_id(self):
+        self.update_id += 1
+        return self.update_id
+
+    async def post(self, client, update, results):
+        try:
+            response = await client.post(self.webhook_url, json=update)
+            results[response.status_code] += 1
+        except httpx.HTTPError as e:
+            results[type(e).__name__] += 1
+
+    async def budget_stats(self, client):
+        """Статистика бюджету запитів бота (None, якщо бот її не віддає або не задано токен)"""
+        if not self.admin_token:
+            return None
+        try:
+            response = await client.get(self.budgets_url, headers={'X-Admin-Token': self.admin_token})
+            return response.json() if response.status_code == 200 else None
+        except (httpx.HTTPError, ValueError):
+            return None
+
+    async def run_scenario(self, name, api_settings=None):
+        scenario = SCENARIOS[name](self.users, self.seed)
+        statuses = defaultdict(int)
+        sent = []
+        limits = httpx.Limits(max_connections=500, max_keepalive_connections=100)
+
+        async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+            await client.post(f"{self.api_url}/_reset", json=api_settings or {})
+            budgets_before = await self.budget_stats(client)
+            started = time.time()
+
+            for telegram_id, text in scenario.setup_steps(self.admin_id):
+                await self.post(client, text_update(self.next_update_id(), telegram_id, text), statuses)
+                await asyncio.sleep(0.5)
+
+            tasks = []
+            total = int(self.rate * self.duration)
+            loop_started = time.perf_counter()
+            for i in range(total):
+                delay = loop_started + i / self.rate - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                telegram_id, text = scenario.next_step()
+                sent.append((telegram_id, time.time()))
+                update = text_update(self.next_update_id(), telegram_id, text)
+                tasks.append(asyncio.create_task(self.post(client, update, statuses)))
+            await asyncio.gather(*tasks)
+            send_seconds = time.perf_counter() - loop_started
+
+            await asyncio.sleep(DRAIN_SECONDS)
+            calls = (await client.get(f"{self.api_url}/_calls", params={'since': started})).json()
+            api_stats = (await client.get(f"{self.api_url}/_stats")).json()
+            budgets_after = await self.budget_stats(client)
+
+        latencies, missing, last_answer = match_responses(sent, calls)
+        answered = len(sent) - missing
+        answer_seconds = last_answer - sent[0][1] if sent and last_answer else None
+        report = {
+            'scenario': name,
+            'target_rate': self.rate,
+            'sent': len(sent),
+            'achieved_rate': round(len(sent) / send_seconds, 1) if send_seconds else None,
+            'throughput': round(answered / answer_seconds, 1) if answer_seconds else None,
+            'webhook_status': {str(status): count for status, count in sorted(statuses.items(), key=str)},
+            'error_rate': round(1 - statuses.get(200, 0) / max(1, sum(statuses.values())), 4),
+            'no_response': missing,
+            'end_to_end': percentiles(latencies),
+            'bot_api': api_stats,
+        }
+        if name == 'broadcast':
+            report['broadcast'] = broadcast_summary(calls, started)
+        if budgets_before and budgets_after and budgets_after['mode'] != 'off':
+            report['query_budget'] = budget_summary(budgets_before, budgets_after)
+        return report
+
+
+def print_report(report):
+    e2e = report['end_to_end']
+    print(f"📊 {report['scenario']}: {report['sent']} оновлень, {report['achieved_rate']}/с "
+          f"(ціль {report['target_rate']}/с), відповіли {report['sent'] - report['no_response']}")
+    print(f"   end-to-end p50 {e2e['p50_ms']} мс, p95 {e2e['p95_ms']} мс, p99 {e2e['p99_ms']} мс, max {e2e['max_ms']} мс")
+    print(f"   /webhook: {report['webhook_status']}, частка помилок {report['error_rate']:.2%}")
+    print(f"   Bot API: {report['bot_api']['calls']} викликів, 429: {report['bot_api']['rate_limited']}")
+    if 'broadcast' in report:
+        print(f"   розсилка: {report['broadcast']}")
+    if 'query_budget' in report:
+        budget = report['query_budget']
+        print(f"   бюджет запитів ({budget['mode']}): {budget['violations']} перевищень "
+              f"з {budget['checked']} оновлень {budget['by_route'] or ''}")
+
+
+def save_reports(reports, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(reports, f, ensure_ascii=False, indent=2)
@@ -1,18 +1,27 @@
-import requests
+import asyncio
 import os
 
+from telegram import Bot
+
+from utils.http_client import InstrumentedRequest, http_metrics
+
 TOKEN = os.environ.get('BOT_TOKEN')
 WEBHOOK_URL = "https://chatrix-bot-4m1p.onrender.com/webhook"
 
-# Перевірка інформації про вебхук
-response = requests.get(f"https://api.telegram.org/bot{TOKEN}/getWebhookInfo")
-print("📡 Стан вебхука:")
-print(response.json())
+async def main():
+    # Той самий HTTP клієнт (таймаути, keep-alive, метрики), що й у бота
+    async with Bot(TOKEN, request=InstrumentedRequest('cli', 1)) as bot:
+        # Перевірка інформації про вебхук
+        info = await bot.get_webhook_info()
+        print("📡 Стан вебхука:")
+        print(info.to_dict())
+
+        # Спробуємо оновити вебхук
+        result = await bot.set_webhook(WEBHOOK_URL)
+        print("🔄 Оновлення вебхука:")
+        print({"ok": True, "result": result})
+
+    print("📊 Запити до Bot API:")
+    print(http_metrics.get_stats())
 
-# Спробуємо оновити вебхук
-set_response = requests.post(
-    f"https://api.telegram.org/bot{TOKEN}/setWebhook",
-    data={"url": WEBHOOK_URL}
-)
-print("🔄 Оновлення вебхука:")
-print(set_response.json())
\ No newline at end of file
+asyncio.run(main())
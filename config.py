@@ -37,10 +37,35 @@ def initialize_config():
 
 # Налаштування бази даних
 DATABASE_URL = os.environ.get('DATABASE_URL', 'sqlite:///bot_database.db')
+DB_SSLMODE = os.environ.get('DB_SSLMODE', 'require')
+DB_APPLICATION_NAME = 'chatrix-bot'  # Видно в pg_stat_activity
+DB_CONNECT_TIMEOUT = 10  # с
+DB_CONNECT_RETRIES = 5
+DB_RETRY_BASE_DELAY = 1.0  # Перша пауза між спробами підключення (далі подвоюється), с
+DB_RETRY_MAX_DELAY = 15.0  # с
+DB_STATEMENT_TIMEOUT_MS = 15000  # Сервер перериває запит, довший за цей час
+DB_IDLE_IN_TRANSACTION_TIMEOUT_MS = 60000  # Сервер закриває сесію, що зависла у відкритій транзакції
+DB_CONN_MAX_AGE = 30 * 60  # Після цього часу з'єднання перевідкривається, с
+DB_VALIDATE_AFTER_IDLE = 30  # Після такого простою з'єднання перевіряється перед запитом, с
 
 # Налаштування для Render
 RENDER = True
-WEBHOOK_URL = "https://chatrix-bot-4m1p.onrender.com/webhook"
+WEBHOOK_URL = os.environ.get('WEBHOOK_URL', "https://chatrix-bot-4m1p.onrender.com/webhook")
+
+# Режим отримання оновлень: 'webhook' (Render) або 'polling' (локальний запуск, збої вебхука)
+BOT_MODE = os.environ.get('BOT_MODE', 'webhook')
+# Адреса Bot API (можна вказати локальний Bot API сервер або його імітацію)
+BOT_API_BASE_URL = os.environ.get('BOT_API_BASE_URL', 'https://api.telegram.org/bot')
+BOT_API_FILE_URL = os.environ.get('BOT_API_FILE_URL', 'https://api.telegram.org/file/bot')
+
+# Long polling
+POLLING_BATCH_SIZE = 100  # Максимум оновлень за один getUpdates (ліміт Telegram - 100)
+POLLING_TIMEOUT = 30  # Скільки Telegram тримає запит відкритим, якщо оновлень немає, с
+
+# Паралельна обробка оновлень (оновлення одного користувача - завжди по черзі)
+UPDATE_CONCURRENCY = int(os.environ.get('UPDATE_CONCURRENCY', 32))  # Оновлень, що обробляються одночасно
+UPDATE_QUEUE_LIMIT = 1000  # Максимум оновлень у чергах, після чого прийом нових чекає
+USER_QUEUE_LIMIT = 20  # Максимум оновлень в черзі одного користувача
 
 # Налаштування keep-alive
 KEEP_ALIVE_INTERVAL = 300  # 5 хвилин
@@ -50,6 +75,132 @@ MAX_PROFILE_LENGTH = 500
 MAX_BIO_LENGTH = 1000
 SEARCH_LIMIT = 50
 
+# Пошук за містом з урахуванням сусідніх міст
+CITY_SEARCH_RADII_KM = (25, 50, 100, 200)  # Кроки розширення радіусу
+CITY_SEARCH_MIN_RESULTS = 5  # Мінімум анкет, після якого радіус не розширюється
+
+# Стрічка знайомств (ранжування кандидатів)
+FEED_WEIGHT_SET = os.environ.get('FEED_WEIGHT_SET', 'default')
+FEED_CANDIDATE_LIMIT = 500  # Скільки кандидатів завантажувати для ранжування
+FEED_BATCH_SIZE = 20  # Скільки найкращих анкет тримати в черзі користувача
+FEED_SEEN_WINDOW_HOURS = 24  # Переглянуті за цей час анкети не показуються повторно
+
+# Пошук користувачів в адмін панелі
+ADMIN_SEARCH_PAGE_SIZE = 10  # Кількість результатів на сторінці
+ADMIN_SEARCH_TRIGRAM_MIN_LENGTH = 3  # Коротші запити шукаються лише за префіксом
+
+# Повнотекстовий пошук за інтересами (поле "Про себе")
+INTEREST_SEARCH_PAGE_SIZE = 20  # Кількість анкет, що завантажуються за один запит
+INTEREST_SEARCH_MAX_QUERY_LENGTH = 100
+
+# Галерея профілю
+PROFILE_MAX_PHOTOS = 3  # Максимальна кількість фото в профілі
+
+# Кеш відрендерених карток анкет
+RENDER_CACHE_SIZE = 5000  # Максимальна кількість збережених карток
+
+# Вихідні запити до Telegram Bot API (ліміти Telegram: ~30 повідомлень/с загалом, ~1/с в особистий чат, 20/хв у групу)
+OUTBOUND_GLOBAL_RATE = 30  # Повідомлень на секунду для всього бота
+OUTBOUND_BULK_RATE = 20  # Повідомлень на секунду для розсилок (решта лишається для відповідей користувачам)
+OUTBOUND_CHAT_RATE = 1  # Повідомлень на секунду в один особистий чат
+OUTBOUND_CHAT_BURST = 3  # Скільки повідомлень підряд можна відправити в чат без очікування
+OUTBOUND_GROUP_RATE = 20 / 60  # Повідомлень на секунду в одну групу
+OUTBOUND_MAX_RETRIES = 3  # Повторні спроби після RetryAfter (flood control)
+OUTBOUND_RETRY_JITTER = 1.0  # Максимальна випадкова добавка до паузи RetryAfter, с
+
+# Захист від повторної доставки оновлень (update_id)
+UPDATE_DEDUP_WINDOW = 10000  # Скільки останніх update_id пам'ятати
+UPDATE_DEDUP_USE_DB = os.environ.get('UPDATE_DEDUP_USE_DB', 'false').lower() == 'true'  # Для кількох екземплярів бота
+UPDATE_DEDUP_DB_RETENTION_HOURS = 24  # Скільки зберігати update_id в БД
+
+# Контроль навантаження на вебхук
+WEBHOOK_MAX_IN_FLIGHT = int(os.environ.get('WEBHOOK_MAX_IN_FLIGHT', 64))  # Одночасних запитів до /webhook
+WEBHOOK_ENQUEUE_TIMEOUT = 2  # Скільки запит може чекати на місце в черзі, с
+WEBHOOK_RETRY_AFTER = 5  # Значення заголовка Retry-After у відповідях 429/503, с
+SHED_LOW_PRIORITY_AT = 0.8  # Заповненість черги, з якої службові оновлення відкидаються, а перегляди відкладаються
+VIEW_LOG_FLUSH_INTERVAL = 5  # Як часто записувати перегляди анкет у БД, с
+VIEW_LOG_MAX_BUFFER = 5000  # Максимум переглядів у буфері (найстаріші витісняються)
+
+# HTTP клієнт Telegram Bot API
+TELEGRAM_SEND_POOL_SIZE = int(os.environ.get('TELEGRAM_SEND_POOL_SIZE', 16))  # З'єднань для відправки повідомлень
+TELEGRAM_UPDATES_POOL_SIZE = 1  # З'єднань для getUpdates (long polling)
+TELEGRAM_CONNECT_TIMEOUT = 5.0  # с
+TELEGRAM_READ_TIMEOUT = 10.0  # с
+TELEGRAM_WRITE_TIMEOUT = 10.0  # с
+TELEGRAM_POOL_TIMEOUT = 3.0  # Скільки чекати на вільне з'єднання в пулі, с
+TELEGRAM_KEEPALIVE_EXPIRY = 60.0  # Скільки тримати невикористане з'єднання відкритим, с
+
+# Черга сповіщень (лайки та перегляди збираються в дайджест, матчі відправляються одразу)
+NOTIFY_DIGEST_WINDOW = int(os.environ.get('NOTIFY_DIGEST_WINDOW', 15 * 60))  # Секунд від першої події до дайджесту
+NOTIFY_FLUSH_INTERVAL = 30  # Як часто перевіряти готові дайджести, с
+NOTIFY_QUIET_HOURS = (23, 8)  # Тихі години (з, до) - дайджести відкладаються до ранку
+NOTIFY_TIMEZONE = 'Europe/Kyiv'
+NOTIFY_VIEWS_MIN = 5  # Мінімум переглядів, щоб дайджест без лайків мав сенс
+NOTIFY_VIEWS_MAX_AGE = 4 * NOTIFY_DIGEST_WINDOW  # Перегляди, що за цей час не набрали мінімуму, відкидаються, с
+NOTIFY_DEDUP_SECONDS = 3600  # Повторне сповіщення про той самий матч не відправляється цей час
+NOTIFY_WORKERS = 4  # Кількість одночасних відправок сповіщень
+NOTIFY_QUEUE_SIZE = 10000  # Максимальна кількість сповіщень у черзі
+
+# Періодичні завдання (інтервали в секундах)
+JOB_WORKERS = 2  # Потоків для завдань, що працюють з БД або рахують
+JOB_DEFAULT_JITTER = 0.1  # Випадковий розкид інтервалу (частка), щоб екземпляри не запускали завдання одночасно
+KEEP_ALIVE_URL = os.environ.get('KEEP_ALIVE_URL', 'https://chatrix-bot-4m1p.onrender.com/health')  # Порожнє значення вимикає пінг
+RATINGS_JOB_INTERVAL = 60 * 60
+RETENTION_JOB_INTERVAL = 6 * 60 * 60
+CACHE_WARMUP_INTERVAL = 10 * 60
+PROFILE_VIEWS_RETENTION_DAYS = 90  # Скільки зберігати перегляди анкет
+
+# Метрики (/metrics)
+LOOP_LAG_INTERVAL = 0.5  # Як часто вимірювати затримку циклу подій бота, с
+
+# Службові сторінки з текстом SQL та параметрами запитів (заголовок X-Admin-Token; без токена сторінки вимкнені)
+ADMIN_API_TOKEN = os.environ.get('ADMIN_API_TOKEN')
+
+# Статистика SQL-запитів (/slow_queries)
+DB_SLOW_QUERY_MS = 200  # Запити, довші за цей час, пишуться в лог як повільні
+# Частка повільних запитів, для яких знімається EXPLAIN (ANALYZE, BUFFERS). ANALYZE повторно виконує
+# повільний запит на спільному з'єднанні, і запити обробників весь цей час чекають на нього
+DB_EXPLAIN_SAMPLE_RATE = float(os.environ.get('DB_EXPLAIN_SAMPLE_RATE', 0.01))
+DB_EXPLAIN_MIN_INTERVAL = 10 * 60  # Не частіше одного плану на відбиток запиту, с
+DB_EXPLAIN_JOB_INTERVAL = 60  # Як часто знімати відібрані плани, с
+QUERY_STATS_MAX_FINGERPRINTS = 500  # Скільки різних відбитків запитів пам'ятати
+
+# Бюджет запитів на одне оновлення (/query_budgets): off, warn (лог) або fail (помилка обробки)
+QUERY_BUDGET_MODE = os.environ.get('QUERY_BUDGET_MODE', 'off')
+QUERY_BUDGETS = {  # Назва обробника -> максимум SQL-запитів та викликів Bot API (None - без ліміту)
+    'default': {'sql': 8, 'api': 3},
+    'search_profiles': {'sql': 10, 'api': 3},
+    'show_next_profile': {'sql': 10, 'api': 3},
+    'handle_like': {'sql': 10, 'api': 4},
+    'handle_like_back': {'sql': 10, 'api': 4},
+    'show_top_users': {'sql': 8, 'api': 3},
+    'handle_top_selection': {'sql': 10, 'api': 3},
+    'handle_top_navigation': {'sql': 10, 'api': 3},
+    'show_matches': {'sql': 10, 'api': 12},
+    'show_likes': {'sql': 10, 'api': 12},
+    'handle_admin_actions': {'sql': 10, 'api': 3},
+    'handle_admin_input': {'sql': 10, 'api': None},  # Розсилка надсилає повідомлення кожному користувачу
+}
+
+# Перевірка здоров'я (/health/deep): результат кешується, проби не звертаються до БД
+HEALTH_CHECK_INTERVAL = 15  # Як часто виконувати перевірки, с
+HEALTH_CHECK_TIMEOUT = 5  # Перевірка без відповіді довше за цей час вважається не пройденою, с
+HEALTH_STALE_AFTER = 60  # Результат старший за цей час вважається застарілим (503), с
+HEALTH_MAX_LOOP_LAG = 0.5  # Затримка циклу подій бота, понад яку стан degraded, с
+HEALTH_MAX_QUEUE_LOAD = 0.8  # Заповненість черги оновлень, понад яку стан degraded (частка)
+
+# Логування
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'text')  # text або json (один JSON-об'єкт на рядок)
+LOG_QUEUE_SIZE = 10000  # При переповненні черги записи INFO/DEBUG відкидаються
+LOG_SAMPLE_RATES = {  # Частка записів INFO для частих подій (попередження та помилки пишуться завжди)
+    'view': 0.01,
+    'like': 0.1,
+    'search': 0.1,
+    'profile': 0.1,
+    'admin': 1.0,
+}
+
 # Автоматична ініціалізація при імпорті
 try:
     initialize_config()
@@ -1,86 +1,330 @@
 import os
 import psycopg2
 from psycopg2.extras import RealDictCursor
-from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
 import logging
+import random
+import threading
 from datetime import datetime, date
 import time
+from config import (
+    DB_SSLMODE, DB_CONNECT_TIMEOUT, DB_CONNECT_RETRIES, DB_RETRY_BASE_DELAY, DB_RETRY_MAX_DELAY,
+    DB_STATEMENT_TIMEOUT_MS, DB_IDLE_IN_TRANSACTION_TIMEOUT_MS, DB_CONN_MAX_AGE, DB_VALIDATE_AFTER_IDLE,
+    DB_APPLICATION_NAME,
+    SEARCH_LIMIT, FEED_CANDIDATE_LIMIT, FEED_SEEN_WINDOW_HOURS,
+    ADMIN_SEARCH_PAGE_SIZE, ADMIN_SEARCH_TRIGRAM_MIN_LENGTH, INTEREST_SEARCH_PAGE_SIZE,
+    PROFILE_MAX_PHOTOS
+)
+from utils.metrics import instrument_methods, DB_METHOD_SECONDS
+from utils.query_stats import query_profiler, caller_name
+from utils.query_budget import query_budget
+from utils.logs import event_logger
 
 logger = logging.getLogger(__name__)
+view_log = event_logger('view')
 
-def cleanup_connections():
-    """Очищення активних з'єднань з базою даних"""
-    try:
-        database_url = os.environ.get('DATABASE_URL')
-        if not database_url:
-            return
-            
-        conn = psycopg2.connect(database_url, sslmode='require')
-        conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
-        cursor = conn.cursor()
-        
-        # Завершення всіх активних транзакцій
-        cursor.execute("""
-            SELECT pg_terminate_backend(pg_stat_activity.pid)
-            FROM pg_stat_activity
-            WHERE pg_stat_activity.datname = current_database()
-            AND pid <> pg_backend_pid()
-            AND state = 'idle in transaction'
-        """)
-        
-        cursor.close()
-        conn.close()
-        logger.info("✅ Активні з'єднання очищено")
-    except Exception as e:
-        logger.warning(f"⚠️ Не вдалося очистити з'єднання: {e}")
+class ManagedConnection:
+    """Життєвий цикл з'єднання з PostgreSQL
 
-class Database:
-    def __init__(self):
-        # Очищаємо активні з'єднання перед стартом
-        cleanup_connections()
-        
-        # Отримуємо URL бази даних з змінних середовища
-        database_url = os.environ.get('DATABASE_URL')
-        
-        if not database_url:
-            logger.error("❌ DATABASE_URL не встановлено")
-            raise ValueError("DATABASE_URL не встановлено")
-        
-        logger.info("🔄 Підключення до PostgreSQL...")
+    Таймаути сесії задаються на сервері при підключенні, тож зависла транзакція
+    закривається самим PostgreSQL, а не іншим екземпляром бота. Перед запитом після
+    простою з'єднання перевіряється, а після DB_CONN_MAX_AGE - перевідкривається.
+    З'єднання psycopg2 можна ділити між потоками, курсор - ні, тому кожен потік
+    (цикл бота, фонові задачі, Flask) отримує власний курсор на спільному з'єднанні.
+    Запит разом з читанням результату рахується в in_use: планове перевідкриття
+    відкладається, а reconnect() чекає, доки запити інших потоків не завершаться.
+    """
+
+    def __init__(self, database_url):
+        self.database_url = database_url
         self.conn = None
         self.cursor = None
-        self.database_url = database_url
-        self.connect_with_retry()
-        self.init_db()
-        logger.info("✅ Підключено до PostgreSQL")
+        self.created_at = 0.0
+        self.last_used = 0.0
+        self.lock = threading.RLock()
+        self.idle = threading.Condition(self.lock)
+        self.in_use = 0
+        self.local = threading.local()
+        self.stats = {
+            'connects': 0, 'recycled': 0, 'recycle_deferred': 0, 'broken': 0,
+            'validations': 0, 'failed_attempts': 0,
+        }
 
-    def connect_with_retry(self, max_retries=5):
-        """Підключення з повторними спробами"""
+    def open(self):
+        options = (
+            f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS} "
+            f"-c idle_in_transaction_session_timeout={DB_IDLE_IN_TRANSACTION_TIMEOUT_MS}"
+        )
+        self.conn = psycopg2.connect(
+            self.database_url,
+            sslmode=DB_SSLMODE,
+            connect_timeout=DB_CONNECT_TIMEOUT,
+            application_name=DB_APPLICATION_NAME,
+            options=options
+        )
+        self.conn.autocommit = True
+        self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+        self.created_at = self.last_used = time.monotonic()
+        self.stats['connects'] += 1
+
+    def connect(self, max_retries=DB_CONNECT_RETRIES):
+        """Підключення з експоненційною затримкою та випадковим розкидом між спробами"""
         for attempt in range(max_retries):
             try:
-                self.conn = psycopg2.connect(self.database_url, sslmode='require')
-                self.conn.autocommit = True
-                self.cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+                self.open()
                 logger.info(f"✅ Успішне підключення до PostgreSQL (спроба {attempt + 1})")
                 return
             except Exception as e:
+                self.stats['failed_attempts'] += 1
                 logger.error(f"❌ Помилка підключення (спроба {attempt + 1}): {e}")
                 if attempt < max_retries - 1:
-                    time.sleep(2)
-                    cleanup_connections()
+                    # Розкид не дає кільком екземплярам перепідключатися одночасно
+                    delay = min(DB_RETRY_MAX_DELAY, DB_RETRY_BASE_DELAY * 2 ** attempt)
+                    time.sleep(delay * random.uniform(0.5, 1.5))
                 else:
                     logger.error("❌ Не вдалося підключитися до PostgreSQL після всіх спроб")
                     raise
 
-    def reconnect(self):
-        """Перепідключення до бази даних"""
+    def close(self):
         try:
+            if self.cursor:
+                self.cursor.close()
             if self.conn:
                 self.conn.close()
-        except:
+        except Exception:
             pass
+        self.conn = None
+        self.cursor = None
+
+    def reconnect(self):
+        """Перевідкриття після запитів, що вже виконуються в інших потоках (не довше за statement_timeout)"""
+        with self.idle:
+            if not self.idle.wait_for(lambda: not self.in_use, DB_STATEMENT_TIMEOUT_MS / 1000):
+                logger.warning(f"⚠️ Перевідкриття з'єднання попри незавершені запити: {self.in_use}")
+            self.close()
+            self.connect()
+
+    def checkout(self):
+        """Курсор поточного потоку, готовий до запиту (з'єднання перевірене або перевідкрите)"""
+        with self.lock:
+            self.check()
+            cursor = getattr(self.local, 'cursor', None)
+            if cursor is None or cursor.closed or cursor.connection is not self.conn:
+                cursor = self.conn.cursor(cursor_factory=RealDictCursor)
+                self.local.cursor = cursor
+            return cursor
+
+    def query(self, query, params=None):
+        """Запит на курсорі поточного потоку: (рядки або None для запитів без результату, rowcount)
+
+        Результат читається одразу, тож після повернення з'єднання можна перевідкривати.
+        """
+        with self.lock:
+            cursor = self.checkout()
+            self.in_use += 1
+        try:
+            cursor.execute(query, params)
+            rows = cursor.fetchall() if cursor.description is not None else None
+            return rows, cursor.rowcount
+        finally:
+            with self.idle:
+                self.in_use -= 1
+                if not self.in_use:
+                    self.idle.notify_all()
+
+    def check(self):
+        now = time.monotonic()
+        if self.conn is None or self.conn.closed:
+            # Зламане з'єднання закривається одразу: запити на ньому все одно не завершаться
+            self.stats['broken'] += 1
+            self.close()
+            self.connect()
+        elif now - self.created_at > DB_CONN_MAX_AGE:
+            # Нові запити чекають тут само, доки завершаться вже розпочаті
+            if not self.idle.wait_for(lambda: not self.in_use, DB_STATEMENT_TIMEOUT_MS / 1000):
+                # Перевідкриємо при наступному запиті
+                self.stats['recycle_deferred'] += 1
+            elif time.monotonic() - self.created_at > DB_CONN_MAX_AGE:
+                # Поки цей потік чекав, з'єднання міг уже перевідкрити інший
+                self.stats['recycled'] += 1
+                logger.info("🔄 Планове перевідкриття з'єднання з PostgreSQL")
+                self.close()
+                self.connect()
+        elif now - self.last_used > DB_VALIDATE_AFTER_IDLE and not self.in_use:
+            self.stats['validations'] += 1
+            try:
+                self.cursor.execute('SELECT 1')
+                self.cursor.fetchone()
+            except psycopg2.Error as e:
+                self.stats['broken'] += 1
+                logger.warning(f"⚠️ З'єднання з PostgreSQL втрачено під час простою: {e}")
+                self.close()
+                self.connect()
+        self.last_used = time.monotonic()
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'connected': self.conn is not None and not self.conn.closed,
+            'in_use': self.in_use,
+            'age_seconds': round(time.monotonic() - self.created_at, 1) if self.conn else 0.0,
+        }
+
+
+class QueryResult:
+    """Прочитаний результат запиту поточного потоку (fetchone/fetchall/rowcount як у курсора)"""
+
+    __slots__ = ('rows', 'rowcount', 'position')
+
+    def __init__(self, rows, rowcount):
+        self.rows = rows
+        self.rowcount = rowcount
+        self.position = 0
+
+    def _remaining(self, size):
+        if self.rows is None:
+            raise psycopg2.ProgrammingError('no results to fetch')
+        rows = self.rows[self.position:self.position + size]
+        self.position += len(rows)
+        return rows
+
+    def fetchone(self):
+        rows = self._remaining(1)
+        return rows[0] if rows else None
+
+    def fetchmany(self, size=1):
+        return self._remaining(size)
+
+    def fetchall(self):
+        return self._remaining(len(self.rows or ()))
+
+
+class ManagedCursor:
+    """Курсор, що виконує кожен запит через ManagedConnection.query()
+
+    Результат читається в межах запиту і зберігається окремо для кожного потоку, тож
+    fetchone()/fetchall()/rowcount повертають результат останнього запиту цього потоку,
+    навіть якщо з'єднання тим часом перевідкрили або ним скористався інший потік.
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.local = threading.local()
+
+    @property
+    def current(self):
+        return getattr(self.local, 'result', None)
+
+    def execute(self, query, params=None):
+        self.local.result = None
+        started = time.perf_counter()
+        failed = True
+        try:
+            self.local.result = QueryResult(*self.connection.query(query, params))
+            failed = False
+        finally:
+            caller = caller_name()
+            query_profiler.record(query, params, caller, time.perf_counter() - started, failed)
+            query_budget.record_query(query, caller)
+
+    def close(self):
+        self.connection.close()
+
+    def __getattr__(self, name):
+        if name == 'rowcount' or name.startswith('fetch'):
+            # Без успішного запиту в цьому потоці результату немає (як після невдалого execute)
+            return getattr(self.current or QueryResult(None, -1), name)
+        return getattr(self.connection.cursor, name)
+
+
+class Database:
+    # Колонки, що повертаються пошуком користувачів в адмін панелі
+    SEARCH_USER_COLUMNS = 'id, telegram_id, username, first_name, age, city, is_banned, created_at'
+
+    # Головне фото користувача u (підзапит для списків анкет, щоб не робити окремий запит на кожну)
+    MAIN_PHOTO_SQL = '''(
+        SELECT p.file_id FROM photos p
+        WHERE p.user_id = u.id
+        ORDER BY p.is_main DESC, p.position, p.id
+        LIMIT 1
+    )'''
+
+    # Конфігурації повнотекстового пошуку для поля "Про себе":
+    # 'simple' зберігає слова як є (українська без стемінгу), решта додає основи слів
+    BIO_SEARCH_CONFIGS = ('simple', 'russian', 'english')
+
+    # Версія схеми: збільшується при кожній зміні init_db, інакше міграції пропускаються
+    SCHEMA_VERSION = 1
+
+    def __init__(self):
+        # Отримуємо URL бази даних з змінних середовища
+        database_url = os.environ.get('DATABASE_URL')
+        
+        if not database_url:
+            logger.error("❌ DATABASE_URL не встановлено")
+            raise ValueError("DATABASE_URL не встановлено")
         
+        logger.info("🔄 Підключення до PostgreSQL...")
+        self.database_url = database_url
+        self.connection = ManagedConnection(database_url)
+        self.cursor = ManagedCursor(self.connection)
+        self.has_trigram = False
+        self.has_is_main = None
+        self.bio_search_configs = list(self.BIO_SEARCH_CONFIGS)
         self.connect_with_retry()
+        self.detect_features()
+        logger.info("✅ Підключено до PostgreSQL")
+
+    def detect_features(self):
+        """Можливості сервера, від яких залежать запити (без змін схеми)"""
+        self.has_trigram = bool(self.fetch_one_safe("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        if 'ukrainian' not in self.bio_search_configs and self.fetch_one_safe(
+            "SELECT 1 FROM pg_ts_config WHERE cfgname = 'ukrainian'"
+        ):
+            self.bio_search_configs.append('ukrainian')
+
+    def migrate(self):
+        """Міграції схеми (окремий етап запуску; пропускаються, якщо схема вже актуальна)"""
+        self.execute_safe('''
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version INTEGER PRIMARY KEY,
+                applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        current = self.fetch_one_safe('SELECT MAX(version) AS version FROM schema_migrations')
+        if current and current['version'] is not None and current['version'] >= self.SCHEMA_VERSION:
+            logger.info(f"ℹ️ Схема бази даних актуальна (версія {current['version']})")
+            return True
+        
+        # Заповнення та індекси на великих таблицях довші за statement_timeout сесії
+        self.execute_safe('SET statement_timeout = 0')
+        try:
+            success = self.init_db()
+        finally:
+            self.execute_safe(f'SET statement_timeout = {DB_STATEMENT_TIMEOUT_MS}')
+        
+        # Версія записується лише після повністю успішної міграції, інакше наступний запуск повторить її
+        if not success:
+            logger.error(f"❌ Міграцію до версії {self.SCHEMA_VERSION} не завершено, версію схеми не записано")
+            return False
+        if not self.execute_safe(
+            'INSERT INTO schema_migrations (version) VALUES (%s) ON CONFLICT (version) DO NOTHING',
+            (self.SCHEMA_VERSION,)
+        ):
+            return False
+        logger.info(f"✅ Схему бази даних оновлено до версії {self.SCHEMA_VERSION}")
+        return True
+
+    @property
+    def conn(self):
+        return self.connection.conn
+
+    def connect_with_retry(self, max_retries=DB_CONNECT_RETRIES):
+        """Підключення з повторними спробами"""
+        self.connection.connect(max_retries)
+
+    def reconnect(self):
+        """Перепідключення до бази даних"""
+        self.connection.reconnect()
 
     def execute_safe(self, query, params=None):
         """Безпечне виконання запиту з обробкою помилок"""
@@ -143,11 +387,12 @@ class Database:
             return None
 
     def init_db(self):
-        """Ініціалізація бази даних"""
+        """Ініціалізація бази даних (True - усі кроки виконано успішно)"""
         logger.info("🔄 Ініціалізація бази даних...")
+        steps = []
         
         # Створення таблиці users
-        self.execute_safe('''
+        steps.append(self.execute_safe('''
             CREATE TABLE IF NOT EXISTS users (
                 id SERIAL PRIMARY KEY,
                 telegram_id BIGINT UNIQUE NOT NULL,
@@ -166,10 +411,10 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 last_active TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
+        '''))
         
         # Створення таблиці photos
-        self.execute_safe('''
+        steps.append(self.execute_safe('''
             CREATE TABLE IF NOT EXISTS photos (
                 id SERIAL PRIMARY KEY,
                 user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
@@ -177,10 +422,10 @@ class Database:
                 is_main BOOLEAN DEFAULT FALSE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
+        '''))
         
         # Створення таблиці likes
-        self.execute_safe('''
+        steps.append(self.execute_safe('''
             CREATE TABLE IF NOT EXISTS likes (
                 id SERIAL PRIMARY KEY,
                 from_user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
@@ -188,10 +433,10 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(from_user_id, to_user_id)
             )
-        ''')
+        '''))
         
         # Створення таблиці matches
-        self.execute_safe('''
+        steps.append(self.execute_safe('''
             CREATE TABLE IF NOT EXISTS matches (
                 id SERIAL PRIMARY KEY,
                 user1_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
@@ -199,35 +444,57 @@ class Database:
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                 UNIQUE(user1_id, user2_id)
             )
-        ''')
+        '''))
         
         # Створення таблиці profile_views з правильними назвами колонок
-        self.execute_safe('''
+        steps.append(self.execute_safe('''
             CREATE TABLE IF NOT EXISTS profile_views (
                 id SERIAL PRIMARY KEY,
                 viewer_user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
                 viewed_user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
                 viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
-        ''')
+        '''))
+        
+        # Оброблені оновлення Telegram (захист від повторної доставки між екземплярами бота)
+        steps.append(self.execute_safe('''
+            CREATE TABLE IF NOT EXISTS processed_updates (
+                update_id BIGINT PRIMARY KEY,
+                processed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        '''))
         
         # Додавання відсутніх колонок
-        self.add_missing_columns()
+        steps.append(self.add_missing_columns())
+        
+        # Порядок фото в галереї
+        steps.append(self.init_photo_positions())
+        
+        # Індекси
+        steps.append(self.create_indexes())
+        
+        # Повнотекстовий пошук за інтересами
+        steps.append(self.init_bio_search())
         
         # Перевірка та виправлення таблиці profile_views
-        self.fix_profile_views_table_if_needed()
+        steps.append(self.fix_profile_views_table_if_needed())
         
+        if not all(steps):
+            logger.error(f"❌ Ініціалізацію бази даних не завершено: невдалих кроків {steps.count(False)}")
+            return False
         logger.info("✅ База даних ініціалізована")
+        return True
 
     def fix_profile_views_table_if_needed(self):
         """Перевірка та виправлення таблиці profile_views при необхідності"""
         try:
-            # Перевіряємо структуру таблиці
-            self.execute_safe("""
+            # Перевіряємо структуру таблиці (невдала перевірка - не привід перестворювати таблицю)
+            if not self.execute_safe("""
                 SELECT column_name 
                 FROM information_schema.columns 
                 WHERE table_name = 'profile_views'
-            """)
+            """):
+                return False
             columns = self.cursor.fetchall()
             column_names = [col['column_name'] for col in columns]
             
@@ -250,17 +517,19 @@ class Database:
         """Виправлення структури таблиці profile_views"""
         try:
             # Видаляємо стару таблицю
-            self.execute_safe('DROP TABLE IF EXISTS profile_views CASCADE')
+            if not self.execute_safe('DROP TABLE IF EXISTS profile_views CASCADE'):
+                return False
             
             # Створюємо нову таблицю з правильними назвами колонок
-            self.execute_safe('''
+            if not self.execute_safe('''
                 CREATE TABLE profile_views (
                     id SERIAL PRIMARY KEY,
                     viewer_user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
                     viewed_user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
                     viewed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
-            ''')
+            '''):
+                return False
             
             logger.info("✅ Таблицю profile_views перестворено з правильними колонками")
             return True
@@ -273,26 +542,142 @@ class Database:
         columns_to_add = [
             ("users", "likes_count", "INTEGER DEFAULT 0"),
             ("users", "is_banned", "BOOLEAN DEFAULT FALSE"),
-            ("photos", "is_main", "BOOLEAN DEFAULT FALSE")
+            ("photos", "is_main", "BOOLEAN DEFAULT FALSE"),
+            ("users", "bio_tsv", "TSVECTOR"),
+            ("users", "profile_version", "INTEGER DEFAULT 0"),
+            ("photos", "position", "INTEGER")
         ]
         
+        success = True
         for table, column, definition in columns_to_add:
             try:
                 # Перевіряємо чи існує колонка
-                self.execute_safe(f'''
+                if not self.execute_safe(f'''
                     SELECT column_name 
                     FROM information_schema.columns 
                     WHERE table_name = '{table}' AND column_name = '{column}'
-                ''')
+                '''):
+                    success = False
+                    continue
                 exists = self.cursor.fetchone() is not None
                 
                 if not exists:
-                    self.execute_safe(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+                    if not self.execute_safe(f'ALTER TABLE {table} ADD COLUMN {column} {definition}'):
+                        success = False
+                        continue
                     logger.info(f"✅ Колонка {column} додана до {table}")
                 else:
                     logger.info(f"ℹ️ Колонка {column} вже існує в {table}")
             except Exception as e:
                 logger.warning(f"⚠️ Не вдалося додати {column} до {table}: {e}")
+                success = False
+        return success
+
+    def init_photo_positions(self):
+        """Заповнення позицій для фото, доданих до появи колонки position"""
+        result = self.fetch_one_safe('''
+            WITH numbered AS (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY user_id ORDER BY is_main DESC, created_at, id
+                ) - 1 AS position
+                FROM photos
+                WHERE user_id IN (SELECT user_id FROM photos WHERE position IS NULL)
+            ), updated AS (
+                UPDATE photos p SET position = numbered.position
+                FROM numbered
+                WHERE p.id = numbered.id
+                RETURNING p.id
+            )
+            SELECT COUNT(*) FROM updated
+        ''')
+        if result is None:
+            return False
+        if result['count']:
+            logger.info(f"✅ Позиції в галереї заповнено для {result['count']} фото")
+        return True
+
+    def create_indexes(self):
+        """Створення індексів для пошукових запитів"""
+        indexes = [
+            ('idx_users_city_lower', 'CREATE INDEX IF NOT EXISTS idx_users_city_lower ON users (LOWER(TRIM(city)))'),
+            ('idx_users_last_active', 'CREATE INDEX IF NOT EXISTS idx_users_last_active ON users (last_active DESC)'),
+            ('idx_profile_views_viewer', 'CREATE INDEX IF NOT EXISTS idx_profile_views_viewer ON profile_views (viewer_user_id, viewed_user_id, viewed_at)'),
+            ('idx_photos_user_position', 'CREATE INDEX IF NOT EXISTS idx_photos_user_position ON photos (user_id, position)'),
+        ]
+        
+        # Префіксний пошук за ім'ям та username (адмін панель)
+        indexes += [
+            ('idx_users_username_prefix', 'CREATE INDEX IF NOT EXISTS idx_users_username_prefix ON users (LOWER(username) text_pattern_ops)'),
+            ('idx_users_first_name_prefix', 'CREATE INDEX IF NOT EXISTS idx_users_first_name_prefix ON users (LOWER(first_name) text_pattern_ops)'),
+        ]
+        
+        # Триграмні індекси для пошуку за підрядком (потрібне розширення pg_trgm)
+        self.execute_safe('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        self.has_trigram = bool(self.fetch_one_safe("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'"))
+        if self.has_trigram:
+            indexes += [
+                ('idx_users_username_trgm', 'CREATE INDEX IF NOT EXISTS idx_users_username_trgm ON users USING GIN (LOWER(username) gin_trgm_ops)'),
+                ('idx_users_first_name_trgm', 'CREATE INDEX IF NOT EXISTS idx_users_first_name_trgm ON users USING GIN (LOWER(first_name) gin_trgm_ops)'),
+            ]
+        else:
+            logger.warning("⚠️ Розширення pg_trgm недоступне, пошук користувачів працюватиме лише за префіксом")
+        
+        success = True
+        for name, statement in indexes:
+            if not self.execute_safe(statement):
+                logger.warning(f"⚠️ Не вдалося створити індекс {name}")
+                success = False
+        return success
+
+    def bio_tsvector_sql(self, column):
+        """SQL-вираз tsvector для тексту з усіх конфігурацій (точні слова мають вищу вагу)"""
+        parts = []
+        for config in self.bio_search_configs:
+            weight = 'A' if config == 'simple' else 'B'
+            parts.append(f"setweight(to_tsvector('{config}', COALESCE({column}, '')), '{weight}')")
+        return ' || '.join(parts)
+
+    def bio_tsquery_sql(self):
+        """SQL-вираз tsquery для пошукового запиту (параметр повторюється для кожної конфігурації)"""
+        return ' || '.join(f"websearch_to_tsquery('{config}', %s)" for config in self.bio_search_configs)
+
+    def init_bio_search(self):
+        """Тригер, що підтримує колонку bio_tsv, GIN індекс та заповнення існуючих анкет"""
+        try:
+            # Українська конфігурація (є не в усіх збірках PostgreSQL) визначається в detect_features
+            steps = [self.execute_safe(f'''
+                CREATE OR REPLACE FUNCTION users_bio_tsv_update() RETURNS trigger AS $$
+                BEGIN
+                    NEW.bio_tsv := {self.bio_tsvector_sql('NEW.bio')};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            ''')]
+            steps.append(self.execute_safe('DROP TRIGGER IF EXISTS users_bio_tsv_trigger ON users'))
+            steps.append(self.execute_safe('''
+                CREATE TRIGGER users_bio_tsv_trigger
+                BEFORE INSERT OR UPDATE OF bio ON users
+                FOR EACH ROW EXECUTE FUNCTION users_bio_tsv_update()
+            '''))
+            
+            # Заповнюємо bio_tsv для анкет, створених до появи тригера
+            filled = self.execute_safe(f'''
+                UPDATE users SET bio_tsv = {self.bio_tsvector_sql('bio')}
+                WHERE bio_tsv IS NULL AND bio IS NOT NULL
+            ''')
+            steps.append(filled)
+            if filled and self.cursor.rowcount > 0:
+                logger.info(f"✅ Пошуковий індекс заповнено для {self.cursor.rowcount} анкет")
+            
+            if not self.execute_safe('CREATE INDEX IF NOT EXISTS idx_users_bio_tsv ON users USING GIN (bio_tsv)'):
+                logger.warning("⚠️ Не вдалося створити індекс idx_users_bio_tsv")
+                steps.append(False)
+            
+            logger.info(f"✅ Пошук за інтересами: {', '.join(self.bio_search_configs)}")
+            return all(steps)
+        except Exception as e:
+            logger.error(f"❌ Помилка налаштування пошуку за інтересами: {e}")
+            return False
 
     def add_user(self, telegram_id, username, first_name):
         """Додавання нового користувача"""
@@ -325,7 +710,17 @@ class Database:
             logger.error(f"❌ Помилка отримання користувача {telegram_id}: {e}")
             return None
 
-    def update_user_profile(self, telegram_id, age=None, gender=None, city=None, 
+    def get_users_brief(self, telegram_ids):
+        """Ім'я, username та рейтинг кількох користувачів одним запитом: {telegram_id: row}"""
+        if not telegram_ids:
+            return {}
+        rows = self.fetch_safe('''
+            SELECT telegram_id, first_name, username, rating, is_banned
+            FROM users WHERE telegram_id = ANY(%s)
+        ''', (list(telegram_ids),))
+        return {row['telegram_id']: row for row in rows}
+
+    def update_user_profile(self, telegram_id, age=None, gender=None, city=None,
                           seeking_gender=None, goal=None, bio=None):
         """Оновлення профілю користувача"""
         try:
@@ -359,6 +754,9 @@ class Database:
                 update_fields.append("bio = %s")
                 values.append(bio)
             
+            # Нова версія профілю - закешовані картки стають неактуальними
+            update_fields.append("profile_version = profile_version + 1")
+            
             # Додаємо оновлення часу останньої активності
             update_fields.append("last_active = %s")
             values.append(datetime.now())
@@ -431,90 +829,83 @@ class Database:
             return None, False
 
     def add_user_photo(self, telegram_id, file_id, is_main=False):
-        """Додавання фото користувача до бази даних"""
+        """Додавання фото в кінець галереї користувача (не більше PROFILE_MAX_PHOTOS)"""
         try:
-            # Отримуємо ID користувача
-            user = self.fetch_one_safe('SELECT id FROM users WHERE telegram_id = %s', (telegram_id,))
+            # Позиція, ліміт та головне фото визначаються в тому ж запиті, що й вставка
+            photo = self.fetch_one_safe('''
+                INSERT INTO photos (user_id, file_id, is_main, position)
+                SELECT u.id, %s,
+                       %s OR NOT EXISTS (SELECT 1 FROM photos p WHERE p.user_id = u.id),
+                       COALESCE((SELECT MAX(p.position) + 1 FROM photos p WHERE p.user_id = u.id), 0)
+                FROM users u
+                WHERE u.telegram_id = %s
+                  AND (SELECT COUNT(*) FROM photos p WHERE p.user_id = u.id) < %s
+                RETURNING id, is_main
+            ''', (file_id, is_main, telegram_id, PROFILE_MAX_PHOTOS))
             
-            if not user:
-                logger.error(f"❌ Користувача {telegram_id} не знайдено для додавання фото")
+            if not photo:
+                logger.error(f"❌ Фото не додано для {telegram_id}: користувача не знайдено або досягнуто ліміт")
                 return False
             
-            # Перевіряємо кількість фото користувача
-            result = self.fetch_one_safe('SELECT COUNT(*) FROM photos WHERE user_id = %s', (user['id'],))
-            photo_count = result['count'] if result else 0
-            
-            # Якщо це перше фото, автоматично робимо його основним
-            if photo_count == 0:
-                is_main = True
+            # Оновлюємо прапорець has_photo та версію профілю
+            self.execute_safe('''
+                UPDATE users SET has_photo = TRUE, profile_version = profile_version + 1 
+                WHERE telegram_id = %s
+            ''', (telegram_id,))
             
-            # Додаємо фото
-            if self.execute_safe('''
-                INSERT INTO photos (user_id, file_id, is_main)
-                VALUES (%s, %s, %s)
-            ''', (user['id'], file_id, is_main)):
-                
-                # Оновлюємо прапорець has_photo у користувача
-                self.execute_safe('''
-                    UPDATE users SET has_photo = TRUE 
-                    WHERE telegram_id = %s
-                ''', (telegram_id,))
-                
-                logger.info(f"✅ Фото додано для користувача {telegram_id}, is_main: {is_main}")
-                return True
-            return False
+            logger.info(f"✅ Фото додано для користувача {telegram_id}, is_main: {photo['is_main']}")
+            return True
             
         except Exception as e:
             logger.error(f"❌ Помилка додавання фото для {telegram_id}: {e}")
             return False
 
-    def get_profile_photos(self, telegram_id):
-        """Отримання фото профілю"""
-        try:
-            # Спочатку перевіряємо чи існує колонка is_main
-            has_is_main = self.fetch_one_safe('''
+    def photos_have_is_main(self):
+        """Чи є в таблиці photos колонка is_main (перевіряється один раз)"""
+        if self.has_is_main is None:
+            self.has_is_main = self.fetch_one_safe('''
                 SELECT column_name 
                 FROM information_schema.columns 
                 WHERE table_name = 'photos' AND column_name = 'is_main'
             ''') is not None
-            
-            if has_is_main:
-                photos = self.fetch_safe('''
-                    SELECT p.file_id FROM photos p
-                    JOIN users u ON p.user_id = u.id
-                    WHERE u.telegram_id = %s
-                    ORDER BY p.is_main DESC, p.created_at ASC
-                ''', (telegram_id,))
-            else:
-                # Якщо колонки is_main немає, використовуємо старий запит
-                photos = self.fetch_safe('''
-                    SELECT p.file_id FROM photos p
-                    JOIN users u ON p.user_id = u.id
-                    WHERE u.telegram_id = %s
-                    ORDER BY p.created_at ASC
-                ''', (telegram_id,))
-                
+        return self.has_is_main
+
+    def bump_profile_version(self, telegram_id):
+        """Нова версія профілю (скидає закешовані картки анкети)"""
+        return self.execute_safe(
+            'UPDATE users SET profile_version = profile_version + 1 WHERE telegram_id = %s',
+            (telegram_id,)
+        )
+
+    def get_user_gallery(self, telegram_id):
+        """Фото користувача одним запитом: спочатку головне, далі за позицією в галереї"""
+        try:
+            photos = self.fetch_safe('''
+                SELECT p.file_id FROM photos p
+                JOIN users u ON p.user_id = u.id
+                WHERE u.telegram_id = %s
+                ORDER BY p.is_main DESC, p.position, p.id
+            ''', (telegram_id,))
             return [photo['file_id'] for photo in photos]
         except Exception as e:
-            logger.error(f"❌ Помилка отримання фото для {telegram_id}: {e}")
+            logger.error(f"❌ Помилка отримання галереї для {telegram_id}: {e}")
             return []
 
+    def get_profile_photos(self, telegram_id):
+        """Отримання фото профілю"""
+        return self.get_user_gallery(telegram_id)
+
     def get_main_photo(self, telegram_id):
         """Отримання головного фото"""
         try:
-            # Спочатку перевіряємо чи існує колонка is_main
-            has_is_main = self.fetch_one_safe('''
-                SELECT column_name 
-                FROM information_schema.columns 
-                WHERE table_name = 'photos' AND column_name = 'is_main'
-            ''') is not None
+            has_is_main = self.photos_have_is_main()
             
             if has_is_main:
                 result = self.fetch_one_safe('''
                     SELECT p.file_id FROM photos p
                     JOIN users u ON p.user_id = u.id
                     WHERE u.telegram_id = %s AND p.is_main = TRUE
-                    ORDER BY p.created_at ASC
+                    ORDER BY p.position, p.id
                     LIMIT 1
                 ''', (telegram_id,))
             else:
@@ -523,7 +914,7 @@ class Database:
                     SELECT p.file_id FROM photos p
                     JOIN users u ON p.user_id = u.id
                     WHERE u.telegram_id = %s
-                    ORDER BY p.created_at ASC
+                    ORDER BY p.position, p.id
                     LIMIT 1
                 ''', (telegram_id,))
                 
@@ -552,6 +943,7 @@ class Database:
                 UPDATE photos SET is_main = TRUE 
                 WHERE user_id = %s AND file_id = %s
             ''', (user['id'], file_id)):
+                self.bump_profile_version(telegram_id)
                 logger.info(f"✅ Головне фото оновлено для {telegram_id}")
                 return True
             return False
@@ -582,7 +974,7 @@ class Database:
                 # Якщо фото не залишилося, оновлюємо has_photo
                 if remaining_photos == 0:
                     self.execute_safe('''
-                        UPDATE users SET has_photo = FALSE 
+                        UPDATE users SET has_photo = FALSE, profile_version = profile_version + 1 
                         WHERE telegram_id = %s
                     ''', (telegram_id,))
                 # Якщо видалили головне фото, встановлюємо нове головне
@@ -590,7 +982,7 @@ class Database:
                     new_main = self.fetch_one_safe('''
                         SELECT file_id FROM photos 
                         WHERE user_id = %s 
-                        ORDER BY created_at ASC 
+                        ORDER BY position, id 
                         LIMIT 1
                     ''', (user['id'],))
                     if new_main:
@@ -653,6 +1045,47 @@ class Database:
             logger.error(f"❌ Помилка отримання випадкового користувача: {e}")
             return None
 
+    def get_discovery_candidates(self, telegram_id, limit=FEED_CANDIDATE_LIMIT, seen_window_hours=FEED_SEEN_WINDOW_HOURS):
+        """Кандидати для стрічки: ще не лайкнуті та не переглянуті нещодавно, з сирими ознаками для ранжування"""
+        try:
+            return self.fetch_safe('''
+                WITH me AS (
+                    SELECT id, gender FROM users WHERE telegram_id = %s
+                )
+                SELECT u.*,
+                    COALESCE(u.rating, 0) AS rating,
+                    COALESCE(EXTRACT(EPOCH FROM u.last_active), 0)::FLOAT AS last_active_ts,
+                    ((u.age IS NOT NULL)::INT + (u.gender IS NOT NULL)::INT
+                        + (COALESCE(u.city, '') <> '')::INT + (COALESCE(u.goal, '') <> '')::INT
+                        + (COALESCE(u.bio, '') <> '')::INT) AS profile_filled,
+                    COALESCE(u.has_photo, FALSE)::INT AS has_photo,
+                    EXISTS (
+                        SELECT 1 FROM likes l
+                        WHERE l.from_user_id = u.id AND l.to_user_id = me.id
+                    )::INT AS liked_me,
+                    (u.seeking_gender IS NULL OR u.seeking_gender = 'all'
+                        OR u.seeking_gender = me.gender)::INT AS seeks_viewer
+                FROM users u CROSS JOIN me
+                WHERE u.id != me.id
+                AND u.age IS NOT NULL
+                AND u.gender IS NOT NULL
+                AND u.is_banned = FALSE
+                AND NOT EXISTS (
+                    SELECT 1 FROM likes l
+                    WHERE l.from_user_id = me.id AND l.to_user_id = u.id
+                )
+                AND NOT EXISTS (
+                    SELECT 1 FROM profile_views pv
+                    WHERE pv.viewer_user_id = me.id AND pv.viewed_user_id = u.id
+                    AND pv.viewed_at > NOW() - make_interval(hours => %s)
+                )
+                ORDER BY u.last_active DESC
+                LIMIT %s
+            ''', (telegram_id, seen_window_hours, limit))
+        except Exception as e:
+            logger.error(f"❌ Помилка отримання кандидатів для стрічки: {e}")
+            return []
+
     def get_all_active_users(self, exclude_telegram_id=None):
         """Отримання всіх активних користувачів"""
         try:
@@ -711,16 +1144,51 @@ class Database:
             logger.error(f"❌ Помилка розблокування користувача {telegram_id}: {e}")
             return False
 
-    def search_user(self, query):
-        """Пошук користувача"""
+    def search_user(self, query, limit=ADMIN_SEARCH_PAGE_SIZE, after_id=None):
+        """Пошук користувача за ID, username або ім'ям
+
+        Повертає не більше limit коротких записів, відсортованих від нових до старих.
+        Для наступної сторінки передайте after_id = id останнього запису.
+        """
         try:
-            return self.fetch_safe('''
-                SELECT * FROM users 
-                WHERE telegram_id::TEXT LIKE %s 
-                   OR username ILIKE %s 
-                   OR first_name ILIKE %s
-                ORDER BY created_at DESC
-            ''', (f'%{query}%', f'%{query}%', f'%{query}%'))
+            query = (query or '').strip()
+            if not query:
+                return []
+            
+            # Швидкий шлях: точний пошук за Telegram ID
+            if query.isdigit() and after_id is None:
+                found = self.fetch_one_safe(
+                    f'SELECT {self.SEARCH_USER_COLUMNS} FROM users WHERE telegram_id = %s',
+                    (int(query),)
+                )
+                if found:
+                    return [found]
+            
+            term = query.lstrip('@')
+            if not term:
+                return []
+            
+            # Короткі запити - лише за префіксом, довші - за підрядком через триграмний індекс
+            substring = self.has_trigram and len(term) >= ADMIN_SEARCH_TRIGRAM_MIN_LENGTH
+            
+            # Екрануємо спецсимволи LIKE
+            term = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            pattern = f'%{term}%' if substring else f'{term}%'
+            
+            params = [pattern, pattern]
+            keyset = ''
+            if after_id is not None:
+                keyset = 'AND id < %s'
+                params.append(after_id)
+            params.append(limit)
+            
+            return self.fetch_safe(f'''
+                SELECT {self.SEARCH_USER_COLUMNS} FROM users
+                WHERE (LOWER(username) LIKE LOWER(%s) OR LOWER(first_name) LIKE LOWER(%s))
+                  {keyset}
+                ORDER BY id DESC
+                LIMIT %s
+            ''', params)
         except Exception as e:
             logger.error(f"❌ Помилка пошуку користувача: {e}")
             return []
@@ -775,15 +1243,15 @@ class Database:
     def get_user_matches(self, telegram_id):
         """Отримання матчів користувача"""
         try:
-            return self.fetch_safe('''
-                SELECT u.* FROM users u
+            return self.fetch_safe(f'''
+                SELECT u.*, {self.MAIN_PHOTO_SQL} AS main_photo FROM users u
                 WHERE u.id IN (
                     SELECT l1.from_user_id FROM likes l1
                     JOIN likes l2 ON l1.from_user_id = l2.to_user_id AND l1.to_user_id = l2.from_user_id
                     WHERE l1.to_user_id = (SELECT id FROM users WHERE telegram_id = %s)
                 )
                 OR u.id IN (
-                    SELECT l2.to_user_id FROM likes l1
+                    SELECT l1.to_user_id FROM likes l1
                     JOIN likes l2 ON l1.from_user_id = l2.to_user_id AND l1.to_user_id = l2.from_user_id
                     WHERE l1.from_user_id = (SELECT id FROM users WHERE telegram_id = %s)
                 )
@@ -795,8 +1263,13 @@ class Database:
     def get_user_likers(self, telegram_id):
         """Отримання тих, хто лайкнув користувача"""
         try:
-            return self.fetch_safe('''
-                SELECT u.* FROM users u
+            return self.fetch_safe(f'''
+                SELECT u.*, {self.MAIN_PHOTO_SQL} AS main_photo,
+                       EXISTS (
+                           SELECT 1 FROM likes back
+                           WHERE back.from_user_id = l.to_user_id AND back.to_user_id = l.from_user_id
+                       ) AS is_mutual
+                FROM users u
                 JOIN likes l ON u.id = l.from_user_id
                 WHERE l.to_user_id = (SELECT id FROM users WHERE telegram_id = %s)
             ''', (telegram_id,))
@@ -804,6 +1277,42 @@ class Database:
             logger.error(f"❌ Помилка отримання лайкерів: {e}")
             return []
 
+    def claim_update(self, update_id):
+        """Позначити оновлення як оброблене: False, якщо його вже обробив інший екземпляр"""
+        try:
+            self.cursor.execute('''
+                INSERT INTO processed_updates (update_id) VALUES (%s)
+                ON CONFLICT (update_id) DO NOTHING
+                RETURNING update_id
+            ''', (update_id,))
+            return self.cursor.fetchone() is not None
+        except Exception as e:
+            # Якщо запит не вдався, оновлення краще обробити, ніж втратити
+            logger.error(f"❌ Помилка запису оновлення {update_id}: {e}")
+            try:
+                self.conn.rollback()
+            except:
+                self.reconnect()
+            return True
+
+    def cleanup_processed_updates(self, retention_hours):
+        """Видалення старих записів про оброблені оновлення"""
+        return self.execute_safe(
+            "DELETE FROM processed_updates WHERE processed_at < NOW() - %s * INTERVAL '1 hour'",
+            (retention_hours,)
+        )
+
+    def explain_slow_queries(self):
+        """Плани відібраних повільних запитів (в обхід статистики запитів)"""
+        return query_profiler.explain_pending(self.connection.query)
+
+    def cleanup_profile_views(self, retention_days):
+        """Видалення старих переглядів анкет"""
+        return self.execute_safe(
+            "DELETE FROM profile_views WHERE viewed_at < NOW() - %s * INTERVAL '1 day'",
+            (retention_days,)
+        )
+
     def add_profile_view(self, viewer_id, viewed_id):
         """Додавання перегляду профілю"""
         try:
@@ -811,29 +1320,45 @@ class Database:
             if viewer_id == viewed_id:
                 return False
                 
-            # Перевіряємо чи існують користувачі
-            viewer = self.get_user(viewer_id)
-            viewed = self.get_user(viewed_id)
-            
-            if not viewer or not viewed:
-                return False
-            
-            # Додаємо перегляд - використовуємо правильні назви колонок
+            # Додаємо перегляд одним запитом (якщо когось із користувачів немає, рядок не вставляється)
             if self.execute_safe('''
                 INSERT INTO profile_views (viewer_user_id, viewed_user_id, viewed_at)
-                VALUES (
-                    (SELECT id FROM users WHERE telegram_id = %s), 
-                    (SELECT id FROM users WHERE telegram_id = %s),
-                    CURRENT_TIMESTAMP
-                )
-            ''', (viewer_id, viewed_id)):
-                logger.info(f"✅ Додано перегляд: {viewer_id} -> {viewed_id}")
+                SELECT viewer.id, viewed.id, CURRENT_TIMESTAMP
+                FROM users viewer, users viewed
+                WHERE viewer.telegram_id = %s AND viewed.telegram_id = %s
+            ''', (viewer_id, viewed_id)) and self.cursor.rowcount > 0:
+                view_log.info("✅ Додано перегляд: %s -> %s", viewer_id, viewed_id)
                 return True
             return False
         except Exception as e:
             logger.error(f"❌ Помилка додавання перегляду: {e}")
             return False
 
+    def add_profile_views_batch(self, views):
+        """Запис кількох переглядів одним запитом: views - список (viewer_id, viewed_id, viewed_at)
+
+        Повертає записані пари (viewer_id, viewed_id) - для сповіщень лише про збережені перегляди
+        """
+        if not views:
+            return []
+        viewers, viewed_ids, viewed_at = zip(*views)
+        rows = self.fetch_safe('''
+            WITH inserted AS (
+                INSERT INTO profile_views (viewer_user_id, viewed_user_id, viewed_at)
+                SELECT viewer.id, viewed.id, t.viewed_at
+                FROM UNNEST(%s::bigint[], %s::bigint[], %s::timestamp[]) AS t(viewer_id, viewed_id, viewed_at)
+                JOIN users viewer ON viewer.telegram_id = t.viewer_id
+                JOIN users viewed ON viewed.telegram_id = t.viewed_id
+                WHERE t.viewer_id <> t.viewed_id
+                RETURNING viewer_user_id, viewed_user_id
+            )
+            SELECT viewer.telegram_id AS viewer_id, viewed.telegram_id AS viewed_id
+            FROM inserted i
+            JOIN users viewer ON viewer.id = i.viewer_user_id
+            JOIN users viewed ON viewed.id = i.viewed_user_id
+        ''', (list(viewers), list(viewed_ids), list(viewed_at)))
+        return [(row['viewer_id'], row['viewed_id']) for row in rows]
+
     def get_profile_views(self, telegram_id):
         """Отримання переглядів профілю"""
         try:
@@ -891,7 +1416,11 @@ class Database:
             
             final_rating = min(max(base_rating, 1.0), 10.0)
             
-            self.execute_safe('UPDATE users SET rating = %s WHERE telegram_id = %s', (final_rating, telegram_id))
+            # Версія профілю змінюється лише якщо рейтинг справді змінився
+            self.execute_safe('''
+                UPDATE users SET rating = %s, profile_version = profile_version + 1 
+                WHERE telegram_id = %s AND rating IS DISTINCT FROM %s
+            ''', (final_rating, telegram_id, final_rating))
             
             return final_rating
             
@@ -900,12 +1429,25 @@ class Database:
             return 5.0
 
     def update_all_ratings(self):
-        """Оновлення всіх рейтингів"""
+        """Оновлення всіх рейтингів одним запитом (формула та сама, що в calculate_user_rating)"""
         try:
-            users = self.get_all_active_users()
-            for user in users:
-                self.calculate_user_rating(user['telegram_id'])
-            logger.info("✅ Всі рейтинги оновлено")
+            if not self.execute_safe('''
+                UPDATE users u SET rating = r.rating, profile_version = u.profile_version + 1
+                FROM (
+                    SELECT telegram_id, LEAST(GREATEST(
+                        5.0
+                        + CASE WHEN age IS NOT NULL AND age <> 0 THEN 0.5 ELSE 0 END
+                        + CASE WHEN LENGTH(COALESCE(bio, '')) > 20 THEN 0.5 ELSE 0 END
+                        + CASE WHEN has_photo THEN 1.0 ELSE 0 END
+                        + LEAST(COALESCE(likes_count, 0) * 0.1, 2.0),
+                    1.0), 10.0) AS rating
+                    FROM users
+                    WHERE age IS NOT NULL AND is_banned = FALSE
+                ) r
+                WHERE u.telegram_id = r.telegram_id AND u.rating IS DISTINCT FROM r.rating
+            '''):
+                return False
+            logger.info(f"✅ Всі рейтинги оновлено (змінено: {self.cursor.rowcount})")
             return True
         except Exception as e:
             logger.error(f"❌ Помилка оновлення рейтингів: {e}")
@@ -945,7 +1487,8 @@ class Database:
             for table in tables:
                 self.execute_safe(f'DROP TABLE IF EXISTS {table} CASCADE')
             
-            self.init_db()
+            if not self.init_db():
+                return False
             
             logger.info("✅ База даних скинута та перестворена")
             return True
@@ -967,6 +1510,47 @@ class Database:
             logger.error(f"❌ Помилка отримання користувачів за містом: {e}")
             return []
 
+    def get_users_by_cities(self, city_names, exclude_telegram_id, limit=SEARCH_LIMIT):
+        """Отримання користувачів з кількох міст (точний збіг назви без урахування регістру)"""
+        try:
+            names = sorted({name.strip().lower() for name in city_names if name})
+            if not names:
+                return []
+            return self.fetch_safe('''
+                SELECT * FROM users 
+                WHERE LOWER(TRIM(city)) = ANY(%s)
+                AND telegram_id != %s
+                AND is_banned = FALSE
+                ORDER BY rating DESC, likes_count DESC
+                LIMIT %s
+            ''', (names, exclude_telegram_id, limit))
+        except Exception as e:
+            logger.error(f"❌ Помилка отримання користувачів за списком міст: {e}")
+            return []
+
+    def search_users_by_interests(self, query, exclude_telegram_id, limit=INTEREST_SEARCH_PAGE_SIZE, offset=0):
+        """Повнотекстовий пошук анкет за полем "Про себе", від найрелевантніших"""
+        try:
+            query = (query or '').strip()
+            if not query:
+                return []
+            
+            tsquery = self.bio_tsquery_sql()
+            params = [query] * len(self.bio_search_configs)
+            return self.fetch_safe(f'''
+                SELECT u.*, ts_rank_cd(u.bio_tsv, q.query) AS search_rank
+                FROM users u, (SELECT {tsquery} AS query) AS q
+                WHERE u.bio_tsv @@ q.query
+                AND u.telegram_id != %s
+                AND u.is_banned = FALSE
+                AND u.age IS NOT NULL
+                ORDER BY search_rank DESC, u.rating DESC, u.id DESC
+                LIMIT %s OFFSET %s
+            ''', params + [exclude_telegram_id, limit, offset])
+        except Exception as e:
+            logger.error(f"❌ Помилка пошуку за інтересами: {e}")
+            return []
+
     def can_like_today(self, telegram_id):
         """Перевірка чи може користувач ставити лайки сьогодні"""
         try:
@@ -987,13 +1571,39 @@ class Database:
     def close(self):
         """Закриття з'єднання з базою даних"""
         try:
-            if self.cursor:
-                self.cursor.close()
-            if self.conn:
-                self.conn.close()
+            self.connection.close()
             logger.info("✅ З'єднання з PostgreSQL закрито")
         except Exception as e:
             logger.error(f"❌ Помилка закриття з'єднання: {e}")
 
+# Гістограма часу кожного публічного методу (див. /metrics)
+instrument_methods(Database, DB_METHOD_SECONDS)
+
+
+class LazyDatabase:
+    """Підключення до бази створюється при першому зверненні, а не під час імпорту модуля"""
+
+    def __init__(self):
+        self._instance = None
+        self._lock = threading.Lock()
+
+    def get(self):
+        if self._instance is None:
+            with self._lock:
+                if self._instance is None:
+                    self._instance = Database()
+        return self._instance
+
+    def is_connected(self):
+        return self._instance is not None
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
 # Глобальний об'єкт бази даних
-db = Database()
\ No newline at end of file
+db = LazyDatabase()
+
+if __name__ == '__main__':
+    # Міграції окремо від запуску бота: python database_postgres.py
+    logging.basicConfig(level=logging.INFO)
+    db.migrate()
\ No newline at end of file
@@ -6,12 +6,14 @@ except ImportError:
     from database.models import db
 from keyboards.main_menu import get_main_menu
 from utils.states import user_states, States
-from config import ADMIN_ID
+from config import ADMIN_ID, ADMIN_SEARCH_PAGE_SIZE
 from handlers.notifications import notification_system
+from utils.outbound import BULK
 import logging
-import time
+from utils.logs import event_logger
 
 logger = logging.getLogger(__name__)
+admin_log = event_logger('admin')
 
 async def show_admin_panel(update: Update, context: CallbackContext):
     """Показати адмін панель"""
@@ -64,7 +66,7 @@ async def handle_admin_actions(update: Update, context: CallbackContext):
     
     text = update.message.text
     
-    logger.info(f"🔧 [ADMIN] {user.first_name}: '{text}'")
+    admin_log.info("🔧 [ADMIN] %s: '%s'", user.first_name, text)
     
     if text == "👑 Адмін панель" or text == "📊 Статистика":
         await show_admin_panel(update, context)
@@ -200,37 +202,56 @@ async def handle_user_search(update: Update, context: CallbackContext):
     
     if search_query == "🔙 Скасувати":
         user_states[user.id] = States.START
-        await update.message.reply_text("❌ Пошук скасовано")
+        context.user_data.pop('admin_search', None)
+        await update.message.reply_text("❌ Пошук скасовано", reply_markup=get_main_menu(user.id))
         return
     
-    results = db.search_user(search_query)
+    # Наступна сторінка попереднього запиту
+    search_state = context.user_data.get('admin_search')
+    if search_query == "➡️ Ще результати" and search_state:
+        search_query = search_state['query']
+        after_id = search_state['after_id']
+        shown = search_state['shown']
+    else:
+        after_id = None
+        shown = 0
+    
+    # Запитуємо на один запис більше, щоб знати, чи є наступна сторінка
+    results = db.search_user(search_query, limit=ADMIN_SEARCH_PAGE_SIZE + 1, after_id=after_id)
+    has_more = len(results) > ADMIN_SEARCH_PAGE_SIZE
+    results = results[:ADMIN_SEARCH_PAGE_SIZE]
     
     if results:
         search_text = f"🔍 *Результати пошуку для '{search_query}':*\n\n"
-        for i, user_data in enumerate(results[:5], 1):
+        for i, user_data in enumerate(results, shown + 1):
             try:
-                if isinstance(user_data, dict):
-                    user_id = user_data.get('telegram_id', 'Невідомо')
-                    user_name = user_data.get('first_name', 'Невідомо')
-                    is_banned = user_data.get('is_banned', False)
-                else:
-                    user_id = user_data[1] if len(user_data) > 1 else 'Невідомо'
-                    user_name = user_data[3] if len(user_data) > 3 else 'Невідомо'
-                    is_banned = user_data[13] if len(user_data) > 13 else False
-                
-                status = "🚫" if is_banned else "✅"
-                search_text += f"{i}. {status} {user_name} (ID: `{user_id}`)\n"
+                user_id = user_data.get('telegram_id', 'Невідомо')
+                user_name = user_data.get('first_name') or 'Невідомо'
+                username = f" @{user_data['username']}" if user_data.get('username') else ""
+                status = "🚫" if user_data.get('is_banned') else "✅"
+                search_text += f"{i}. {status} {user_name}{username} (ID: `{user_id}`)\n"
             except Exception as e:
                 logger.error(f"❌ Помилка обробки результату #{i}: {e}")
                 continue
         
-        if len(results) > 5:
-            search_text += f"\n... та ще {len(results) - 5} користувачів"
+        if has_more:
+            context.user_data['admin_search'] = {
+                'query': search_query,
+                'after_id': results[-1]['id'],
+                'shown': shown + len(results),
+            }
+            await update.message.reply_text(
+                search_text,
+                reply_markup=ReplyKeyboardMarkup([['➡️ Ще результати'], ['🔙 Скасувати']], resize_keyboard=True),
+                parse_mode='Markdown'
+            )
+            return
         
-        await update.message.reply_text(search_text, parse_mode='Markdown')
+        await update.message.reply_text(search_text, reply_markup=get_main_menu(user.id), parse_mode='Markdown')
     else:
-        await update.message.reply_text("❌ Користувачів не знайдено")
+        await update.message.reply_text("❌ Користувачів не знайдено", reply_markup=get_main_menu(user.id))
     
+    context.user_data.pop('admin_search', None)
     user_states[user.id] = States.START
 
 async def start_broadcast(update: Update, context: CallbackContext):
@@ -288,16 +309,15 @@ async def handle_broadcast_message(update: Update, context: CallbackContext):
             
             # Відправляємо повідомлення з сповіщенням
             try:
+                # Темп розсилки регулює диспетчер вихідних повідомлень (пріоритет нижчий за відповіді)
                 await context.bot.send_message(
                     chat_id=user_id,
                     text=f"📢 *Повідомлення від адміністратора*\n\n{message_text}\n\n---\n💞 *Chatrix Bot* - знайомства та спілкування",
-                    parse_mode='Markdown'
+                    parse_mode='Markdown',
+                    rate_limit_args=BULK
                 )
                 success_count += 1
                 
-                # Додаємо невелику затримку щоб не перевищити ліміти
-                time.sleep(0.1)
-                
             except Exception as e:
                 logger.error(f"❌ Помилка відправки для {user_id}: {e}")
                 fail_count += 1
@@ -335,11 +355,10 @@ async def update_database(update: Update, context: CallbackContext):
     
     await update.message.reply_text("🔄 Оновлення бази даних...")
     
-    # Очищення старих даних
-    db.cleanup_old_data()
-    
-    # Оновлення рейтингів
-    db.update_all_ratings()
+    # Ті самі завдання, що виконуються за розкладом (якщо вони вже йдуть - чекаємо на них)
+    from utils.jobs import job_scheduler
+    await job_scheduler.run_now('retention')
+    await job_scheduler.run_now('ratings')
     
     await update.message.reply_text("✅ База даних оновлена успішно!")
 
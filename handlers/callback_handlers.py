@@ -9,8 +9,11 @@ from handlers.notifications import notification_system
 from handlers.search import show_user_profile
 from keyboards.main_menu import get_main_menu
 import logging
+from utils.logs import event_logger
 
 logger = logging.getLogger(__name__)
+like_log = event_logger('like')
+search_log = event_logger('search')
 
 async def handle_like_callback(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробка лайку з callback"""
@@ -21,26 +24,26 @@ async def handle_like_callback(update: Update, context: ContextTypes.DEFAULT_TYP
         user = query.from_user
         callback_data = query.data
         
-        logger.info(f"🔍 [LIKE CALLBACK] Отримано callback: {callback_data} від {user.id}")
+        like_log.info("🔍 [LIKE CALLBACK] Отримано callback: %s від %s", callback_data, user.id)
         
         # Отримуємо ID користувача з callback_data
         target_user_id = int(callback_data.split('_')[1])
         
-        logger.info(f"🔍 [LIKE] Користувач {user.id} лайкає {target_user_id}")
+        like_log.info("🔍 [LIKE] Користувач %s лайкає %s", user.id, target_user_id)
         
         # Додаємо лайк з перевіркою обмежень
         success, message = db.add_like(user.id, target_user_id)
         
-        logger.info(f"🔍 [LIKE RESULT] Успіх: {success}, Повідомлення: {message}")
+        like_log.info("🔍 [LIKE RESULT] Успіх: %s, Повідомлення: %s", success, message)
         
         if success:
             # Перевіряємо чи це взаємний лайк (матч)
             is_mutual = db.has_liked(target_user_id, user.id)
-            logger.info(f"🔍 [LIKE MUTUAL] Взаємний: {is_mutual}")
+            like_log.info("🔍 [LIKE MUTUAL] Взаємний: %s", is_mutual)
             
             if is_mutual:
-                # Відправляємо сповіщення про матч
-                await notification_system.notify_new_match(context, user.id, target_user_id)
+                # Сповіщення про матч відправляється у фоні
+                notification_system.enqueue_match(user.id, target_user_id)
                 
                 # Отримуємо дані користувача для кнопки переходу в Telegram
                 matched_user = db.get_user(target_user_id)
@@ -66,8 +69,8 @@ async def handle_like_callback(update: Update, context: ContextTypes.DEFAULT_TYP
                 else:
                     await query.edit_message_text("💕 У вас матч! Ви вподобали один одного!")
             else:
-                # Відправляємо сповіщення про лайк
-                await notification_system.notify_new_like(context, user.id, target_user_id)
+                # Лайк потрапить у дайджест отримувача
+                notification_system.enqueue_like(user.id, target_user_id)
                 await query.edit_message_text(f"❤️ {message}")
         else:
             await query.edit_message_text(f"❌ {message}")
@@ -87,13 +90,13 @@ async def handle_next_profile_callback(update: Update, context: ContextTypes.DEF
         
         user = query.from_user
         
-        logger.info(f"🔍 [NEXT CALLBACK] Обробка кнопки 'Далі' для {user.id}")
+        search_log.info("🔍 [NEXT CALLBACK] Обробка кнопки 'Далі' для %s", user.id)
         
         search_users = context.user_data.get('search_users', [])
         current_index = context.user_data.get('current_index', 0)
         search_type = context.user_data.get('search_type', 'random')
         
-        logger.info(f"🔍 [NEXT CALLBACK] Тип пошуку: {search_type}, індекс: {current_index}, знайдено: {len(search_users)}")
+        search_log.info("🔍 [NEXT CALLBACK] Тип пошуку: %s, індекс: %s, знайдено: %s", search_type, current_index, len(search_users))
         
         if not search_users:
             await query.edit_message_text("🔄 Шукаємо нові анкети...")
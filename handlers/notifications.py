@@ -6,105 +6,231 @@ except ImportError:
     from database.models import db
 from keyboards.main_menu import get_main_menu
 import asyncio
+import itertools
 import logging
-from config import ADMIN_ID
+import time
+from datetime import datetime, timezone
+from config import (
+    ADMIN_ID, NOTIFY_DIGEST_WINDOW, NOTIFY_QUIET_HOURS, NOTIFY_TIMEZONE,
+    NOTIFY_VIEWS_MIN, NOTIFY_VIEWS_MAX_AGE, NOTIFY_DEDUP_SECONDS, NOTIFY_WORKERS, NOTIFY_QUEUE_SIZE
+)
+from utils.outbound import BULK
 
 logger = logging.getLogger(__name__)
 
+# Пріоритети в черзі відправки: матчі йдуть перед дайджестами
+MATCH_PRIORITY = 0
+DIGEST_PRIORITY = 1
+
+# Скільки імен показувати в дайджесті лайків
+DIGEST_NAMES_LIMIT = 5
+
+try:
+    from zoneinfo import ZoneInfo
+    NOTIFY_TZ = ZoneInfo(NOTIFY_TIMEZONE)
+except Exception:
+    NOTIFY_TZ = timezone.utc
+
 class NotificationSystem:
     def __init__(self):
+        # Дайджести в процесі збору: {telegram_id отримувача: {'first_at', 'views_at', 'likes', 'views'}}
         self.pending_notifications = {}
+        self.recent_matches = {}
+        self.bot = None
+        self.queue = None
+        self.tasks = []
+        self.sequence = itertools.count()
+        self.stats = {
+            'likes': 0, 'views': 0, 'matches': 0, 'duplicates': 0, 'digests': 0,
+            'sent': 0, 'failed': 0, 'dropped': 0, 'expired_views': 0,
+        }
+    
+    def start(self, bot):
+        """Запуск обробників черги сповіщень (викликається в циклі подій бота)"""
+        self.bot = bot
+        self.queue = asyncio.PriorityQueue(maxsize=NOTIFY_QUEUE_SIZE)
+        self.tasks = [asyncio.create_task(self._worker()) for _ in range(NOTIFY_WORKERS)]
+        logger.info(f"✅ Черга сповіщень запущена: {NOTIFY_WORKERS} обробників, дайджест кожні {NOTIFY_DIGEST_WINDOW} с")
+    
+    def _pending(self, to_user_id):
+        pending = self.pending_notifications.get(to_user_id)
+        if pending is None:
+            now = time.monotonic()
+            pending = {'first_at': now, 'views_at': now, 'likes': [], 'views': set()}
+            self.pending_notifications[to_user_id] = pending
+        return pending
+    
+    def enqueue_like(self, from_user_id, to_user_id):
+        """Лайк додається до дайджесту отримувача (не блокує обробник)"""
+        likes = self._pending(to_user_id)['likes']
+        if from_user_id in likes:
+            self.stats['duplicates'] += 1
+            return
+        likes.append(from_user_id)
+        self.stats['likes'] += 1
     
-    async def notify_new_like(self, context: ContextTypes.DEFAULT_TYPE, from_user_id, to_user_id):
-        """Покращене сповіщення про лайк"""
+    def enqueue_view(self, viewer_id, viewed_id):
+        """Перегляд анкети враховується в дайджесті (рахуються унікальні глядачі)"""
+        self._pending(viewed_id)['views'].add(viewer_id)
+        self.stats['views'] += 1
+    
+    def enqueue_match(self, user1_id, user2_id):
+        """Матч відправляється одразу, поза чергою дайджестів"""
+        now = time.monotonic()
+        pair = frozenset((user1_id, user2_id))
+        if now - self.recent_matches.get(pair, -NOTIFY_DEDUP_SECONDS) < NOTIFY_DEDUP_SECONDS:
+            self.stats['duplicates'] += 1
+            return
+        self.recent_matches[pair] = now
+        self.stats['matches'] += 1
+        
+        # Лайк, що став матчем, у дайджесті вже не потрібен
+        for to_user_id, from_user_id in ((user1_id, user2_id), (user2_id, user1_id)):
+            pending = self.pending_notifications.get(to_user_id)
+            if pending and from_user_id in pending['likes']:
+                pending['likes'].remove(from_user_id)
+        
+        self._put(MATCH_PRIORITY, ('match', user1_id, user2_id))
+    
+    def _put(self, priority, job):
+        if self.queue is None:
+            logger.warning(f"⚠️ Черга сповіщень не запущена, сповіщення {job[0]} пропущено")
+            self.stats['dropped'] += 1
+            return
         try:
-            from_user = db.get_user(from_user_id)
-            to_user = db.get_user(to_user_id)
-            
-            if not from_user or not to_user:
-                logger.error(f"❌ Користувачів не знайдено для сповіщення про лайк")
-                return
-            
-            # Отримуємо актуальний рейтинг
-            current_rating = db.calculate_user_rating(to_user_id)
-            
+            self.queue.put_nowait((priority, next(self.sequence), job))
+        except asyncio.QueueFull:
+            logger.warning(f"⚠️ Черга сповіщень переповнена, сповіщення {job[0]} пропущено")
+            self.stats['dropped'] += 1
+    
+    def is_quiet_hours(self):
+        start, end = NOTIFY_QUIET_HOURS
+        hour = datetime.now(NOTIFY_TZ).hour
+        return start <= hour or hour < end if start > end else start <= hour < end
+    
+    def flush_digests(self, force=False):
+        """Передача готових дайджестів у чергу відправки"""
+        if not force and self.is_quiet_hours():
+            return 0
+        
+        now = time.monotonic()
+        flushed = 0
+        for to_user_id, pending in list(self.pending_notifications.items()):
+            if not force and now - pending['first_at'] < NOTIFY_DIGEST_WINDOW:
+                continue
+            # Самих переглядів замало для окремого повідомлення - збираємо далі, але не довше NOTIFY_VIEWS_MAX_AGE
+            if not pending['likes'] and len(pending['views']) < NOTIFY_VIEWS_MIN:
+                if now - pending['views_at'] >= NOTIFY_VIEWS_MAX_AGE:
+                    del self.pending_notifications[to_user_id]
+                    self.stats['expired_views'] += len(pending['views'])
+                else:
+                    # Вікно для наступного лайка відраховується заново
+                    pending['first_at'] = now
+                continue
+            del self.pending_notifications[to_user_id]
+            self._put(DIGEST_PRIORITY, ('digest', to_user_id, pending['likes'], len(pending['views'])))
+            flushed += 1
+        
+        # Старі записи для дедуплікації матчів більше не потрібні
+        self.recent_matches = {
+            pair: sent_at for pair, sent_at in self.recent_matches.items()
+            if now - sent_at < NOTIFY_DEDUP_SECONDS
+        }
+        return flushed
+    
+    async def _worker(self):
+        while True:
+            _, _, job = await self.queue.get()
+            try:
+                if job[0] == 'match':
+                    await self.send_match(job[1], job[2])
+                else:
+                    await self.send_digest(job[1], job[2], job[3])
+                self.stats['sent'] += 1
+            except Exception as e:
+                self.stats['failed'] += 1
+                logger.error(f"❌ Помилка відправки сповіщення {job[0]}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    def get_stats(self):
+        return {
+            **self.stats,
+            'queue_depth': self.queue.qsize() if self.queue else 0,
+            'pending_digests': len(self.pending_notifications),
+        }
+    
+    async def send_digest(self, to_user_id, likes, views):
+        """Дайджест лайків та переглядів за вікно"""
+        # Запит до БД у потоці, щоб відправка не блокувала цикл подій бота
+        users = await asyncio.to_thread(db.get_users_brief, [to_user_id] + likes)
+        to_user = users.get(to_user_id)
+        if not to_user or to_user.get('is_banned'):
+            return
+        
+        names = [users[from_user_id]['first_name'] for from_user_id in likes if from_user_id in users]
+        rating = to_user.get('rating') or 5.0
+        
+        if len(names) == 1:
             message = (
                 f"💕 *У вас новий лайк!*\n\n"
-                f"👤 *{from_user['first_name']}* вподобав(ла) вашу анкету!\n"
-                f"⭐ *Ваш рейтинг:* {current_rating:.1f}/10.0\n\n"
-                f"🎯 *Порада:* Активність підвищує ваш рейтинг!"
+                f"👤 *{names[0]}* вподобав(ла) вашу анкету!\n"
             )
-            
-            await context.bot.send_message(
-                chat_id=to_user_id,
-                text=message,
-                parse_mode='Markdown'
+        elif names:
+            shown = ", ".join(names[:DIGEST_NAMES_LIMIT])
+            if len(names) > DIGEST_NAMES_LIMIT:
+                shown += f" та ще {len(names) - DIGEST_NAMES_LIMIT}"
+            message = (
+                f"💕 *У вас {len(names)} нових лайків!*\n\n"
+                f"👤 Вашу анкету вподобали: *{shown}*\n"
             )
-            logger.info(f"✅ Сповіщення про лайк відправлено {to_user_id}")
-        except Exception as e:
-            logger.error(f"❌ Помилка сповіщення про лайк: {e}")
+        else:
+            message = "📊 *Вашою анкетою цікавляться!*\n\n"
+        
+        if views:
+            message += f"👀 *Переглядів анкети:* {views}\n"
+        message += (
+            f"⭐ *Ваш рейтинг:* {rating:.1f}/10.0\n\n"
+            f"🎯 *Порада:* Активність підвищує ваш рейтинг!"
+        )
+        
+        await self.bot.send_message(
+            chat_id=to_user_id,
+            text=message,
+            parse_mode='Markdown'
+        )
+        self.stats['digests'] += 1
+        logger.info(f"✅ Дайджест відправлено {to_user_id}: лайків {len(names)}, переглядів {views}")
     
-    async def notify_new_match(self, context: ContextTypes.DEFAULT_TYPE, user1_id, user2_id):
-        """Сповістити про новий матч"""
-        try:
-            user1 = db.get_user(user1_id)
-            user2 = db.get_user(user2_id)
-            
-            if not user1 or not user2:
-                logger.error(f"❌ Користувачів не знайдено для сповіщення про матч")
-                return
+    async def send_match(self, user1_id, user2_id):
+        """Сповістити обох користувачів про новий матч"""
+        users = await asyncio.to_thread(db.get_users_brief, [user1_id, user2_id])
+        if user1_id not in users or user2_id not in users:
+            logger.error(f"❌ Користувачів не знайдено для сповіщення про матч")
+            return
+        
+        for chat_id, partner_id in ((user1_id, user2_id), (user2_id, user1_id)):
+            partner = users[partner_id]
+            message = f"💕 *У вас новий матч!*\n\nВи та {partner['first_name']} вподобали один одного!\n\n"
             
-            # Отримуємо username для кнопок
-            user1_username = user1.get('username')
-            user2_username = user2.get('username')
-            
-            # Сповіщаємо першому користувачу
-            match_message_user1 = f"💕 *У вас новий матч!*\n\nВи та {user2['first_name']} вподобали один одного!\n\n"
-            
-            if user2_username:
-                keyboard1 = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("💬 Написати в Telegram", url=f"https://t.me/{user2_username}")]
+            # Кнопка для переходу в Telegram, якщо є username
+            if partner.get('username'):
+                keyboard = InlineKeyboardMarkup([
+                    [InlineKeyboardButton("💬 Написати в Telegram", url=f"https://t.me/{partner['username']}")]
                 ])
-                match_message_user1 += "💬 *Тепер ви можете почати спілкування!*"
-                await context.bot.send_message(
-                    chat_id=user1_id,
-                    text=match_message_user1,
-                    reply_markup=keyboard1,
-                    parse_mode='Markdown'
-                )
+                message += "💬 *Тепер ви можете почати спілкування!*"
             else:
-                match_message_user1 += "ℹ️ *У цього користувача немає username*"
-                await context.bot.send_message(
-                    chat_id=user1_id,
-                    text=match_message_user1,
-                    parse_mode='Markdown'
-                )
-            
-            # Сповіщаємо другому користувачу
-            match_message_user2 = f"💕 *У вас новий матч!*\n\nВи та {user1['first_name']} вподобали один одного!\n\n"
+                keyboard = None
+                message += "ℹ️ *У цього користувача немає username*"
             
-            if user1_username:
-                keyboard2 = InlineKeyboardMarkup([
-                    [InlineKeyboardButton("💬 Написати в Telegram", url=f"https://t.me/{user1_username}")]
-                ])
-                match_message_user2 += "💬 *Тепер ви можете почати спілкування!*"
-                await context.bot.send_message(
-                    chat_id=user2_id,
-                    text=match_message_user2,
-                    reply_markup=keyboard2,
-                    parse_mode='Markdown'
-                )
-            else:
-                match_message_user2 += "ℹ️ *У цього користувача немає username*"
-                await context.bot.send_message(
-                    chat_id=user2_id,
-                    text=match_message_user2,
-                    parse_mode='Markdown'
-                )
-                    
-            logger.info(f"✅ Сповіщення про матч відправлено {user1_id} та {user2_id}")
-        except Exception as e:
-            logger.error(f"❌ Помилка сповіщення про матч: {e}")
+            await self.bot.send_message(
+                chat_id=chat_id,
+                text=message,
+                reply_markup=keyboard,
+                parse_mode='Markdown'
+            )
+        
+        logger.info(f"✅ Сповіщення про матч відправлено {user1_id} та {user2_id}")
     
     async def notify_contact_admin(self, context: ContextTypes.DEFAULT_TYPE, user_id, message_text):
         """Сповістити адміна про нове повідомлення"""
@@ -172,7 +298,8 @@ class NotificationSystem:
             await context.bot.send_message(
                 chat_id=user_id,
                 text=broadcast_message,
-                parse_mode='Markdown'
+                parse_mode='Markdown',
+                rate_limit_args=BULK
             )
             return True
         except Exception as e:
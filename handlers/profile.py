@@ -7,8 +7,12 @@ except ImportError:
     from database.models import db
 from utils.states import user_states, States, user_profiles
 from keyboards.main_menu import get_main_menu
+from utils.render_cache import render_cache, GENDER_DISPLAY, SEEKING_DISPLAY, GOAL_DISPLAY
+from config import PROFILE_MAX_PHOTOS
+from utils.logs import event_logger
 
 logger = logging.getLogger(__name__)
+profile_log = event_logger('profile')
 
 async def start_profile_creation(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Початок створення профілю"""
@@ -24,7 +28,7 @@ async def start_profile_creation(update: Update, context: ContextTypes.DEFAULT_T
     user_states[user.id] = States.PROFILE_AGE
     user_profiles[user.id] = {}
     
-    logger.info(f"🔧 [PROFILE START] Користувач {user.id} почав створення профілю")
+    profile_log.info("🔧 [PROFILE START] Користувач %s почав створення профілю", user.id)
     
     await update.message.reply_text(
         "📝 *Створення профілю*\n\nВведіть ваш вік (18-100):",
@@ -38,7 +42,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
     text = update.message.text
     state = user_states.get(user.id)
 
-    logger.info(f"🔧 [PROFILE] {user.first_name}: '{text}', стан: {state}")
+    profile_log.info("🔧 [PROFILE] %s: '%s', стан: %s", user.first_name, text, state)
 
     if text == "🔙 Скасувати":
         user_states[user.id] = States.START
@@ -49,14 +53,14 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
     # Перевіряємо чи існує профіль для користувача
     if user.id not in user_profiles:
         user_profiles[user.id] = {}
-        logger.info(f"🔧 [PROFILE] Створено новий тимчасовий профіль для {user.id}")
+        profile_log.info("🔧 [PROFILE] Створено новий тимчасовий профіль для %s", user.id)
 
     # Визначаємо чи це створення нового профілю чи редагування існуючого
     is_editing = False
     existing_user_data = db.get_user(user.id)
     if existing_user_data and existing_user_data.get('age'):
         is_editing = True
-        logger.info(f"🔧 [PROFILE] Режим: РЕДАГУВАННЯ для {user.id}")
+        profile_log.info("🔧 [PROFILE] Режим: РЕДАГУВАННЯ для %s", user.id)
 
     if state == States.PROFILE_AGE:
         try:
@@ -68,7 +72,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
             user_profiles[user.id]['age'] = age
             user_states[user.id] = States.PROFILE_GENDER
             
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} встановив вік: {age}")
+            profile_log.info("🔧 [PROFILE] Користувач %s встановив вік: %s", user.id, age)
             
             keyboard = [[KeyboardButton("👨"), KeyboardButton("👩")], [KeyboardButton("🔙 Скасувати")]]
             await update.message.reply_text(
@@ -82,7 +86,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
         if text == "👨":
             user_profiles[user.id]['gender'] = 'male'
             user_states[user.id] = States.PROFILE_CITY
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} обрав стать: male")
+            profile_log.info("🔧 [PROFILE] Користувач %s обрав стать: male", user.id)
             await update.message.reply_text(
                 "✅ Стать: 👨 Чоловік\n\nВведіть ваше місто:",
                 reply_markup=ReplyKeyboardMarkup([[KeyboardButton("🔙 Скасувати")]], resize_keyboard=True)
@@ -90,7 +94,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
         elif text == "👩":
             user_profiles[user.id]['gender'] = 'female'
             user_states[user.id] = States.PROFILE_CITY
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} обрав стать: female")
+            profile_log.info("🔧 [PROFILE] Користувач %s обрав стать: female", user.id)
             await update.message.reply_text(
                 "✅ Стать: 👩 Жінка\n\nВведіть ваше місто:",
                 reply_markup=ReplyKeyboardMarkup([[KeyboardButton("🔙 Скасувати")]], resize_keyboard=True)
@@ -103,7 +107,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
             user_profiles[user.id]['city'] = text
             user_states[user.id] = States.PROFILE_SEEKING_GENDER
             
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} встановив місто: {text}")
+            profile_log.info("🔧 [PROFILE] Користувач %s встановив місто: %s", user.id, text)
             
             keyboard = [
                 [KeyboardButton("👩 Дівчину"), KeyboardButton("👨 Хлопця")],
@@ -121,15 +125,15 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
         if text == "👩 Дівчину":
             user_profiles[user.id]['seeking_gender'] = 'female'
             user_states[user.id] = States.PROFILE_GOAL
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} шукає: female")
+            profile_log.info("🔧 [PROFILE] Користувач %s шукає: female", user.id)
         elif text == "👨 Хлопця":
             user_profiles[user.id]['seeking_gender'] = 'male'
             user_states[user.id] = States.PROFILE_GOAL
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} шукає: male")
+            profile_log.info("🔧 [PROFILE] Користувач %s шукає: male", user.id)
         elif text == "👫 Всіх":
             user_profiles[user.id]['seeking_gender'] = 'all'
             user_states[user.id] = States.PROFILE_GOAL
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} шукає: all")
+            profile_log.info("🔧 [PROFILE] Користувач %s шукає: all", user.id)
         else:
             await update.message.reply_text("❌ Оберіть варіант з кнопок")
             return
@@ -163,7 +167,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
             user_profiles[user.id]['goal'] = goal_map[text]
             user_states[user.id] = States.PROFILE_BIO
             
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} обрав ціль: {goal_map[text]}")
+            profile_log.info("🔧 [PROFILE] Користувач %s обрав ціль: %s", user.id, goal_map[text])
             
             await update.message.reply_text(
                 f"✅ Ціль: {text}\n\nНапишіть про себе (мінімум 10 символів):",
@@ -176,7 +180,7 @@ async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_T
         if len(text) >= 10:
             user_profiles[user.id]['bio'] = text
             
-            logger.info(f"🔧 [PROFILE] Користувач {user.id} заповнив біо")
+            profile_log.info("🔧 [PROFILE] Користувач %s заповнив біо", user.id)
             
             # Зберігаємо профіль
             success = db.update_or_create_user_profile(
@@ -247,16 +251,16 @@ async def handle_main_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if user_states.get(user.id) == States.ADD_MAIN_PHOTO and update.message.photo:
         photo = update.message.photo[-1]
         
-        logger.info(f"🔧 [PHOTO] Користувач {user.id} додає фото")
+        profile_log.info("🔧 [PHOTO] Користувач %s додає фото", user.id)
         
         # Додаємо фото
-        success = db.add_user_photo(user.id, photo.file_id, is_main=True)
+        success = db.add_user_photo(user.id, photo.file_id)
         
         if success:
             photos = db.get_profile_photos(user.id)
-            if len(photos) < 3:
+            if len(photos) < PROFILE_MAX_PHOTOS:
                 await update.message.reply_text(
-                    f"✅ Фото додано! У вас {len(photos)}/3 фото\n\n"
+                    f"✅ Фото додано! У вас {len(photos)}/{PROFILE_MAX_PHOTOS} фото\n\n"
                     f"Можете додати ще фото або натиснути '🔙 Завершити'",
                     reply_markup=ReplyKeyboardMarkup([['🔙 Завершити']], resize_keyboard=True)
                 )
@@ -281,6 +285,27 @@ async def handle_main_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
             reply_markup=ReplyKeyboardMarkup([['🔙 Завершити']], resize_keyboard=True)
         )
 
+def render_my_profile(user_data, first_name, photos_count):
+    """Текст власного профілю користувача"""
+    gender_display = GENDER_DISPLAY.get(user_data['gender'], GENDER_DISPLAY['female'])
+    seeking_display = SEEKING_DISPLAY.get(user_data.get('seeking_gender', 'all'), SEEKING_DISPLAY['all'])
+    goal_display = GOAL_DISPLAY.get(user_data.get('goal', 'Не вказано'), user_data.get('goal', 'Не вказано'))
+    
+    return f"""👤 *Ваш профіль*
+
+*Ім'я:* {first_name}
+*Вік:* {user_data.get('age', 'Не вказано')} років
+*Стать:* {gender_display}
+*Місто:* {user_data.get('city', 'Не вказано')}
+*Шукаю:* {seeking_display}  
+*Ціль:* {goal_display}
+
+*Про себе:*
+{user_data.get('bio', 'Не вказано')}
+
+*Фото:* {photos_count}/{PROFILE_MAX_PHOTOS}
+❤️ *Лайків:* {user_data.get('likes_count', 0)}"""
+
 async def show_my_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Показати профіль користувача"""
     user = update.effective_user
@@ -301,38 +326,12 @@ async def show_my_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
             )
             return
         
-        photos = db.get_profile_photos(user.id)
-        
-        # Форматування профілю
-        gender_display = "👨 Чоловік" if user_data['gender'] == 'male' else "👩 Жінка"
-        
-        seeking_display = {
-            'female': '👩 Дівчину',
-            'male': '👨 Хлопця',
-            'all': '👫 Всіх'
-        }.get(user_data.get('seeking_gender', 'all'), '👫 Всіх')
-        
-        goal_display = {
-            'Серйозні стосунки': '💞 Серйозні стосунки',
-            'Дружба': '👥 Дружба',
-            'Разові зустрічі': '🎉 Разові зустрічі',
-            'Активний відпочинок': '🏃 Активний відпочинок'
-        }.get(user_data.get('goal', 'Не вказано'), user_data.get('goal', 'Не вказано'))
-        
-        profile_text = f"""👤 *Ваш профіль*
-
-*Ім'я:* {user.first_name}
-*Вік:* {user_data.get('age', 'Не вказано')} років
-*Стать:* {gender_display}
-*Місто:* {user_data.get('city', 'Не вказано')}
-*Шукаю:* {seeking_display}  
-*Ціль:* {goal_display}
-
-*Про себе:*
-{user_data.get('bio', 'Не вказано')}
-
-*Фото:* {len(photos)}/3
-❤️ *Лайків:* {user_data.get('likes_count', 0)}"""
+        # Фото та текст кешуються до наступної зміни профілю (profile_version)
+        photos = render_cache.get_or_render(user_data, 'photos', lambda: db.get_profile_photos(user.id))
+        profile_text = render_cache.get_or_render(
+            user_data, ('my_profile', user.first_name),
+            lambda: render_my_profile(user_data, user.first_name, len(photos))
+        )
         
         # Відправляємо фото з описом
         if photos:
@@ -379,8 +378,8 @@ async def start_edit_profile(update: Update, context: ContextTypes.DEFAULT_TYPE)
         'bio': user_data.get('bio')
     }
     
-    logger.info(f"🔧 [EDIT PROFILE] Початок редагування для {user.id}")
-    logger.info(f"🔧 [EDIT PROFILE] Поточні дані: {user_profiles[user.id]}")
+    profile_log.info("🔧 [EDIT PROFILE] Початок редагування для %s", user.id)
+    profile_log.info("🔧 [EDIT PROFILE] Поточні дані: %s", user_profiles[user.id])
     
     await update.message.reply_text(
         "✏️ *Редагування профілю*\n\nВведіть ваш вік (18-100):",
@@ -8,8 +8,11 @@ from utils.states import user_states, States
 from keyboards.main_menu import get_main_menu, get_back_to_menu_keyboard
 from utils.states import user_states, States
 from keyboards.main_menu import get_main_menu, get_back_to_menu_keyboard
+from utils.logs import event_logger
+from config import PROFILE_MAX_PHOTOS
 
 logger = logging.getLogger(__name__)
+profile_log = event_logger('profile')
 
 async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробник отримання фото"""
@@ -23,7 +26,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
             photo_file = await update.message.photo[-1].get_file()
             file_id = photo_file.file_id
             
-            logger.info(f"📸 Отримано фото від {user_id}, file_id: {file_id}")
+            profile_log.info("📸 Отримано фото від %s, file_id: %s", user_id, file_id)
             
             # Додаємо фото до профілю
             success = db.add_profile_photo(user_id, file_id)
@@ -38,7 +41,7 @@ async def handle_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 
                 success_text = (
                     f"✅ <b>Фото успішно додано!</b>\n\n"
-                    f"📸 <b>Тепер у вашому профілі:</b> {len(photos)}/3 фото\n"
+                    f"📸 <b>Тепер у вашому профілі:</b> {len(photos)}/{PROFILE_MAX_PHOTOS} фото\n"
                     f"❤️ <b>Ваш рейтинг:</b> {user_info['rating'] if user_info else 0}\n\n"
                 )
                 
@@ -99,7 +102,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         text = update.message.text
         state = user_states.get(user_id, States.START)
         
-        logger.info(f"📝 Текст від {user_id} у стані {state}: {text}")
+        profile_log.info("📝 Текст від %s у стані %s: %s", user_id, state, text)
         
         if state == States.EDITING_PROFILE:
             # Обробка редагування профілю
@@ -6,21 +6,129 @@ except ImportError:
     from database.models import db
 from keyboards.main_menu import get_main_menu
 from utils.states import user_states, States
-from config import ADMIN_ID
+from config import (
+    ADMIN_ID, CITY_SEARCH_RADII_KM, CITY_SEARCH_MIN_RESULTS, FEED_BATCH_SIZE,
+    INTEREST_SEARCH_PAGE_SIZE, INTEREST_SEARCH_MAX_QUERY_LENGTH
+)
 from handlers.notifications import notification_system
+from utils.admission import profile_view_log
+from utils.gazetteer import gazetteer
+from utils.ranking import feed_ranker
+from utils.prefetch import profile_prefetcher
+from utils.outbound import fits_caption
+from utils.render_cache import render_cache, GENDER_DISPLAY
+from keyboards.search_keyboards import PROFILE_CARD_KEYBOARD, TOP_CARD_KEYBOARD, LIKE_BACK_KEYBOARD
 import logging
+from utils.logs import event_logger
 
 logger = logging.getLogger(__name__)
+like_log = event_logger('like')
+search_log = event_logger('search')
 
-def format_profile_text(user_data, title=""):
-    """Форматування тексту профілю з рейтингом"""
-    try:
-        if isinstance(user_data, dict):
-            gender_display = "👨 Чоловік" if user_data.get('gender') == 'male' else "👩 Жінка"
-            rating = user_data.get('rating', 5.0)
-            profile_text = f"""👤 {title}
+def next_feed_candidate(telegram_id, context: CallbackContext):
+    """Наступна анкета стрічки: найкраща за оцінкою серед ще не переглянутих"""
+    queue = context.user_data.get('feed_queue')
+    if not queue:
+        candidates = db.get_discovery_candidates(telegram_id)
+        queue = feed_ranker.rank(candidates, top_n=FEED_BATCH_SIZE)
+        context.user_data['feed_queue'] = queue
+    
+    if queue:
+        return queue.pop(0)
+    
+    # Всі анкети вже переглянуті - повертаємось до випадкового показу
+    return db.get_random_user(telegram_id)
+
+def start_search_session(user_id, context: CallbackContext):
+    """Початок нової сесії пошуку: скидаємо чергу стрічки та підготовлені картки"""
+    context.user_data['search_session'] = context.user_data.get('search_session', 0) + 1
+    context.user_data.pop('feed_queue', None)
+    profile_prefetcher.invalidate(user_id)
+
+def list_search_title(context: CallbackContext):
+    """Заголовок карток для пошуку за списком (місто або інтереси)"""
+    if context.user_data.get('search_type') == 'interests':
+        return f"🔎 Інтереси: {context.user_data.get('interests_query', '')}"
+    return "🏙️ Знайдені анкети"
+
+def peek_next_candidate(context: CallbackContext):
+    """Анкета, яку буде показано після натискання '➡️ Далі', та її заголовок"""
+    search_type = context.user_data.get('search_type', 'random')
+    if search_type in ('city', 'interests'):
+        search_users = context.user_data.get('search_users', [])
+        next_index = context.user_data.get('current_index', 0) + 1
+        if next_index < len(search_users):
+            return search_users[next_index], list_search_title(context)
+        return None, None
+    
+    queue = context.user_data.get('feed_queue')
+    if queue:
+        return queue[0], "💕 Знайдені анкети"
+    return None, None
+
+def prepare_profile_card(user_data, title=""):
+    """Підготовка картки анкети: головне фото та текст підпису"""
+    telegram_id = user_data.get('telegram_id') if isinstance(user_data, dict) else user_data[1]
+    return {
+        'telegram_id': telegram_id,
+        'title': title,
+        'photo': get_card_photo(user_data),
+        'caption': format_profile_text(user_data, title),
+    }
+
+def prefetch_next_profile(user_id, context: CallbackContext):
+    """Фонова підготовка картки наступної анкети"""
+    next_user, title = peek_next_candidate(context)
+    if not next_user:
+        return
+    telegram_id = next_user.get('telegram_id') if isinstance(next_user, dict) else next_user[1]
+    profile_prefetcher.schedule(
+        user_id, context.user_data.get('search_session', 0), telegram_id,
+        lambda: prepare_profile_card(next_user, title)
+    )
+
+def find_users_near_city(city, exclude_telegram_id):
+    """Пошук анкет у місті та, за потреби, у сусідніх містах з поступовим розширенням радіусу
+
+    Повертає (користувачі, радіус у км або 0, назва міста з довідника або None)
+    """
+    users = db.get_users_by_city(city, exclude_telegram_id)
+    if len(users) >= CITY_SEARCH_MIN_RESULTS:
+        return users, 0, None
+
+    city_index = gazetteer.resolve(city)
+    if city_index is None:
+        return users, 0, None
+
+    seen_ids = {u['telegram_id'] for u in users}
+    radius_km = 0
+    for radius_km in CITY_SEARCH_RADII_KM:
+        nearby = gazetteer.nearby(city_index, radius_km)
+        names = [alias for index, _ in nearby for alias in gazetteer.city_aliases(index)]
+        found = db.get_users_by_cities(names, exclude_telegram_id)
 
-*Ім'я:* {user_data.get('first_name', 'Не вказано')}
+        # Сортуємо знайдені анкети за відстанню до їхнього міста
+        distance_by_name = {}
+        for index, distance in nearby:
+            for alias in gazetteer.city_aliases(index):
+                distance_by_name.setdefault(alias.lower(), distance)
+        found.sort(key=lambda u: distance_by_name.get((u.get('city') or '').strip().lower(), radius_km))
+
+        for found_user in found:
+            if found_user['telegram_id'] not in seen_ids:
+                seen_ids.add(found_user['telegram_id'])
+                users.append(found_user)
+
+        if len(users) >= CITY_SEARCH_MIN_RESULTS:
+            break
+
+    return users, radius_km, gazetteer.names[city_index]
+
+def render_profile_body(user_data):
+    """Текст картки анкети без заголовка"""
+    gender_display = GENDER_DISPLAY.get(user_data.get('gender'), GENDER_DISPLAY['female'])
+    rating = user_data.get('rating', 5.0)
+    return f"""*Ім'я:* {user_data.get('first_name', 'Не вказано')}
 *Вік:* {user_data.get('age', 'Не вказано')} років
 *Стать:* {gender_display}
 *Місто:* {user_data.get('city', 'Не вказано')}
@@ -29,6 +137,44 @@ def format_profile_text(user_data, title=""):
 
 *Про себе:*
 {user_data.get('bio', 'Не вказано')}"""
+
+def render_top_body(user_data):
+    """Текст картки анкети для топу (без номера та заголовка категорії)"""
+    gender_display = GENDER_DISPLAY.get(user_data.get('gender'), GENDER_DISPLAY['female'])
+    bio = user_data.get('bio')
+    return f"""*Ім'я:* {user_data.get('first_name') or 'Користувач'}
+*Вік:* {user_data.get('age', 'Не вказано')} років
+*Стать:* {gender_display}
+*Місто:* {user_data.get('city', 'Не вказано')}
+*Ціль:* {user_data.get('goal', 'Не вказано')}
+*⭐ Рейтинг:* {user_data.get('rating') or 5.0:.1f}/10.0
+
+*Про себе:*
+{bio if bio else "Не вказано"}"""
+
+def get_card_photo(user_data):
+    """Головне фото анкети (з рядка, якщо запит його вже повернув, інакше з кешу або бази)"""
+    if isinstance(user_data, dict) and 'main_photo' in user_data:
+        return user_data['main_photo']
+    telegram_id = user_data.get('telegram_id') if isinstance(user_data, dict) else user_data[1]
+    return render_cache.get_or_render(user_data, 'main_photo', lambda: db.get_main_photo(telegram_id))
+
+def warm_top_cards(limit=10):
+    """Наперед рендерить картки топів (викликається планувальником завдань після перерахунку рейтингів)"""
+    warmed = 0
+    for gender in (None, 'male', 'female'):
+        for user_data in db.get_top_users_by_rating(limit=limit, gender=gender):
+            render_cache.get_or_render(user_data, 'top', lambda: render_top_body(user_data))
+            get_card_photo(user_data)
+            warmed += 1
+    return warmed
+
+def format_profile_text(user_data, title=""):
+    """Форматування тексту профілю з рейтингом"""
+    try:
+        if isinstance(user_data, dict):
+            body = render_cache.get_or_render(user_data, 'profile', lambda: render_profile_body(user_data))
+            profile_text = f"👤 {title}\n\n{body}"
         else:
             gender_display = "👨 Чоловік" if user_data[5] == 'male' else "👩 Жінка"
             profile_text = f"""👤 {title}
@@ -72,21 +218,18 @@ async def search_profiles(update: Update, context: CallbackContext):
             )
             return
         
-        await update.message.reply_text("🔍 Шукаю анкети...")
-        
-        random_user = db.get_random_user(user.id)
+        # Нова сесія стрічки: черга формується заново
+        start_search_session(user.id, context)
+        random_user = next_feed_candidate(user.id, context)
         
         if random_user:
-            logger.info(f"🔍 [SEARCH] Знайдено користувача: {random_user.get('telegram_id') if isinstance(random_user, dict) else random_user[1]}")
-            
-            # Додаємо запис про перегляд
-            target_id = random_user.get('telegram_id') if isinstance(random_user, dict) else random_user[1]
-            db.add_profile_view(user.id, target_id)
+            search_log.info("🔍 [SEARCH] Знайдено користувача: %s", random_user.get('telegram_id') if isinstance(random_user, dict) else random_user[1])
             
             await show_user_profile(update, context, random_user, "💕 Знайдені анкети")
             context.user_data['search_users'] = [random_user]
             context.user_data['current_index'] = 0
             context.user_data['search_type'] = 'random'
+            prefetch_next_profile(user.id, context)
         else:
             await update.message.reply_text(
                 "😔 Наразі немає анкет для перегляду\n\n"
@@ -121,6 +264,7 @@ async def search_by_city(update: Update, context: CallbackContext):
             await update.message.reply_text("❌ Спочатку заповніть профіль!", reply_markup=get_main_menu(user.id))
             return
         
+        context.user_data['waiting_for_interests'] = False
         context.user_data['waiting_for_city'] = True
         await update.message.reply_text("🏙️ Введіть назву міста для пошуку:")
         
@@ -131,6 +275,99 @@ async def search_by_city(update: Update, context: CallbackContext):
             reply_markup=get_main_menu(user.id)
         )
 
+async def search_by_interests(update: Update, context: CallbackContext):
+    """Пошук за інтересами (повнотекстовий пошук по полю "Про себе")"""
+    user = update.effective_user
+    
+    try:
+        user_data = db.get_user(user.id)
+        if user_data and user_data.get('is_banned'):
+            await update.message.reply_text("🚫 Ваш акаунт заблоковано.")
+            return
+        
+        user_data, is_complete = db.get_user_profile(user.id)
+        
+        if not is_complete:
+            await update.message.reply_text("❌ Спочатку заповніть профіль!", reply_markup=get_main_menu(user.id))
+            return
+        
+        context.user_data['waiting_for_city'] = False
+        context.user_data['waiting_for_interests'] = True
+        await update.message.reply_text(
+            "🔎 *Пошук за інтересами*\n\n"
+            "Введіть слова, які мають бути в анкеті, наприклад: _футбол подорожі_\n\n"
+            "💡 Фразу беріть у лапки, а слово, якого не має бути, позначайте мінусом: _-куріння_",
+            parse_mode='Markdown'
+        )
+        
+    except Exception as e:
+        logger.error(f"❌ Помилка пошуку за інтересами: {e}", exc_info=True)
+        await update.message.reply_text(
+            "❌ Помилка пошуку. Спробуйте ще раз.",
+            reply_markup=get_main_menu(user.id)
+        )
+
+async def handle_interests_query(update: Update, context: CallbackContext):
+    """Обробка введених інтересів та показ першої знайденої анкети"""
+    user = update.effective_user
+    context.user_data['waiting_for_interests'] = False
+    
+    query = update.message.text.strip()[:INTEREST_SEARCH_MAX_QUERY_LENGTH]
+    users = db.search_users_by_interests(query, user.id)
+    
+    if not users:
+        await update.message.reply_text(
+            f"😔 Не знайдено анкет за запитом «{query}»",
+            reply_markup=get_main_menu(user.id)
+        )
+        return
+    
+    start_search_session(user.id, context)
+    context.user_data['search_users'] = users
+    context.user_data['current_index'] = 0
+    context.user_data['search_type'] = 'interests'
+    context.user_data['interests_query'] = query
+    await show_user_profile(update, context, users[0], list_search_title(context))
+    prefetch_next_profile(user.id, context)
+
+async def handle_city_query(update: Update, context: CallbackContext):
+    """Обробка введеного міста та показ першої знайденої анкети"""
+    user = update.effective_user
+    context.user_data['waiting_for_city'] = False
+    
+    clean_city = update.message.text.replace('🏙️ ', '').strip()
+    users, radius_km, _ = find_users_near_city(clean_city, user.id)
+    
+    if not users:
+        await update.message.reply_text(
+            f"😔 Не знайдено анкет у місті {clean_city}",
+            reply_markup=get_main_menu(user.id)
+        )
+        return
+    
+    start_search_session(user.id, context)
+    title = f"🏙️ Місто: {clean_city}"
+    if radius_km:
+        title += f" (+ міста поруч до {radius_km} км)"
+    await show_user_profile(update, context, users[0], title)
+    context.user_data['search_users'] = users
+    context.user_data['current_index'] = 0
+    context.user_data['search_type'] = 'city'
+    prefetch_next_profile(user.id, context)
+
+def load_more_interest_results(user_id, context: CallbackContext):
+    """Довантаження наступної сторінки результатів пошуку за інтересами"""
+    search_users = context.user_data.get('search_users', [])
+    query = context.user_data.get('interests_query')
+    
+    # Неповна сторінка означає, що результатів більше немає
+    if not query or len(search_users) % INTEREST_SEARCH_PAGE_SIZE != 0:
+        return False
+    
+    more_users = db.search_users_by_interests(query, user_id, offset=len(search_users))
+    search_users.extend(more_users)
+    return bool(more_users)
+
 async def show_user_profile(update: Update, context: CallbackContext, user_data, title=""):
     """Показати профіль користувача"""
     user = update.effective_user
@@ -141,8 +378,6 @@ async def show_user_profile(update: Update, context: CallbackContext, user_data,
             await update.message.reply_text("🚫 Ваш акаунт заблоковано.")
             return
         
-        profile_text = format_profile_text(user_data, title)
-        
         if isinstance(user_data, dict):
             telegram_id = user_data.get('telegram_id')
         else:
@@ -150,40 +385,39 @@ async def show_user_profile(update: Update, context: CallbackContext, user_data,
         
         context.user_data['current_profile_id'] = telegram_id
         
-        # ДОДАЄМО ПЕРЕГЛЯД ПРОФІЛЮ (тільки якщо це не той самий користувач)
-        if telegram_id and telegram_id != user.id:
-            success = db.add_profile_view(user.id, telegram_id)
-            if success:
-                logger.info(f"👀 Додано перегляд профілю: {user.id} -> {telegram_id}")
-            else:
-                logger.error(f"❌ Не вдалося додати перегляд: {user.id} -> {telegram_id}")
-        
-        main_photo = db.get_main_photo(telegram_id)
-        
         # Зберігаємо поточний профіль для лайку
         context.user_data['current_profile_for_like'] = telegram_id
         
-        if main_photo:
+        # Картка могла бути підготовлена заздалегідь, поки користувач читав попередню
+        card = profile_prefetcher.take(user.id, context.user_data.get('search_session', 0), telegram_id)
+        if card is None or card['title'] != title:
+            card = prepare_profile_card(user_data, title)
+        
+        # Картка та кнопки лайку/далі - одним повідомленням, якщо текст вміщується в підпис
+        keyboard = PROFILE_CARD_KEYBOARD
+        
+        if card['photo'] and fits_caption(card['caption']):
             await update.message.reply_photo(
-                photo=main_photo, 
-                caption=profile_text,
+                photo=card['photo'], 
+                caption=card['caption'],
+                reply_markup=keyboard,
                 parse_mode='Markdown'
             )
+        elif card['photo']:
+            await update.message.reply_photo(photo=card['photo'])
+            await update.message.reply_text(card['caption'], reply_markup=keyboard, parse_mode='Markdown')
         else:
             await update.message.reply_text(
-                profile_text,
+                card['caption'],
+                reply_markup=keyboard,
                 parse_mode='Markdown'
             )
         
-        # Показуємо меню з кнопками лайку та далі
-        keyboard = [
-            ['❤️ Лайк', '➡️ Далі'],
-            ['🔙 Меню']
-        ]
-        await update.message.reply_text(
-            "Оберіть дію:",
-            reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-        )
+        # Перегляд записуємо вже після відправки картки (тільки якщо це не той самий користувач)
+        if telegram_id and telegram_id != user.id:
+            # Запис у БД відкладається і робиться пачками (під навантаженням - пізніше);
+            # сповіщення про перегляд - після успішного запису (DeferredViewLog.on_written)
+            profile_view_log.record(user.id, telegram_id)
             
     except Exception as e:
         logger.error(f"❌ Помилка відправки профілю: {e}")
@@ -209,21 +443,21 @@ async def handle_like(update: Update, context: CallbackContext):
             await update.message.reply_text("❌ Не знайдено профіль для лайку")
             return
         
-        logger.info(f"🔍 [LIKE] Користувач {user.id} лайкає {target_user_id}")
+        like_log.info("🔍 [LIKE] Користувач %s лайкає %s", user.id, target_user_id)
         
         # Додаємо лайк з перевіркою обмежень
         success, message = db.add_like(user.id, target_user_id)
         
-        logger.info(f"🔍 [LIKE RESULT] Успіх: {success}, Повідомлення: {message}")
+        like_log.info("🔍 [LIKE RESULT] Успіх: %s, Повідомлення: %s", success, message)
         
         if success:
             # Перевіряємо чи це взаємний лайк (матч)
             is_mutual = db.has_liked(target_user_id, user.id)
-            logger.info(f"🔍 [LIKE MUTUAL] Взаємний: {is_mutual}")
+            like_log.info("🔍 [LIKE MUTUAL] Взаємний: %s", is_mutual)
             
             if is_mutual:
-                # Відправляємо сповіщення про матч
-                await notification_system.notify_new_match(context, user.id, target_user_id)
+                # Сповіщення про матч відправляється у фоні
+                notification_system.enqueue_match(user.id, target_user_id)
                 
                 # Отримуємо дані користувача для кнопки переходу в Telegram
                 matched_user = db.get_user(target_user_id)
@@ -245,8 +479,8 @@ async def handle_like(update: Update, context: CallbackContext):
                 else:
                     await update.message.reply_text("💕 У вас матч! Ви вподобали один одного!")
             else:
-                # Відправляємо сповіщення про лайк
-                await notification_system.notify_new_like(context, user.id, target_user_id)
+                # Лайк потрапить у дайджест отримувача
+                notification_system.enqueue_like(user.id, target_user_id)
                 await update.message.reply_text(f"❤️ {message}")
         else:
             await update.message.reply_text(f"❌ {message}")
@@ -273,41 +507,30 @@ async def show_next_profile(update: Update, context: CallbackContext):
             await search_profiles(update, context)
             return
         
-        # Якщо це пошук за містом, шукаємо наступного користувача
-        if search_type == 'city':
+        # Пошук за містом або інтересами - рухаємось по списку знайдених анкет
+        if search_type in ('city', 'interests'):
+            if current_index >= len(search_users) - 1 and search_type == 'interests':
+                load_more_interest_results(user.id, context)
+            
             if current_index < len(search_users) - 1:
                 current_index += 1
                 context.user_data['current_index'] = current_index
                 user_data = search_users[current_index]
                 
-                # Безпечне отримання ID користувача
-                if isinstance(user_data, dict):
-                    user_id = user_data.get('telegram_id')
-                else:
-                    user_id = user_data[1] if len(user_data) > 1 else None
-                
-                if user_id:
-                    db.add_profile_view(user.id, user_id)
-                
-                await show_user_profile(update, context, user_data, "🏙️ Знайдені анкети")
+                await show_user_profile(update, context, user_data, list_search_title(context))
+                prefetch_next_profile(user.id, context)
+            elif search_type == 'interests':
+                await update.message.reply_text("✅ Це остання анкета за вашим запитом", reply_markup=get_main_menu(user.id))
             else:
                 await update.message.reply_text("✅ Це остання анкета в цьому місті", reply_markup=get_main_menu(user.id))
         else:
-            # Для випадкового пошуку - шукаємо нову анкету
-            random_user = db.get_random_user(user.id)
+            # Для стрічки - беремо наступну найкращу анкету з черги
+            random_user = next_feed_candidate(user.id, context)
             if random_user:
-                # Безпечне отримання ID користувача
-                if isinstance(random_user, dict):
-                    user_id = random_user.get('telegram_id')
-                else:
-                    user_id = random_user[1] if len(random_user) > 1 else None
-                
-                if user_id:
-                    db.add_profile_view(user.id, user_id)
-                
                 await show_user_profile(update, context, random_user, "💕 Знайдені анкети")
                 context.user_data['search_users'] = [random_user]
                 context.user_data['current_index'] = 0
+                prefetch_next_profile(user.id, context)
             else:
                 await update.message.reply_text(
                     "😔 Більше немає анкет для перегляду\n\n"
@@ -369,43 +592,28 @@ async def show_matches(update: Update, context: CallbackContext):
             
             for match in matches:
                 try:
-                    # Визначаємо ID матчу
-                    if isinstance(match, dict):
-                        match_id = match.get('telegram_id')
-                    else:
-                        match_id = match[1] if len(match) > 1 else None
-                    
+                    match_id = match.get('telegram_id')
                     if not match_id:
                         continue
                     
-                    profile_text = format_profile_text(match, "💕 МАТЧ!")
-                    main_photo = db.get_main_photo(match_id)
-                    
-                    # Отримуємо username
-                    matched_user = db.get_user(match_id)
-                    username = matched_user.get('username') if matched_user else None
+                    # Фото та username приходять разом з матчами, без окремих запитів
+                    caption = format_profile_text(match, "💕 МАТЧ!")
+                    username = match.get('username')
+                    if username:
+                        caption += f"\n\n💬 Написати: @{username}"
+                    else:
+                        caption += "\n\nℹ️ *У цього користувача немає username*"
                     
-                    if main_photo:
-                        caption = profile_text
-                        if username:
-                            caption += f"\n\n💬 Написати: @{username}"
-                        else:
-                            caption += "\n\nℹ️ *У цього користувача немає username*"
-                        
+                    main_photo = get_card_photo(match)
+                    if main_photo and fits_caption(caption):
                         await update.message.reply_photo(
                             photo=main_photo,
                             caption=caption,
                             parse_mode='Markdown'
                         )
                     else:
-                        text = profile_text
-                        if username:
-                            text += f"\n\n💬 Написати: @{username}"
-                        else:
-                            text += "\n\nℹ️ *У цього користувача немає username*"
-                        
                         await update.message.reply_text(
-                            text,
+                            caption,
                             parse_mode='Markdown'
                         )
                         
@@ -445,55 +653,39 @@ async def show_likes(update: Update, context: CallbackContext):
             
             for liker in likers:
                 try:
-                    # Визначаємо ID лайкера
-                    if isinstance(liker, dict):
-                        liker_id = liker.get('telegram_id')
-                        is_mutual = db.has_liked(user.id, liker_id)
-                    else:
-                        liker_id = liker[1] if len(liker) > 1 else None
-                        is_mutual = db.has_liked(user.id, liker_id) if liker_id else False
-                    
+                    liker_id = liker.get('telegram_id')
+                    is_mutual = liker.get('is_mutual')
                     status = "💕 МАТЧ" if is_mutual else "❤️ Лайкнув(ла) вас"
                     
-                    # Форматуємо профіль
-                    profile_text = format_profile_text(liker, status)
-                    main_photo = db.get_main_photo(liker_id)
+                    # Форматуємо профіль (фото та взаємність приходять разом зі списком)
+                    caption = format_profile_text(liker, status)
+                    username = liker.get('username')
+                    if username:
+                        caption += f"\n\n💬 Username: @{username}"
                     
-                    # Отримуємо username
-                    liked_user = db.get_user(liker_id)
-                    username = liked_user.get('username') if liked_user else None
+                    # Для ще не взаємного лайку - кнопки взаємного лайку в тому ж повідомленні
+                    keyboard = None
+                    if not is_mutual and liker_id:
+                        context.user_data['current_profile_for_like'] = liker_id
+                        caption += "\n\nБажаєте поставити взаємний лайк?"
+                        keyboard = LIKE_BACK_KEYBOARD
                     
-                    if main_photo:
-                        caption = profile_text
-                        if username:
-                            caption += f"\n\n💬 Username: @{username}"
-                        
+                    main_photo = get_card_photo(liker)
+                    if main_photo and fits_caption(caption):
                         await update.message.reply_photo(
                             photo=main_photo,
                             caption=caption,
+                            reply_markup=keyboard,
                             parse_mode='Markdown'
                         )
                     else:
-                        text = profile_text
-                        if username:
-                            text += f"\n\n💬 Username: @{username}"
-                        
                         await update.message.reply_text(
-                            text,
+                            caption,
+                            reply_markup=keyboard,
                             parse_mode='Markdown'
                         )
                     
-                    # Додаємо кнопку для взаємного лайку, якщо ще не матч
-                    if not is_mutual and liker_id:
-                        context.user_data['current_profile_for_like'] = liker_id
-                        keyboard = [
-                            ['❤️ Взаємний лайк'],
-                            ['➡️ Наступний лайк']
-                        ]
-                        await update.message.reply_text(
-                            "Бажаєте поставити взаємний лайк?",
-                            reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-                        )
+                    if keyboard:
                         break  # Показуємо по одному з можливістю взаємності
                         
                 except Exception as e:
@@ -527,45 +719,23 @@ async def handle_like_back(update: Update, context: CallbackContext):
             await update.message.reply_text("❌ Не знайдено профіль для лайку")
             return
         
-        logger.info(f"🔍 [LIKE BACK] Користувач {user.id} лайкає назад {target_user_id}")
+        like_log.info("🔍 [LIKE BACK] Користувач %s лайкає назад %s", user.id, target_user_id)
         
         success, message = db.add_like(user.id, target_user_id)
         
-        logger.info(f"🔍 [LIKE BACK RESULT] Успіх: {success}, Повідомлення: {message}")
+        like_log.info("🔍 [LIKE BACK RESULT] Успіх: %s, Повідомлення: %s", success, message)
         
         if success:
-            current_user = db.get_user(user.id)
-            target_user = db.get_user(target_user_id)
-            
-            if current_user and target_user:
-                if db.has_liked(target_user_id, user.id):
-                    match_text = "🎉 У вас новий матч!"
-                    
-                    await update.message.reply_text(
-                        f"{match_text}\n\n💞 Тепер ви можете спілкуватися з {target_user['first_name']}!"
-                    )
-                    
-                    try:
-                        await context.bot.send_message(
-                            chat_id=target_user_id,
-                            text=f"🎉 У вас новий матч з {current_user['first_name']}!"
-                        )
-                    except Exception as e:
-                        logger.error(f"❌ Не вдалося сповістити користувача {target_user_id} про матч: {e}")
-                else:
-                    await update.message.reply_text(
-                        "❤️ Ви відправили лайк! Очікуйте на взаємність."
-                    )
-                    
-                    try:
-                        await context.bot.send_message(
-                            chat_id=target_user_id,
-                            text=f"❤️ Вас лайкнув(ла) {current_user['first_name']}! Перевірте хто вас лайкнув у меню."
-                        )
-                    except Exception as e:
-                        logger.error(f"❌ Не вдалося сповістити користувача {target_user_id} про лайк: {e}")
+            if db.has_liked(target_user_id, user.id):
+                # Сповіщення про матч (обом, з кнопкою для переходу в Telegram) відправляється у фоні
+                notification_system.enqueue_match(user.id, target_user_id)
+                await update.message.reply_text("🎉 У вас новий матч! Ви вподобали один одного!")
             else:
-                await update.message.reply_text("❌ Помилка: користувача не знайдено")
+                # Лайк потрапить у дайджест отримувача
+                notification_system.enqueue_like(user.id, target_user_id)
+                await update.message.reply_text(
+                    "❤️ Ви відправили лайк! Очікуйте на взаємність."
+                )
         else:
             await update.message.reply_text(f"❌ {message}")
             
@@ -596,71 +766,40 @@ async def handle_top_selection(update: Update, context: CallbackContext):
             title = "🏆 Топ користувачів"
         
         if top_users:
-            await update.message.reply_text(f"**{title}** 🏆\n\n*Знайдено анкет: {len(top_users)}*", parse_mode='Markdown')
+            header = f"*{title}* 🏆 | *Знайдено анкет: {len(top_users)}*"
+            
+            # Кнопки лайку та навігації по топу разом з вибором іншої категорії
+            keyboard = TOP_CARD_KEYBOARD
             
             for i, user_data in enumerate(top_users[:5], 1):  # Показуємо перших 5
                 try:
-                    # Визначаємо дані користувача
-                    if isinstance(user_data, dict):
-                        user_id = user_data.get('telegram_id')
-                        first_name = user_data.get('first_name', 'Користувач')
-                        age = user_data.get('age', 'Не вказано')
-                        gender = user_data.get('gender', 'unknown')
-                        city = user_data.get('city', 'Не вказано')
-                        goal = user_data.get('goal', 'Не вказано')
-                        bio = user_data.get('bio', 'Не вказано')
-                        rating = user_data.get('rating', 5.0)
-                        likes_count = user_data.get('likes_count', 0)
-                    else:
-                        user_id = user_data[1] if len(user_data) > 1 else None
-                        first_name = user_data[3] if len(user_data) > 3 and user_data[3] else 'Користувач'
-                        age = user_data[4] if len(user_data) > 4 else 'Не вказано'
-                        gender = user_data[5] if len(user_data) > 5 else 'unknown'
-                        city = user_data[6] if len(user_data) > 6 else 'Не вказано'
-                        goal = user_data[8] if len(user_data) > 8 else 'Не вказано'
-                        bio = user_data[9] if len(user_data) > 9 else 'Не вказано'
-                        rating = user_data[14] if len(user_data) > 14 else 5.0
-                        likes_count = user_data[12] if len(user_data) > 12 else 0
-                    
+                    user_id = user_data.get('telegram_id')
                     if not user_id:
                         continue
                     
-                    profile_text = f"""🏅 #{i} | ⭐ {rating:.1f} | ❤️ {likes_count} лайків
-
-*Ім'я:* {first_name}
-*Вік:* {age} років
-*Стать:* {'👨 Чоловік' if gender == 'male' else '👩 Жінка'}
-*Місто:* {city}
-*Ціль:* {goal}
-*⭐ Рейтинг:* {rating:.1f}/10.0
-
-*Про себе:*
-{bio if bio else "Не вказано"}"""
+                    rating = user_data.get('rating') or 5.0
+                    likes_count = user_data.get('likes_count') or 0
+                    body = render_cache.get_or_render(user_data, 'top', lambda: render_top_body(user_data))
+                    profile_text = f"{header}\n\n🏅 #{i} | ⭐ {rating:.1f} | ❤️ {likes_count} лайків\n\n{body}"
                     
-                    main_photo = db.get_main_photo(user_id)
+                    main_photo = get_card_photo(user_data)
                     
                     # Зберігаємо поточний профіль для лайку
                     context.user_data['current_profile_for_like'] = user_id
                     context.user_data['current_top_user'] = user_data
                     
-                    if main_photo:
+                    if main_photo and fits_caption(profile_text):
                         await update.message.reply_photo(
                             photo=main_photo,
                             caption=profile_text,
+                            reply_markup=keyboard,
                             parse_mode='Markdown'
                         )
+                    elif main_photo:
+                        await update.message.reply_photo(photo=main_photo)
+                        await update.message.reply_text(profile_text, reply_markup=keyboard, parse_mode='Markdown')
                     else:
-                        await update.message.reply_text(profile_text, parse_mode='Markdown')
-                    
-                    # Показуємо меню з кнопкою лайку для топу
-                    keyboard = [
-                        ['❤️ Лайк'],
-                        ['➡️ Наступний у топі']
-                    ]
-                    await update.message.reply_text(
-                        "Оберіть дію:",
-                        reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-                    )
+                        await update.message.reply_text(profile_text, reply_markup=keyboard, parse_mode='Markdown')
                     
                     # Зупиняємося на цьому профілі
                     context.user_data['current_top_index'] = i
@@ -670,16 +809,6 @@ async def handle_top_selection(update: Update, context: CallbackContext):
                 except Exception as e:
                     logger.error(f"❌ Помилка обробки топу #{i}: {e}")
                     continue
-            
-            # Клавіатура для навігації
-            keyboard = [
-                ['👨 Топ чоловіків', '👩 Топ жінок'],
-                ['🏆 Загальний топ', '🔙 Меню']
-            ]
-            await update.message.reply_text(
-                "🏆 Оберіть іншу категорію або поверніться в меню:",
-                reply_markup=ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
-            )
         else:
             await update.message.reply_text(
                 f"😔 Ще немає користувачів у {title}\n\n"
@@ -734,7 +863,7 @@ async def handle_top_like(update: Update, context: CallbackContext):
             await update.message.reply_text("❌ Не знайдено профіль для лайку")
             return
         
-        logger.info(f"🔍 [TOP LIKE] Користувач {user.id} лайкає з топу {target_user_id}")
+        like_log.info("🔍 [TOP LIKE] Користувач %s лайкає з топу %s", user.id, target_user_id)
         
         # Додаємо лайк з перевіркою обмежень
         success, message = db.add_like(user.id, target_user_id)
@@ -764,11 +893,11 @@ async def handle_top_like(update: Update, context: CallbackContext):
                 else:
                     await update.message.reply_text("💕 У вас матч! Ви вподобали один одного!")
                 
-                # Відправляємо сповіщення про матч
-                await notification_system.notify_new_match(context, user.id, target_user_id)
+                # Сповіщення про матч відправляється у фоні
+                notification_system.enqueue_match(user.id, target_user_id)
             else:
-                # Відправляємо сповіщення про лайк
-                await notification_system.notify_new_like(context, user.id, target_user_id)
+                # Лайк потрапить у дайджест отримувача
+                notification_system.enqueue_like(user.id, target_user_id)
                 await update.message.reply_text(f"❤️ {message}")
                 
             # Показуємо наступного користувача після лайку
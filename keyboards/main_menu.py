@@ -1,25 +1,21 @@
 from telegram import ReplyKeyboardMarkup
 from config import ADMIN_ID
 
+# Головне меню будується один раз: розмітка незмінна і може надсилатися повторно
+_USER_MENU_ROWS = [
+    ['💕 Пошук анкет', '🏙️ По місту', '🔎 За інтересами'],
+    ['👤 Мій профіль', '📷 Моя галерея', '📝 Редагувати'],
+    ['❤️ Хто мене лайкнув', '💌 Мої матчі'],
+    ['🏆 Топ', "👨‍💼 Зв'язок з адміном"]
+]
+USER_MAIN_MENU = ReplyKeyboardMarkup(_USER_MENU_ROWS, resize_keyboard=True)
+ADMIN_MAIN_MENU = ReplyKeyboardMarkup(_USER_MENU_ROWS + [['👑 Адмін панель']], resize_keyboard=True)
+
 def get_main_menu(user_id=None):
     """Головне меню без кнопки '👀 Хто переглядав'"""
     if user_id and user_id == ADMIN_ID:
-        keyboard = [
-            ['💕 Пошук анкет', '🏙️ По місту'],
-            ['👤 Мій профіль', '📝 Редагувати'],
-            ['❤️ Хто мене лайкнув', '💌 Мої матчі'],
-            ['🏆 Топ', "👨‍💼 Зв'язок з адміном"],
-            ['👑 Адмін панель']
-        ]
-    else:
-        keyboard = [
-            ['💕 Пошук анкет', '🏙️ По місту'],
-            ['👤 Мій профіль', '📝 Редагувати'],
-            ['❤️ Хто мене лайкнув', '💌 Мої матчі'],
-            ['🏆 Топ', "👨‍💼 Зв'язок з адміном"]
-        ]
-    
-    return ReplyKeyboardMarkup(keyboard, resize_keyboard=True)
+        return ADMIN_MAIN_MENU
+    return USER_MAIN_MENU
 
 def get_search_menu():
     """Меню пошуку"""
@@ -1,5 +1,22 @@
 from telegram import ReplyKeyboardMarkup
 
+# Готові клавіатури карток анкет (розмітка незмінна, тому створюється один раз)
+PROFILE_CARD_KEYBOARD = ReplyKeyboardMarkup([
+    ['❤️ Лайк', '➡️ Далі'],
+    ['📸 Всі фото', '🔙 Меню']
+], resize_keyboard=True)
+
+TOP_CARD_KEYBOARD = ReplyKeyboardMarkup([
+    ['❤️ Лайк', '➡️ Наступний у топі'],
+    ['👨 Топ чоловіків', '👩 Топ жінок'],
+    ['🏆 Загальний топ', '🔙 Меню']
+], resize_keyboard=True)
+
+LIKE_BACK_KEYBOARD = ReplyKeyboardMarkup([
+    ['❤️ Взаємний лайк'],
+    ['➡️ Наступний лайк']
+], resize_keyboard=True)
+
 def get_search_navigation():
     """Клавіатура для навігації при пошуку"""
     keyboard = [
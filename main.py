@@ -1,17 +1,17 @@
 import logging
 import os
+import sys
+import signal
 import asyncio
 import threading
+import hmac
+from functools import wraps
 from flask import Flask, request, jsonify
 from telegram import Update, ReplyKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters, CallbackQueryHandler
-from keep_alive import start_keep_alive
-
-# Налаштування логування
-logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    level=logging.INFO
-)
+from telegram.ext import Application, CommandHandler, MessageHandler, ContextTypes, filters, CallbackQueryHandler, TypeHandler
+# Налаштування логування (черга + окремий потік виводу, див. utils/logs.py)
+from utils.logs import setup_logging
+setup_logging()
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
@@ -31,7 +31,14 @@ except ImportError as e:
         raise
 
 try:
-    from config import ADMIN_ID, TOKEN
+    from config import ADMIN_ID, TOKEN, WEBHOOK_URL, BOT_MODE, BOT_API_BASE_URL, BOT_API_FILE_URL
+    from config import WEBHOOK_ENQUEUE_TIMEOUT, WEBHOOK_RETRY_AFTER, ADMIN_API_TOKEN
+    from config import (
+        KEEP_ALIVE_URL, KEEP_ALIVE_INTERVAL, NOTIFY_FLUSH_INTERVAL, RATINGS_JOB_INTERVAL,
+        RETENTION_JOB_INTERVAL, CACHE_WARMUP_INTERVAL, PROFILE_VIEWS_RETENTION_DAYS,
+        UPDATE_DEDUP_DB_RETENTION_HOURS, DB_EXPLAIN_JOB_INTERVAL,
+        HEALTH_CHECK_INTERVAL, HEALTH_MAX_LOOP_LAG, HEALTH_MAX_QUEUE_LOAD
+    )
 except ImportError as e:
     logger.error(f"❌ Помилка імпорту конфігурації: {e}")
     raise
@@ -43,10 +50,10 @@ except ImportError as e:
     logger.error(f"❌ Помилка імпорту утиліт: {e}")
 
 # Глобальні змінні
-WEBHOOK_URL = "https://chatrix-bot-4m1p.onrender.com/webhook"
 PORT = int(os.environ.get('PORT', 10000))
 application = None
 bot_loop = None
+update_poller = None
 
 # ==================== ВАШ ОРИГІНАЛЬНИЙ КОД ====================
 
@@ -167,7 +174,7 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
             parse_mode='Markdown'
         )
         
-        print(f"✅ Стартове повідомлення відправлено для {user.first_name}")
+        logger.info("✅ Стартове повідомлення відправлено для %s", user.first_name)
         
     except Exception as e:
         logger.error(f"❌ Помилка в /start: {e}", exc_info=True)
@@ -244,6 +251,38 @@ async def show_my_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except ImportError:
         await update.message.reply_text("❌ Функція перегляду профілю тимчасово недоступна")
 
+async def show_gallery(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія показу галереї"""
+    try:
+        from handlers.gallery import show_gallery as real_show_gallery
+        await real_show_gallery(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Галерея тимчасово недоступна")
+
+async def start_add_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія додавання фото в галерею"""
+    try:
+        from handlers.gallery import start_add_photo as real_start_add_photo
+        await real_start_add_photo(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Галерея тимчасово недоступна")
+
+async def handle_add_photo(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія обробки фото для галереї"""
+    try:
+        from handlers.gallery import handle_add_photo as real_handle_add_photo
+        await real_handle_add_photo(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Галерея тимчасово недоступна")
+
+async def view_user_gallery(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія перегляду фото анкети"""
+    try:
+        from handlers.gallery import view_user_gallery as real_view_user_gallery
+        await real_view_user_gallery(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Галерея тимчасово недоступна")
+
 async def search_profiles(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Проста версія пошуку профілів"""
     try:
@@ -260,6 +299,14 @@ async def search_by_city(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except ImportError:
         await update.message.reply_text("❌ Функція пошуку за містом тимчасово недоступна")
 
+async def search_by_interests(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія пошуку за інтересами"""
+    try:
+        from handlers.search import search_by_interests as real_search_interests
+        await real_search_interests(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Функція пошуку за інтересами тимчасово недоступна")
+
 async def show_next_profile(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Проста версія наступного профілю"""
     try:
@@ -350,222 +397,132 @@ async def reset_state(update: Update, context: ContextTypes.DEFAULT_TYPE):
         reply_markup=get_main_menu(user.id)
     )
 
-async def universal_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    """Універсальний обробник повідомлень"""
+async def handle_top_navigation(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія навігації по топу"""
     try:
-        user = update.effective_user
-        text = update.message.text if update.message.text else ""
-        
-        state = user_states.get(user.id, States.START)
-
-        if text == "🔙 Скасувати":
-            user_states[user.id] = States.START
-            await update.message.reply_text("❌ Скасовано", reply_markup=get_main_menu(user.id))
-            return
-
-        if state == States.CONTACT_ADMIN:
-            await handle_contact_message(update, context)
-            return
-
-        if state == States.ADD_MAIN_PHOTO:
-            await handle_main_photo(update, context)
-            return
-
-        if state in [States.PROFILE_AGE, States.PROFILE_GENDER, States.PROFILE_SEEKING_GENDER, 
-                     States.PROFILE_CITY, States.PROFILE_GOAL, States.PROFILE_BIO]:
-            try:
-                from handlers.profile import handle_profile_message
-                await handle_profile_message(update, context)
-            except ImportError:
-                await update.message.reply_text("❌ Функція редагування профілю тимчасово недоступна")
-            return
-        
-        if context.user_data.get('waiting_for_city'):
-            clean_city = text.replace('🏙️ ', '').strip()
-            users = db.get_users_by_city(clean_city, user.id)
-            
-            if users:
-                try:
-                    from handlers.search import show_user_profile
-                    user_data = users[0]
-                    await show_user_profile(update, context, user_data, f"🏙️ Місто: {clean_city}")
-                    context.user_data['search_users'] = users
-                    context.user_data['current_index'] = 0
-                    context.user_data['search_type'] = 'city'
-                except ImportError:
-                    await update.message.reply_text("❌ Функція пошуку тимчасово недоступна")
-            else:
-                await update.message.reply_text(
-                    f"😔 Не знайдено анкет у місті {clean_city}",
-                    reply_markup=get_main_menu(user.id)
-                )
-            
-            context.user_data['waiting_for_city'] = False
-            return
-        
-        if user.id == ADMIN_ID:
-            admin_state = user_states.get(user.id)
-            if admin_state == States.ADMIN_BAN_USER:
-                try:
-                    from handlers.admin import handle_ban_user
-                    await handle_ban_user(update, context)
-                except ImportError:
-                    await update.message.reply_text("❌ Адмін функції тимчасово недоступні")
-                return
-            elif admin_state == States.ADMIN_UNBAN_USER:
-                try:
-                    from handlers.admin import handle_unban_user
-                    await handle_unban_user(update, context)
-                except ImportError:
-                    await update.message.reply_text("❌ Адмін функції тимчасово недоступні")
-                return
-            elif admin_state == States.BROADCAST:
-                try:
-                    from handlers.admin import handle_broadcast_message
-                    await handle_broadcast_message(update, context)
-                except ImportError:
-                    await update.message.reply_text("❌ Адмін функції тимчасово недоступні")
-                return
-            elif admin_state == States.ADMIN_SEARCH_USER:
-                try:
-                    from handlers.admin import handle_user_search
-                    await handle_user_search(update, context)
-                except ImportError:
-                    await update.message.reply_text("❌ Адмін функції тимчасово недоступні")
-                return
-        
-        # Обробка кнопок меню
-        if text == "📝 Заповнити профіль" or text == "📝 Редагувати":
-            await start_profile_creation(update, context)
-            return
-        
-        elif text == "👤 Мій профіль":
-            await show_my_profile(update, context)
-            return
-        
-        elif text == "💕 Пошук анкет":
-            await search_profiles(update, context)
-            return
-        
-        elif text == "🏙️ По місту":
-            await search_by_city(update, context)
-            return
-        
-        elif text == "➡️ Далі":
-            await show_next_profile(update, context)
-            return
-        
-        elif text == "❤️ Лайк":
-            await handle_like(update, context)
-            return
-        
-        elif text == "❤️ Взаємний лайк":
-            await handle_like_back(update, context)
-            return
-        
-        elif text == "🔙 Меню":
-            await update.message.reply_text("👋 Повертаємось до меню", reply_markup=get_main_menu(user.id))
-            return
-        
-        elif text == "🏆 Топ":
-            await show_top_users(update, context)
-            return
-        
-        elif text == "💌 Мої матчі":
-            await show_matches(update, context)
-            return
-        
-        elif text == "❤️ Хто мене лайкнув":
-            await show_likes(update, context)
-            return
-        
-        elif text in ["👨 Топ чоловіків", "👩 Топ жінок", "🏆 Загальний топ"]:
-            await handle_top_selection(update, context)
-            return
-        
-        elif text == "👨‍💼 Зв'язок з адміном":
-            await contact_admin(update, context)
-            return
-
-        elif text == "❤️ Лайк":  # Для лайків з топу
-            from handlers.search import handle_top_like
-            await handle_top_like(update, context)
-            return
-
-        elif text == "❤️ Лайкнути":  # Для лайків з переглядів
-            from handlers.search import handle_like
-            await handle_like(update, context)
-            return
+        from handlers.search import handle_top_navigation as real_top_navigation
+        await real_top_navigation(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Функція топу користувачів тимчасово недоступна")
 
-        elif text == "➡️ Наступний перегляд":
-            from handlers.search import show_next_profile_view
-            await show_next_profile_view(update, context)
-            return
+async def handle_profile_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія заповнення профілю"""
+    try:
+        from handlers.profile import handle_profile_message as real_profile_message
+        await real_profile_message(update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Функція редагування профілю тимчасово недоступна")
 
-        elif text == "➡️ Наступний у топі":
-            from handlers.search import handle_top_navigation
-            await handle_top_navigation(update, context)
-            return 
+async def handle_city_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія обробки введеного міста"""
+    try:
+        from handlers.search import handle_city_query as real_city_query
+        await real_city_query(update, context)
+    except ImportError:
+        context.user_data['waiting_for_city'] = False
+        await update.message.reply_text("❌ Функція пошуку тимчасово недоступна")
 
-        elif text == "📈 Детальна статистика":
-            from handlers.admin import show_detailed_stats
-            await show_detailed_stats(update, context)
-            return     
+async def handle_interests_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Проста версія обробки введених інтересів"""
+    try:
+        from handlers.search import handle_interests_query as real_interests_query
+        await real_interests_query(update, context)
+    except ImportError:
+        context.user_data['waiting_for_interests'] = False
+        await update.message.reply_text("❌ Функція пошуку тимчасово недоступна")
 
-        elif text == "🔙 Меню":
-            await update.message.reply_text(
-                "👋 Повертаємось до головного меню",
-                reply_markup=get_main_menu(user.id)
-            )
-            return
+async def handle_admin_input(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Обробка вводу адміністратора відповідно до його стану"""
+    try:
+        from handlers.admin import handle_ban_user, handle_unban_user, handle_broadcast_message, handle_user_search
+        handlers_by_state = {
+            States.ADMIN_BAN_USER: handle_ban_user,
+            States.ADMIN_UNBAN_USER: handle_unban_user,
+            States.BROADCAST: handle_broadcast_message,
+            States.ADMIN_SEARCH_USER: handle_user_search,
+        }
+        await handlers_by_state[user_states.get(update.effective_user.id)](update, context)
+    except ImportError:
+        await update.message.reply_text("❌ Адмін функції тимчасово недоступні")
 
-        elif text == "🔍 Пошук користувача":
-            from handlers.admin import start_user_search
-            await start_user_search(update, context)
-            return  
+async def cancel_action(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Кнопка '🔙 Скасувати' з будь-якого стану"""
+    user = update.effective_user
+    user_states[user.id] = States.START
+    await update.message.reply_text("❌ Скасовано", reply_markup=get_main_menu(user.id))
 
-        elif text == "📊 Статистика":
-            from handlers.admin import show_admin_panel
-            await show_admin_panel(update, context)
-            return
+async def back_to_menu(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Повернення до головного меню"""
+    await update.message.reply_text("👋 Повертаємось до меню", reply_markup=get_main_menu(update.effective_user.id))
 
-        elif text == "👥 Користувачі":
-            from handlers.admin import show_users_management
-            await show_users_management(update, context)
-            return
+async def unknown_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Повідомлення, для якого немає маршруту"""
+    await update.message.reply_text(
+        "❌ Команда не розпізнана. Оберіть пункт з меню:",
+        reply_markup=get_main_menu(update.effective_user.id)
+    )
 
-        elif text == "📢 Розсилка":
-            from handlers.admin import start_broadcast
-            await start_broadcast(update, context)
-            return    
+def build_router():
+    """Таблиця маршрутів: текст кнопки / стан / прапорець -> обробник"""
+    from utils.router import Router
+    
+    router = Router(ADMIN_ID)
+    
+    # Кнопки меню (мають пріоритет над станом користувача)
+    router.text(["📝 Заповнити профіль", "📝 Редагувати"], start_profile_creation)
+    router.text("👤 Мій профіль", show_my_profile)
+    router.text(["📷 Моя галерея", "👀 Переглянути галерею"], show_gallery)
+    router.text("📷 Додати фото", start_add_photo)
+    router.text("📸 Всі фото", view_user_gallery)
+    router.text("💕 Пошук анкет", search_profiles)
+    router.text("🏙️ По місту", search_by_city)
+    router.text("🔎 За інтересами", search_by_interests)
+    router.text("➡️ Далі", show_next_profile)
+    router.text(["❤️ Лайк", "❤️ Лайкнути"], handle_like)
+    router.text("❤️ Взаємний лайк", handle_like_back)
+    router.text("🏆 Топ", show_top_users)
+    router.text(["👨 Топ чоловіків", "👩 Топ жінок", "🏆 Загальний топ"], handle_top_selection)
+    router.text("➡️ Наступний у топі", handle_top_navigation)
+    router.text("💌 Мої матчі", show_matches)
+    router.text("❤️ Хто мене лайкнув", show_likes)
+    router.text("👨‍💼 Зв'язок з адміном", contact_admin)
+    router.text(["🔙 Меню", "🔙 Головне меню"], back_to_menu)
+    router.text("🔙 Скасувати", cancel_action)
+    
+    # Адмін панель
+    router.text([
+        "👑 Адмін панель", "📊 Статистика", "👥 Користувачі", "📢 Розсилка", "🔄 Оновити базу",
+        "🚫 Блокування", "📈 Детальна статистика", "🔍 Пошук користувача", "📋 Список користувачів",
+        "🚫 Заблокувати користувача", "✅ Розблокувати користувача", "📋 Список заблокованих",
+        "🔙 Назад до адмін-панелі"
+    ], handle_admin_actions, admin_only=True)
+    
+    # Вільний ввід залежно від стану
+    router.state(States.CONTACT_ADMIN, handle_contact_message)
+    router.state(States.ADD_MAIN_PHOTO, handle_main_photo)
+    router.state(States.ADD_PHOTO, handle_add_photo)
+    router.state([
+        States.PROFILE_AGE, States.PROFILE_GENDER, States.PROFILE_SEEKING_GENDER,
+        States.PROFILE_CITY, States.PROFILE_GOAL, States.PROFILE_BIO
+    ], handle_profile_message)
+    router.state([
+        States.ADMIN_BAN_USER, States.ADMIN_UNBAN_USER, States.BROADCAST, States.ADMIN_SEARCH_USER
+    ], handle_admin_input, admin_only=True)
+    
+    # Очікування назви міста або інтересів
+    router.flag('waiting_for_interests', handle_interests_query)
+    router.flag('waiting_for_city', handle_city_query)
+    
+    router.photo(handle_add_photo, States.ADD_PHOTO)
+    router.photo(handle_main_photo)
+    router.default(unknown_command)
+    return router
 
-        elif user.id == ADMIN_ID:
-            if text in ["👑 Адмін панель", "📊 Статистика", "👥 Користувачі", "📢 Розсилка", "🔄 Оновити базу", "🚫 Блокування"]:
-                await handle_admin_actions(update, context)
-                return
-            
-            if text in ["📋 Список користувачів", "🚫 Заблокувати користувача", "✅ Розблокувати користувача", "📋 Список заблокованих", "🔙 Назад до адмін-панелі"]:
-                try:
-                    from handlers.admin import show_users_list, show_banned_users, start_ban_user, start_unban_user, show_admin_panel
-                    if text == "📋 Список користувачів":
-                        await show_users_list(update, context)
-                    elif text == "🚫 Заблокувати користувача":
-                        await start_ban_user(update, context)
-                    elif text == "✅ Розблокувати користувача":
-                        await start_unban_user(update, context)
-                    elif text == "📋 Список заблокованих":
-                        await show_banned_users(update, context)
-                    elif text == "🔙 Назад до адмін-панелі":
-                        await show_admin_panel(update, context)
-                except ImportError:
-                    await update.message.reply_text("❌ Адмін функції тимчасово недоступні")
-                return
-        
-        await update.message.reply_text(
-            "❌ Команда не розпізнана. Оберіть пункт з меню:",
-            reply_markup=get_main_menu(user.id)
-        )
-        
+async def universal_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Універсальний обробник повідомлень (вибір обробника - за таблицею маршрутів)"""
+    user = update.effective_user
+    try:
+        await message_router.dispatch(update, context)
     except Exception as e:
         logger.error(f"❌ Помилка в universal_handler: {e}", exc_info=True)
         await update.message.reply_text(
@@ -574,6 +531,9 @@ async def universal_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
             reply_markup=get_main_menu(user.id)
         )
 
+# Таблиця маршрутів будується при імпорті, тож дублікати виявляються одразу
+message_router = build_router()
+
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Обробник помилок"""
     try:
@@ -589,46 +549,151 @@ def setup_handlers(app):
     """Налаштування обробників"""
     logger.info("🔄 Налаштування обробників...")
     
+    # Повторно доставлені оновлення відкидаються раніше за всі інші обробники
+    from utils.idempotency import update_deduplicator
+    app.add_handler(TypeHandler(Update, update_deduplicator.check_update), group=-1)
+    
     # Основні команди
     app.add_handler(CommandHandler("start", start))
     app.add_handler(CommandHandler("debug", debug_bot))
     app.add_handler(CommandHandler("cancel", cancel_command))
     app.add_handler(CommandHandler("reset_state", reset_state))
     
-    # Основні обробники кнопок
-    app.add_handler(MessageHandler(filters.Regex('^(📝 Заповнити профіль|📝 Редагувати)$'), start_profile_creation))
-    app.add_handler(MessageHandler(filters.Regex('^👤 Мій профіль$'), show_my_profile))
-    app.add_handler(MessageHandler(filters.Regex('^💕 Пошук анкет$'), search_profiles))
-    app.add_handler(MessageHandler(filters.Regex('^🏙️ По місту$'), search_by_city))
-    app.add_handler(MessageHandler(filters.Regex('^➡️ Далі$'), show_next_profile))
-    app.add_handler(MessageHandler(filters.Regex('^❤️ Лайк$'), handle_like))
-    app.add_handler(MessageHandler(filters.Regex('^❤️ Взаємний лайк$'), handle_like_back))
-    app.add_handler(MessageHandler(filters.Regex('^🔙 Меню$'), lambda update, context: update.message.reply_text("👋 Повертаємось до меню", reply_markup=get_main_menu(update.effective_user.id))))
-    app.add_handler(MessageHandler(filters.Regex('^🏆 Топ$'), show_top_users))
-    app.add_handler(MessageHandler(filters.Regex('^💌 Мої матчі$'), show_matches))
-    app.add_handler(MessageHandler(filters.Regex('^❤️ Хто мене лайкнув$'), show_likes))
-    app.add_handler(MessageHandler(filters.Regex('^(👨 Топ чоловіків|👩 Топ жінок|🏆 Загальний топ)$'), handle_top_selection))
-    app.add_handler(MessageHandler(filters.Regex("^👨‍💼 Зв'язок з адміном$"), contact_admin))
-    
-    # Адмін обробники
-    app.add_handler(MessageHandler(filters.Regex('^(👑 Адмін панель|📊 Статистика|👥 Користувачі|📢 Розсилка|🔄 Оновити базу|🚫 Блокування)$'), handle_admin_actions))
-    
-    # Фото та універсальний обробник
-    app.add_handler(MessageHandler(filters.PHOTO, handle_main_photo))
-    app.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, universal_handler))
+    # Всі текстові повідомлення та фото - через таблицю маршрутів
+    app.add_handler(MessageHandler((filters.TEXT & ~filters.COMMAND) | filters.PHOTO, universal_handler))
+    logger.info(f"✅ Маршрути: {message_router.describe()}")
 
     app.add_error_handler(error_handler)
     logger.info("✅ Обробники налаштовано")
 
+def cleanup_retention():
+    """Очищення дублікатів і застарілих службових записів"""
+    db.cleanup_old_data()
+    db.cleanup_processed_updates(UPDATE_DEDUP_DB_RETENTION_HOURS)
+    db.cleanup_profile_views(PROFILE_VIEWS_RETENTION_DAYS)
+
+def register_health_checks():
+    """Перевірки для /health/deep (виконуються фоновим завданням, результат кешується)"""
+    from utils.health import health_monitor
+    from utils.metrics import loop_lag_monitor
+    from utils.scheduler import update_scheduler
+    from utils.admission import admission
+    
+    def check_database():
+        # Виконується в окремому потоці: зайняте довгим запитом з'єднання дає тайм-аут, а не блокує цикл
+        if not getattr(db, 'is_connected', lambda: True)():
+            return {'ok': False, 'error': "немає з'єднання з PostgreSQL"}
+        row = db.fetch_one_safe('SELECT 1 AS ok')
+        return {'ok': row is not None, **db.connection.get_stats()}
+    
+    def check_event_loop():
+        return {
+            'ok': loop_lag_monitor.last_lag <= HEALTH_MAX_LOOP_LAG,
+            'lag_ms': round(loop_lag_monitor.last_lag * 1000, 1),
+            'max_lag_ms': round(loop_lag_monitor.max_lag * 1000, 1),
+        }
+    
+    def check_update_queue():
+        return {
+            'ok': update_scheduler.pending <= update_scheduler.queue_limit * HEALTH_MAX_QUEUE_LOAD,
+            'pending': update_scheduler.pending,
+            'queue_limit': update_scheduler.queue_limit,
+            'webhook_in_flight': admission.in_flight,
+        }
+    
+    async def check_bot_api():
+        await application.bot.get_me()
+        return {}
+    
+    return (
+        health_monitor
+        .add_check('database', check_database, critical=True, offload=True)
+        .add_check('event_loop', check_event_loop)
+        .add_check('update_queue', check_update_queue)
+        .add_check('bot_api', check_bot_api)
+    )
+
+def register_jobs():
+    """Періодичні завдання бота (запускаються в циклі подій бота)"""
+    from utils.jobs import job_scheduler
+    from handlers.notifications import notification_system
+    from handlers.search import warm_top_cards
+    # Перевірка здоров'я: перший запуск одразу, щоб /health/deep швидко перестав відповідати 'starting'
+    job_scheduler.register('health', register_health_checks().refresh, HEALTH_CHECK_INTERVAL, jitter=0, initial_delay=0)
+    if KEEP_ALIVE_URL:
+        from keep_alive import keep_alive
+        job_scheduler.register('keep_alive', keep_alive.ping, KEEP_ALIVE_INTERVAL)
+    # Дайджести лише перекладаються в чергу сповіщень, тож виконуються прямо в циклі подій
+    job_scheduler.register('digests', notification_system.flush_digests, NOTIFY_FLUSH_INTERVAL)
+    job_scheduler.register('ratings', db.update_all_ratings, RATINGS_JOB_INTERVAL, offload=True, timeout=300)
+    job_scheduler.register('retention', cleanup_retention, RETENTION_JOB_INTERVAL, offload=True, timeout=600)
+    job_scheduler.register('cache_warmup', warm_top_cards, CACHE_WARMUP_INTERVAL, offload=True, initial_delay=30)
+    job_scheduler.register('explain_slow_queries', db.explain_slow_queries, DB_EXPLAIN_JOB_INTERVAL, offload=True, timeout=120)
+    return job_scheduler
+
+def register_metrics():
+    """Показники, що читаються під час запиту /metrics"""
+    from utils.metrics import metrics, loop_lag_monitor
+    from utils.scheduler import update_scheduler
+    from utils.admission import admission, profile_view_log
+    from utils.outbound import outbound_dispatcher
+    from utils.http_client import http_metrics
+    from handlers.notifications import notification_system
+    from utils.logs import log_pipeline
+    from utils.health import health_monitor
+    metrics.gauge('chatrix_webhook_in_flight', 'Запити до /webhook, що обробляються зараз', lambda: admission.in_flight)
+    metrics.gauge('chatrix_update_queue_pending', 'Оновлення в чергах планувальника', lambda: update_scheduler.pending)
+    metrics.gauge('chatrix_update_active', 'Оновлення, що обробляються зараз', lambda: update_scheduler.active)
+    metrics.gauge('chatrix_outbound_queue_depth', 'Вихідні запити, що чекають на ліміт Telegram',
+                  lambda: outbound_dispatcher.pending - outbound_dispatcher.in_flight)
+    metrics.gauge('chatrix_notification_queue_size', 'Сповіщення в черзі',
+                  lambda: notification_system.queue.qsize() if notification_system.queue else 0)
+    metrics.gauge('chatrix_profile_views_buffered', 'Перегляди анкет, ще не записані в БД',
+                  lambda: len(profile_view_log.buffer))
+    metrics.gauge('chatrix_http_pool_in_use', "Зайняті з'єднання пулу Bot API",
+                  lambda: dict(http_metrics.in_flight), ('pool',))
+    metrics.gauge('chatrix_http_pool_size', "Розмір пулу з'єднань Bot API",
+                  lambda: dict(http_metrics.pool_sizes), ('pool',))
+    metrics.gauge('chatrix_db_connected', "Чи є з'єднання з PostgreSQL",
+                  lambda: int(getattr(db, 'is_connected', lambda: True)()))
+    metrics.gauge('chatrix_event_loop_lag_seconds_last', 'Остання виміряна затримка циклу подій',
+                  lambda: loop_lag_monitor.last_lag)
+    metrics.gauge('chatrix_updates_processed_total', 'Оброблені оновлення',
+                  lambda: update_scheduler.stats['processed'], kind='counter')
+    metrics.gauge('chatrix_updates_failed_total', 'Оновлення, обробка яких завершилась помилкою',
+                  lambda: update_scheduler.stats['failed'], kind='counter')
+    metrics.gauge('chatrix_log_records_dropped_total', 'Записи логів, відкинуті через переповнену чергу',
+                  lambda: log_pipeline.get_stats().get('dropped', 0), kind='counter')
+    metrics.gauge('chatrix_log_records_sampled_out_total', 'Записи логів частих подій, пропущені семплюванням',
+                  lambda: log_pipeline.get_stats().get('sampled_out', 0), kind='counter')
+    metrics.gauge('chatrix_health_check_ok', "Результат останньої перевірки здоров'я (1 - пройдена)",
+                  lambda: {name: int(ok) for name, ok in health_monitor.get_stats()['checks'].items()}, ('check',))
+    metrics.gauge('chatrix_webhook_rejected_total', 'Відхилені запити до /webhook',
+                  lambda: {reason: admission.stats[reason] for reason in ('rejected_busy', 'rejected_queue_full', 'shed_low_priority')},
+                  ('reason',), kind='counter')
+    return loop_lag_monitor
+
 async def init_bot():
     """Ініціалізація бота"""
-    global application
+    global application, update_poller
     
     try:
         logger.info("🔄 Ініціалізація бота...")
         
         # Створюємо додаток
-        application = Application.builder().token(TOKEN).build()
+        from utils.outbound import outbound_dispatcher
+        from utils.http_client import build_requests
+        send_request, updates_request = build_requests()
+        application = (
+            Application.builder()
+            .token(TOKEN)
+            .base_url(BOT_API_BASE_URL)
+            .base_file_url(BOT_API_FILE_URL)
+            .request(send_request)
+            .get_updates_request(updates_request)
+            .rate_limiter(outbound_dispatcher)
+            .build()
+        )
         
         # Додаємо обробники
         setup_handlers(application)
@@ -636,6 +701,26 @@ async def init_bot():
         # Ініціалізуємо
         await application.initialize()
         
+        # Черга сповіщень і планувальник оновлень працюють в тому ж циклі подій, що й бот
+        from handlers.notifications import notification_system
+        from utils.scheduler import update_scheduler
+        from utils.admission import profile_view_log
+        notification_system.start(application.bot)
+        update_scheduler.start(application)
+        profile_view_log.start(on_written=notification_system.enqueue_view)
+        register_jobs().start()
+        register_metrics().start()
+        
+        if BOT_MODE == 'polling':
+            # Вебхук і getUpdates не працюють одночасно
+            from utils.polling import UpdatePoller
+            await application.bot.delete_webhook()
+            update_poller = UpdatePoller(application)
+            asyncio.get_running_loop().create_task(update_poller.run())
+            logger.info("✅ Бот успішно ініціалізовано!")
+            logger.info(f"🔄 Режим long polling ({BOT_API_BASE_URL})")
+            return True
+        
         # Встановлюємо вебхук
         await application.bot.set_webhook(WEBHOOK_URL)
         
@@ -655,14 +740,15 @@ def process_update_safe(update_data):
         
         # Використовуємо основний event loop бота
         if bot_loop and bot_loop.is_running():
-            # Створюємо завдання в існуючому event loop
+            # Ставимо оновлення в чергу користувача; чекаємо лише на місце в черзі,
+            # а не на обробку, тож Telegram отримує відповідь одразу
+            from utils.scheduler import update_scheduler
             future = asyncio.run_coroutine_threadsafe(
-                application.process_update(update), 
+                update_scheduler.submit(update), 
                 bot_loop
             )
-            # Чекаємо результат (але не блокуємо надто довго)
-            future.result(timeout=10)
-            logger.info("✅ Оновлення успішно оброблено в існуючому loop")
+            future.result(timeout=WEBHOOK_ENQUEUE_TIMEOUT)
+            logger.info("✅ Оновлення додано в чергу обробки")
             return True
         else:
             # Якщо event loop не працює, створюємо новий
@@ -687,11 +773,19 @@ def run_bot_in_thread():
     """Запуск бота в окремому потоці"""
     global bot_loop
     try:
+        from utils.startup import startup
+        
+        # Підключення та міграції - до вебхука, щоб обробники отримали готову схему
+        if not startup.run('database', getattr(db, 'get', lambda: db)):
+            return
+        if not startup.run('migrations', getattr(db, 'migrate', lambda: True)):
+            return
+        
         bot_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(bot_loop)
         
         # Ініціалізація бота
-        success = bot_loop.run_until_complete(init_bot())
+        success = startup.run('bot', lambda: bot_loop.run_until_complete(init_bot()))
         if not success:
             logger.error("❌ Не вдалося ініціалізувати бота")
             return
@@ -704,14 +798,86 @@ def run_bot_in_thread():
 
 # ==================== FLASK ROUTES ====================
 
+def require_admin_token(view):
+    """Доступ лише з токеном ADMIN_API_TOKEN у заголовку X-Admin-Token"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        token = request.headers.get('X-Admin-Token', '')
+        if not ADMIN_API_TOKEN or not hmac.compare_digest(token.encode(), ADMIN_API_TOKEN.encode()):
+            return jsonify({'error': 'forbidden'}), 403
+        return view(*args, **kwargs)
+    return wrapper
+
 @app.route('/')
 def home():
     return "🤖 Chatrix Bot is running!", 200
 
 @app.route('/health')
 def health():
+    """Процес живий (не залежить від бази даних та Telegram)"""
     return "OK", 200
 
+@app.route('/health/deep')
+def health_deep():
+    """Стан бази, циклу подій, черги оновлень та Bot API з кешу фонової перевірки (без запитів до БД)"""
+    from utils.health import health_monitor
+    body, status = health_monitor.response()
+    return app.response_class(body, status=status, mimetype='application/json')
+
+@app.route('/ready')
+def ready():
+    """Готовність приймати оновлення: база підключена, міграції виконані, бот ініціалізований"""
+    from utils.startup import startup
+    stats = startup.get_stats()
+    if getattr(db, 'is_connected', lambda: False)():
+        stats['database'] = db.connection.get_stats()
+    return jsonify(stats), 200 if stats['ready'] else 503
+
+@app.route('/outbound_stats')
+def outbound_stats():
+    """Метрики вихідних запитів до Telegram (черга, затримки, flood control)"""
+    from utils.outbound import outbound_dispatcher
+    from handlers.notifications import notification_system
+    from utils.http_client import http_metrics
+    from utils.idempotency import update_deduplicator
+    from utils.scheduler import update_scheduler
+    from utils.admission import admission, profile_view_log
+    from utils.jobs import job_scheduler
+    return jsonify({
+        **outbound_dispatcher.get_stats(),
+        'notifications': notification_system.get_stats(),
+        'http': http_metrics.get_stats(),
+        'polling': update_poller.get_stats() if update_poller else None,
+        'updates': {**update_deduplicator.get_stats(), **update_scheduler.get_stats()},
+        'admission': {**admission.get_stats(), 'profile_views': profile_view_log.get_stats()},
+        'jobs': job_scheduler.get_stats()
+    })
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Метрики у текстовому форматі Prometheus"""
+    from utils.metrics import metrics
+    return metrics.render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
+
+@app.route('/slow_queries')
+@require_admin_token
+def slow_queries():
+    """Найдорожчі SQL-запити: ?limit=20&order=total|avg|max|calls"""
+    from utils.query_stats import query_profiler
+    limit = request.args.get('limit', 20, type=int)
+    order = request.args.get('order', 'total')
+    return jsonify({
+        **query_profiler.get_stats(),
+        'top': query_profiler.top(limit, order)
+    })
+
+@app.route('/query_budgets')
+@require_admin_token
+def query_budgets():
+    """Оновлення, що перевищили бюджет SQL-запитів чи викликів Bot API (QUERY_BUDGET_MODE)"""
+    from utils.query_budget import query_budget
+    return jsonify(query_budget.get_stats())
+
 @app.route('/ping')
 def ping():
     return "pong", 200
@@ -728,11 +894,27 @@ def webhook():
         update_data = request.get_json()
         if update_data is None:
             return "Empty update data", 400
-            
-        logger.info(f"📨 Отримано вебхук від Telegram")
         
-        # Обробляємо оновлення безпечно
-        success = process_update_safe(update_data)
+        # Понад ліміт одночасних запитів - одразу 503, щоб Telegram повторив пізніше
+        from utils.admission import admission
+        if not admission.try_enter():
+            return "Too busy", 503, {'Retry-After': str(WEBHOOK_RETRY_AFTER)}
+        
+        try:
+            decision = admission.admit(update_data)
+            if decision:
+                status, reason = decision
+                if status == 200:
+                    return reason
+                logger.warning(f"⚠️ Вебхук відхилено ({status}): {reason}")
+                return reason, status, {'Retry-After': str(WEBHOOK_RETRY_AFTER)}
+            
+            logger.debug(f"📨 Отримано вебхук від Telegram")
+            
+            # Обробляємо оновлення безпечно
+            success = process_update_safe(update_data)
+        finally:
+            admission.leave()
         
         if success:
             return 'ok'
@@ -752,13 +934,12 @@ def debug_db():
         result = "<h1>Debug Database Structure</h1>"
         
         # Перевіряємо структуру таблиці profile_views
-        db.cursor.execute("""
+        columns = db.fetch_safe("""
             SELECT column_name, data_type 
             FROM information_schema.columns 
             WHERE table_name = 'profile_views' 
             ORDER BY ordinal_position
         """)
-        columns = db.cursor.fetchall()
         
         result += "<h2>Profile Views Table Columns:</h2>"
         for col in columns:
@@ -768,26 +949,19 @@ def debug_db():
     except Exception as e:
         return f"Error: {str(e)}"       
 
+def run_bot_call(coroutine, timeout=15):
+    """Виконання виклику Bot API з Flask-потоку через пул з'єднань бота"""
+    if not (application and bot_loop and bot_loop.is_running()):
+        coroutine.close()
+        raise RuntimeError("Бот ще не ініціалізований")
+    return asyncio.run_coroutine_threadsafe(coroutine, bot_loop).result(timeout=timeout)
+
 @app.route('/set_webhook')
 def set_webhook_route():
     """Встановити вебхук вручну"""
     try:
-        import urllib.request
-        import json
-        import urllib.parse
-        
-        webhook_url = "https://chatrix-bot-4m1p.onrender.com/webhook"
-        url = f"https://api.telegram.org/bot{TOKEN}/setWebhook"
-        
-        # Створюємо POST запит
-        data = urllib.parse.urlencode({"url": webhook_url}).encode()
-        req = urllib.request.Request(url, data=data, method='POST')
-        
-        # Виконуємо запит
-        with urllib.request.urlopen(req) as response:
-            result = json.loads(response.read().decode())
-            return jsonify({"status": "success", "result": result})
-            
+        result = run_bot_call(application.bot.set_webhook(WEBHOOK_URL))
+        return jsonify({"status": "success", "result": result})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -795,13 +969,8 @@ def set_webhook_route():
 def check_webhook():
     """Перевірити стан вебхука"""
     try:
-        import urllib.request
-        import json
-        
-        url = f"https://api.telegram.org/bot{TOKEN}/getWebhookInfo"
-        with urllib.request.urlopen(url) as response:
-            result = json.loads(response.read().decode())
-            return jsonify(result)
+        info = run_bot_call(application.bot.get_webhook_info())
+        return jsonify({"ok": True, "result": info.to_dict()})
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -818,53 +987,18 @@ def fix_views_table():
     except Exception as e:
         return f"❌ Помилка: {str(e)}"        
 
-# ==================== ДЕТАЛЬНА ВІДЛАДКА БАЗИ ДАНИХ ====================
-print("=" * 60)
-print("🔧 ДЕТАЛЬНА ІНФОРМАЦІЯ ПРО БАЗУ ДАНИХ")
-print("=" * 60)
-
-# Перевірка типу бази даних
-try:
-    if 'postgres' in str(type(db)).lower():
-        print("✅ АКТИВНА БАЗА: PostgreSQL")
-        db_type = "PostgreSQL"
-    else:
-        print("ℹ️ АКТИВНА БАЗА: SQLite")
-        db_type = "SQLite"
-
-    # Тест базових функцій
-    try:
-        user_count = db.get_users_count()
-        print(f"📊 Кількість користувачів: {user_count}")
-        
-        stats = db.get_statistics()
-        male, female, total_active, goals_stats = stats
-        print(f"📈 Статистика: {male} чол., {female} жін., {total_active} актив.")
-        
-        print("✅ Тест бази даних пройдено успішно")
-    except Exception as e:
-        print(f"❌ Помилка тесту бази даних: {e}")
-
-except Exception as e:
-    print(f"❌ Помилка перевірки бази даних: {e}")
-
-print("=" * 60)
-print("🚀 СЕРВЕР ГОТОВИЙ ДО РОБОТИ!")
-print(f"🌐 Порт: {PORT}")
-print("📱 Бот ініціалізується при першому запиті")
-print("=" * 60)
-
 # ==================== SERVER STARTUP ====================
 
 def main():
     """Запуск програми"""
     # Запускаємо бота в окремому потоці
+    # Бот (база, міграції, Telegram) запускається у фоні; /health відповідає одразу, /ready - після запуску
     bot_thread = threading.Thread(target=run_bot_in_thread, daemon=True)
     bot_thread.start()
     
-    # Чекаємо трохи на ініціалізацію бота
-    import time
-    time.sleep(3)
+    # SIGTERM при перезапуску чи деплої завершує процес штатно, щоб спрацювали обробники atexit
+    # (залишок буфера переглядів, черга логів)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
     
     # Запуск Flask сервера
     logger.info(f"🚀 Запуск сервера на порті {PORT}")
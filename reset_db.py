@@ -12,12 +12,12 @@ def reset_database():
     
     try:
         # Підключаємося до бази даних
-        conn = psycopg2.connect(database_url, sslmode='require')
+        conn = psycopg2.connect(database_url, sslmode=os.environ.get('DB_SSLMODE', 'require'))
         conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
         cursor = conn.cursor()
         
         # Видаляємо всі таблиці
-        tables = ['profile_views', 'matches', 'likes', 'photos', 'users']
+        tables = ['profile_views', 'matches', 'likes', 'photos', 'users', 'processed_updates', 'schema_migrations']
         for table in tables:
             try:
                 cursor.execute(f'DROP TABLE IF EXISTS {table} CASCADE')
@@ -0,0 +1,154 @@
+import asyncio
+import atexit
+import logging
+import threading
+from collections import deque
+from datetime import datetime
+
+from config import (
+    WEBHOOK_MAX_IN_FLIGHT, WEBHOOK_RETRY_AFTER, UPDATE_QUEUE_LIMIT, SHED_LOW_PRIORITY_AT,
+    VIEW_LOG_FLUSH_INTERVAL, VIEW_LOG_MAX_BUFFER
+)
+
+logger = logging.getLogger(__name__)
+
+# Типи оновлень, на які користувач чекає відповіді
+INTERACTIVE_UPDATE_FIELDS = ('message', 'callback_query', 'inline_query')
+
+
+def is_interactive(update_data):
+    """Чи є оновлення взаємодією користувача (інакше - службове, його можна відкинути)"""
+    return any(field in update_data for field in INTERACTIVE_UPDATE_FIELDS)
+
+
+class AdmissionController:
+    """Контроль прийому вебхуків: обмеження одночасних запитів та скидання навантаження
+
+    Працює у Flask-потоках, тому лічильник захищений блокуванням. Понад ліміт одночасних
+    запитів відповідь 503 повертається одразу, без очікування на місце в черзі.
+    """
+
+    def __init__(self, max_in_flight=WEBHOOK_MAX_IN_FLIGHT):
+        self.max_in_flight = max_in_flight
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self.stats = {'accepted': 0, 'rejected_busy': 0, 'rejected_queue_full': 0, 'shed_low_priority': 0}
+
+    def try_enter(self):
+        with self.lock:
+            if self.in_flight >= self.max_in_flight:
+                self.stats['rejected_busy'] += 1
+                return False
+            self.in_flight += 1
+            return True
+
+    def leave(self):
+        with self.lock:
+            self.in_flight -= 1
+
+    def load(self):
+        """Заповненість черг планувальника (0.0 - порожньо, 1.0 - повністю)"""
+        from utils.scheduler import update_scheduler
+        return update_scheduler.pending / UPDATE_QUEUE_LIMIT
+
+    def is_overloaded(self):
+        """Чи варто відкладати та відкидати малоцінну роботу"""
+        return self.load() >= SHED_LOW_PRIORITY_AT
+
+    def admit(self, update_data):
+        """Рішення щодо оновлення: None - прийняти, інакше (HTTP статус, причина)"""
+        load = self.load()
+        if load >= 1.0:
+            self.stats['rejected_queue_full'] += 1
+            return 429, "queue full"
+        if load >= SHED_LOW_PRIORITY_AT and not is_interactive(update_data):
+            # Службові оновлення підтверджуються (200), щоб Telegram їх не повторював
+            self.stats['shed_low_priority'] += 1
+            return 200, "shed"
+        self.stats['accepted'] += 1
+        return None
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'in_flight': self.in_flight,
+            'max_in_flight': self.max_in_flight,
+            'queue_load': round(self.load(), 3),
+            'retry_after': WEBHOOK_RETRY_AFTER,
+        }
+
+
+class DeferredViewLog:
+    """Буфер переглядів анкет: записується в БД пачками і лише коли бот не перевантажений
+
+    Запис виконується в окремому потоці, а on_written (сповіщення) викликається в циклі
+    подій лише для переглядів, що справді збереглися. При завершенні процесу залишок
+    буфера записується синхронно.
+    """
+
+    def __init__(self, max_buffer=VIEW_LOG_MAX_BUFFER):
+        self.buffer = deque(maxlen=max_buffer)
+        self.task = None
+        self.on_written = None
+        self.stats = {'recorded': 0, 'written': 0, 'dropped': 0, 'deferred_flushes': 0}
+
+    def record(self, viewer_id, viewed_id):
+        if len(self.buffer) == self.buffer.maxlen:
+            self.stats['dropped'] += 1
+        self.buffer.append((viewer_id, viewed_id, datetime.now()))
+        self.stats['recorded'] += 1
+
+    def start(self, on_written=None):
+        """Запуск у циклі подій бота; on_written(viewer_id, viewed_id) - для кожного записаного перегляду"""
+        self.on_written = on_written
+        self.task = asyncio.create_task(self._flush_loop())
+        atexit.register(self.stop)
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(VIEW_LOG_FLUSH_INTERVAL)
+            # Під навантаженням запис відкладається; буфер обмежений, найстаріші перегляди витісняються
+            if admission.is_overloaded():
+                self.stats['deferred_flushes'] += 1
+                continue
+            await self.flush()
+
+    def _write(self, views):
+        from database_postgres import db
+        try:
+            written = db.add_profile_views_batch(views)
+            self.stats['written'] += len(written)
+            return written
+        except Exception as e:
+            logger.error(f"❌ Помилка запису {len(views)} переглядів: {e}")
+            return []
+
+    def _take(self):
+        views = list(self.buffer)
+        self.buffer.clear()
+        return views
+
+    async def flush(self):
+        views = self._take()
+        if not views:
+            return 0
+        written = await asyncio.to_thread(self._write, views)
+        if self.on_written:
+            for viewer_id, viewed_id in written:
+                self.on_written(viewer_id, viewed_id)
+        return len(written)
+
+    def stop(self):
+        """Запис залишку буфера при завершенні процесу (сповіщення вже не надсилаються)"""
+        views = self._take()
+        if views:
+            written = self._write(views)
+            logger.info(f"✅ Перед завершенням записано переглядів: {len(written)} з {len(views)}")
+
+    def get_stats(self):
+        return {**self.stats, 'buffered': len(self.buffer)}
+
+
+# Глобальні екземпляри контролю навантаження
+admission = AdmissionController()
+profile_view_log = DeferredViewLog()
@@ -0,0 +1,231 @@
+import logging
+import math
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+EARTH_RADIUS_KM = 6371.0
+
+# Розмір комірки просторової сітки (в градусах)
+GRID_CELL_DEG = 1.0
+
+# Вбудований офлайн-довідник міст: (назва, широта, довгота, псевдоніми)
+CITIES = [
+    ("Київ", 50.4501, 30.5234, ("Киев", "Kyiv", "Kiev")),
+    ("Харків", 49.9935, 36.2304, ("Харьков", "Kharkiv", "Kharkov")),
+    ("Одеса", 46.4825, 30.7233, ("Одесса", "Odesa", "Odessa")),
+    ("Дніпро", 48.4647, 35.0462, ("Днепр", "Дніпропетровськ", "Днепропетровск", "Dnipro")),
+    ("Донецьк", 48.0159, 37.8028, ("Донецк", "Donetsk")),
+    ("Запоріжжя", 47.8388, 35.1396, ("Запорожье", "Zaporizhzhia", "Zaporozhye")),
+    ("Львів", 49.8397, 24.0297, ("Львов", "Lviv", "Lvov")),
+    ("Кривий Ріг", 47.9105, 33.3918, ("Кривой Рог", "Kryvyi Rih")),
+    ("Миколаїв", 46.9750, 31.9946, ("Николаев", "Mykolaiv")),
+    ("Маріуполь", 47.0971, 37.5434, ("Мариуполь", "Mariupol")),
+    ("Луганськ", 48.5740, 39.3078, ("Луганск", "Luhansk")),
+    ("Вінниця", 49.2331, 28.4682, ("Винница", "Vinnytsia")),
+    ("Макіївка", 48.0478, 37.9258, ("Макеевка", "Makiivka")),
+    ("Херсон", 46.6354, 32.6169, ("Kherson",)),
+    ("Полтава", 49.5883, 34.5514, ("Poltava",)),
+    ("Чернігів", 51.4982, 31.2893, ("Чернигов", "Chernihiv")),
+    ("Черкаси", 49.4444, 32.0598, ("Черкассы", "Cherkasy")),
+    ("Хмельницький", 49.4229, 26.9871, ("Хмельницкий", "Khmelnytskyi")),
+    ("Чернівці", 48.2921, 25.9358, ("Черновцы", "Chernivtsi")),
+    ("Житомир", 50.2547, 28.6587, ("Zhytomyr",)),
+    ("Суми", 50.9077, 34.7981, ("Сумы", "Sumy")),
+    ("Рівне", 50.6199, 26.2516, ("Ровно", "Rivne")),
+    ("Івано-Франківськ", 48.9226, 24.7111, ("Ивано-Франковск", "Франківськ", "Ivano-Frankivsk")),
+    ("Кропивницький", 48.5079, 32.2623, ("Кропивницкий", "Кіровоград", "Кировоград", "Kropyvnytskyi")),
+    ("Тернопіль", 49.5535, 25.5948, ("Тернополь", "Ternopil")),
+    ("Луцьк", 50.7472, 25.3254, ("Луцк", "Lutsk")),
+    ("Ужгород", 48.6208, 22.2879, ("Uzhhorod",)),
+    ("Кременчук", 49.0659, 33.4204, ("Кременчуг", "Kremenchuk")),
+    ("Біла Церква", 49.7968, 30.1311, ("Белая Церковь", "Bila Tserkva")),
+    ("Краматорськ", 48.7389, 37.5844, ("Краматорск", "Kramatorsk")),
+    ("Мелітополь", 46.8489, 35.3653, ("Мелитополь", "Melitopol")),
+    ("Слов'янськ", 48.8530, 37.6053, ("Славянск", "Sloviansk")),
+    ("Бердянськ", 46.7557, 36.7886, ("Бердянск", "Berdiansk")),
+    ("Нікополь", 47.5712, 34.3963, ("Никополь", "Nikopol")),
+    ("Кам'янське", 48.5110, 34.6021, ("Каменское", "Дніпродзержинськ", "Kamianske")),
+    ("Павлоград", 48.5350, 35.8700, ("Pavlohrad",)),
+    ("Олександрія", 48.6696, 33.1159, ("Александрия", "Oleksandriia")),
+    ("Умань", 48.7484, 30.2218, ("Uman",)),
+    ("Бровари", 50.5110, 30.7909, ("Бровары", "Brovary")),
+    ("Ірпінь", 50.5218, 30.2506, ("Ирпень", "Irpin")),
+    ("Буча", 50.5436, 30.2127, ("Bucha",)),
+    ("Бориспіль", 50.3527, 30.9550, ("Борисполь", "Boryspil")),
+    ("Фастів", 50.0760, 29.9177, ("Фастов", "Fastiv")),
+    ("Васильків", 50.1776, 30.3218, ("Васильков", "Vasylkiv")),
+    ("Обухів", 50.1072, 30.6211, ("Обухов", "Obukhiv")),
+    ("Вишневе", 50.3869, 30.3696, ("Вишневое", "Vyshneve")),
+    ("Славутич", 51.5223, 30.7204, ("Slavutych",)),
+    ("Мукачево", 48.4393, 22.7178, ("Мукачеве", "Mukachevo")),
+    ("Хуст", 48.1793, 23.2979, ("Khust",)),
+    ("Берегове", 48.2057, 22.6442, ("Берегово", "Berehove")),
+    ("Дрогобич", 49.3490, 23.5059, ("Дрогобыч", "Drohobych")),
+    ("Стрий", 49.2622, 23.8561, ("Стрый", "Stryi")),
+    ("Самбір", 49.5183, 23.1975, ("Самбор", "Sambir")),
+    ("Трускавець", 49.2784, 23.5064, ("Трускавец", "Truskavets")),
+    ("Шептицький", 50.3867, 24.2289, ("Червоноград", "Sheptytskyi")),
+    ("Калуш", 49.0110, 24.3730, ("Kalush",)),
+    ("Коломия", 48.5313, 25.0364, ("Коломыя", "Kolomyia")),
+    ("Яремче", 48.4589, 24.5575, ("Yaremche",)),
+    ("Кам'янець-Подільський", 48.6845, 26.5856, ("Каменец-Подольский", "Kamianets-Podilskyi")),
+    ("Шепетівка", 50.1822, 27.0632, ("Шепетовка", "Shepetivka")),
+    ("Нетішин", 50.3405, 26.6424, ("Нетешин", "Netishyn")),
+    ("Бердичів", 49.8993, 28.6025, ("Бердичев", "Berdychiv")),
+    ("Коростень", 50.9510, 28.6385, ("Korosten",)),
+    ("Звягель", 50.5947, 27.6185, ("Новоград-Волинський", "Новоград-Волынский", "Zviahel")),
+    ("Ковель", 51.2150, 24.7083, ("Kovel",)),
+    ("Нововолинськ", 50.7262, 24.1616, ("Нововолынск", "Novovolynsk")),
+    ("Вараш", 51.3505, 25.8480, ("Кузнецовськ", "Varash")),
+    ("Дубно", 50.4176, 25.7352, ("Dubno",)),
+    ("Кременець", 50.1035, 25.7252, ("Кременец", "Kremenets")),
+    ("Чортків", 49.0169, 25.7980, ("Чортков", "Chortkiv")),
+    ("Жмеринка", 49.0378, 28.1125, ("Zhmerynka",)),
+    ("Могилів-Подільський", 48.4468, 27.7988, ("Могилев-Подольский", "Mohyliv-Podilskyi")),
+    ("Шостка", 51.8632, 33.4698, ("Shostka",)),
+    ("Конотоп", 51.2403, 33.2026, ("Konotop",)),
+    ("Ромни", 50.7515, 33.4747, ("Ромны", "Romny")),
+    ("Охтирка", 50.3104, 34.8988, ("Ахтырка", "Okhtyrka")),
+    ("Ніжин", 51.0480, 31.8869, ("Нежин", "Nizhyn")),
+    ("Прилуки", 50.5935, 32.3876, ("Pryluky",)),
+    ("Лубни", 50.0186, 32.9869, ("Лубны", "Lubny")),
+    ("Миргород", 49.9646, 33.6086, ("Myrhorod",)),
+    ("Сміла", 49.2224, 31.8872, ("Смела", "Smila")),
+    ("Ізмаїл", 45.3516, 28.8365, ("Измаил", "Izmail")),
+    ("Білгород-Дністровський", 46.1871, 30.3410, ("Белгород-Днестровский", "Bilhorod-Dnistrovskyi")),
+    ("Чорноморськ", 46.3014, 30.6556, ("Черноморск", "Іллічівськ", "Chornomorsk")),
+    ("Південне", 46.6222, 31.1013, ("Южне", "Южный", "Pivdenne")),
+    ("Первомайськ", 48.0442, 30.8503, ("Первомайск", "Pervomaisk")),
+    ("Вознесенськ", 47.5679, 31.3339, ("Вознесенск", "Voznesensk")),
+    ("Нова Каховка", 46.7545, 33.3487, ("Новая Каховка", "Nova Kakhovka")),
+    ("Енергодар", 47.4987, 34.6561, ("Энергодар", "Enerhodar")),
+    ("Жовті Води", 48.3456, 33.5020, ("Желтые Воды", "Zhovti Vody")),
+    ("Ізюм", 49.2097, 37.2566, ("Изюм", "Izium")),
+    ("Лозова", 48.8892, 36.3174, ("Лозовая", "Lozova")),
+    ("Чугуїв", 49.8359, 36.6880, ("Чугуев", "Chuhuiv")),
+    ("Куп'янськ", 49.7106, 37.6156, ("Купянск", "Kupiansk")),
+    ("Сєвєродонецьк", 48.9482, 38.4937, ("Северодонецк", "Sievierodonetsk")),
+    ("Лисичанськ", 48.9047, 38.4427, ("Лисичанск", "Lysychansk")),
+    ("Алчевськ", 48.4672, 38.8026, ("Алчевск", "Alchevsk")),
+    ("Бахмут", 48.5956, 38.0003, ("Артемівськ", "Артемовск", "Bakhmut")),
+    ("Покровськ", 48.2820, 37.1761, ("Покровск", "Красноармійськ", "Pokrovsk")),
+    ("Костянтинівка", 48.5277, 37.7069, ("Константиновка", "Kostiantynivka")),
+    ("Дружківка", 48.6300, 37.5500, ("Дружковка", "Druzhkivka")),
+    ("Сімферополь", 44.9521, 34.1024, ("Симферополь", "Simferopol")),
+    ("Севастополь", 44.6166, 33.5254, ("Sevastopol",)),
+    ("Ялта", 44.4952, 34.1663, ("Yalta",)),
+    ("Керч", 45.3562, 36.4674, ("Керчь", "Kerch")),
+    ("Євпаторія", 45.1904, 33.3669, ("Евпатория", "Yevpatoriia")),
+    ("Феодосія", 45.0319, 35.3824, ("Феодосия", "Feodosiia")),
+]
+
+_APOSTROPHES = re.compile(r"[’ʼ`´‘]")
+_PREFIXES = re.compile(r"^(м\.|г\.|місто|город|city)\s*", re.IGNORECASE)
+# Межа слова після назви міста в довшому тексті ("Київ, Україна", "Львів центр")
+_WORD_BOUNDARY = re.compile(r"[,\s-]")
+
+
+def normalize_city_name(name):
+    """Нормалізація назви міста для порівняння"""
+    if not name:
+        return ""
+    name = name.replace('🏙️', '').strip().lower()
+    name = _APOSTROPHES.sub("'", name).replace('ё', 'е')
+    name = _PREFIXES.sub('', name)
+    return re.sub(r"\s+", ' ', name).strip(" .,")
+
+
+class Gazetteer:
+    """Офлайн-довідник міст з просторовою сіткою та векторизованим пошуком"""
+
+    def __init__(self, cities=CITIES, cell_deg=GRID_CELL_DEG):
+        self.names = [city[0] for city in cities]
+        self.aliases = [(city[0],) + tuple(city[3]) for city in cities]
+        self.lat = np.radians(np.array([city[1] for city in cities], dtype=np.float64))
+        self.lon = np.radians(np.array([city[2] for city in cities], dtype=np.float64))
+        self.cos_lat = np.cos(self.lat)
+        self.cell_deg = cell_deg
+
+        # Індекс псевдонімів: нормалізована назва -> номер міста
+        self.alias_index = {}
+        for i, names in enumerate(self.aliases):
+            for alias in names:
+                self.alias_index.setdefault(normalize_city_name(alias), i)
+
+        # Просторова сітка: (рядок, стовпець) -> масив номерів міст
+        grid = {}
+        for i, (_, lat, lon, _) in enumerate(cities):
+            grid.setdefault(self._cell(lat, lon), []).append(i)
+        self.grid = {cell: np.array(ids, dtype=np.intp) for cell, ids in grid.items()}
+
+    def _cell(self, lat, lon):
+        return int(math.floor(lat / self.cell_deg)), int(math.floor(lon / self.cell_deg))
+
+    def resolve(self, name):
+        """Пошук міста за назвою або псевдонімом, повертає номер міста або None"""
+        key = normalize_city_name(name)
+        if not key:
+            return None
+        index = self.alias_index.get(key)
+        if index is not None:
+            return index
+        # Частковий збіг ("Київ, Україна", "Львів центр"): назва - цілі слова на початку тексту,
+        # найдовша з можливих, тож "Бучач" не стає Бучею, а "Кривий Ріг" не обрізається
+        for match in reversed(list(_WORD_BOUNDARY.finditer(key))):
+            index = self.alias_index.get(key[:match.start()].strip(" .,"))
+            if index is not None:
+                return index
+        return None
+
+    def city_aliases(self, index):
+        """Всі назви міста (для порівняння з полем city в анкетах)"""
+        return self.aliases[index]
+
+    def _candidates(self, lat_deg, lon_deg, radius_km):
+        """Номери міст з комірок сітки, що перекривають коло пошуку"""
+        d_lat = radius_km / 111.0
+        d_lon = radius_km / max(111.0 * math.cos(math.radians(lat_deg)), 1e-6)
+        row_min, col_min = self._cell(lat_deg - d_lat, lon_deg - d_lon)
+        row_max, col_max = self._cell(lat_deg + d_lat, lon_deg + d_lon)
+
+        cells = [
+            self.grid[(row, col)]
+            for row in range(row_min, row_max + 1)
+            for col in range(col_min, col_max + 1)
+            if (row, col) in self.grid
+        ]
+        if not cells:
+            return np.empty(0, dtype=np.intp)
+        return np.concatenate(cells)
+
+    def distances_from(self, index, candidates=None):
+        """Векторизована відстань (гаверсинус, км) від міста до кандидатів"""
+        if candidates is None:
+            candidates = np.arange(len(self.names))
+        lat1, lon1 = self.lat[index], self.lon[index]
+        d_lat = self.lat[candidates] - lat1
+        d_lon = self.lon[candidates] - lon1
+        a = np.sin(d_lat / 2) ** 2 + math.cos(lat1) * self.cos_lat[candidates] * np.sin(d_lon / 2) ** 2
+        return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+    def nearby(self, index, radius_km):
+        """Міста в радіусі radius_km від міста index, відсортовані за відстанню"""
+        lat_deg = math.degrees(self.lat[index])
+        lon_deg = math.degrees(self.lon[index])
+        candidates = self._candidates(lat_deg, lon_deg, radius_km)
+        if candidates.size == 0:
+            return []
+
+        distances = self.distances_from(index, candidates)
+        mask = distances <= radius_km
+        found = candidates[mask]
+        found_distances = distances[mask]
+        order = np.argsort(found_distances, kind='stable')
+        return [(int(found[i]), float(found_distances[i])) for i in order]
+
+
+# Глобальний екземпляр довідника
+gazetteer = Gazetteer()
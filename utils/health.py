@@ -0,0 +1,122 @@
+import asyncio
+import json
+import logging
+import time
+
+from config import HEALTH_CHECK_TIMEOUT, HEALTH_STALE_AFTER
+
+logger = logging.getLogger(__name__)
+
+# Статус -> HTTP-код відповіді /health/deep
+STATUS_CODES = {'ok': 200, 'degraded': 200, 'unhealthy': 503, 'starting': 503, 'stale': 503}
+
+
+class HealthCheck:
+    """Одна перевірка: функція повертає словник з деталями ({'ok': False, ...} - перевірка не пройдена)"""
+
+    def __init__(self, name, func, critical=False, offload=False):
+        self.name = name
+        self.func = func
+        self.critical = critical
+        self.offload = offload
+        self.pending = None
+
+    async def run(self, timeout):
+        started = time.perf_counter()
+        try:
+            if self.pending is not None:
+                # Попередній виклик у потоці ще не завершився (наприклад, БД зайнята довгим запитом)
+                return {'ok': False, 'error': 'попередня перевірка ще виконується'}
+            if self.offload:
+                self.pending = asyncio.ensure_future(asyncio.to_thread(self.func))
+                self.pending.add_done_callback(self._clear_pending)
+                details = await asyncio.wait_for(asyncio.shield(self.pending), timeout)
+            elif asyncio.iscoroutinefunction(self.func):
+                details = await asyncio.wait_for(self.func(), timeout)
+            else:
+                details = self.func()
+        except asyncio.TimeoutError:
+            details = {'ok': False, 'error': f"немає відповіді за {timeout} с"}
+        except Exception as e:
+            details = {'ok': False, 'error': str(e)[:200]}
+        result = {'ok': True, **(details or {})}
+        result['ms'] = round((time.perf_counter() - started) * 1000, 1)
+        return result
+
+    def _clear_pending(self, future):
+        self.pending = None
+
+
+class HealthMonitor:
+    """Глибока перевірка здоров'я з кешованим результатом
+
+    Перевірки (БД, цикл подій, черга оновлень, Bot API) виконуються фоновим завданням
+    планувальника, а /health/deep лише віддає готовий JSON, тож проби хостингу та
+    keep-alive ніколи не звертаються до бази напряму. Невдала критична перевірка дає
+    статус unhealthy (503), некритична - degraded (200). Якщо результат не оновлювався
+    довше за HEALTH_STALE_AFTER (завис цикл подій бота), відповідь - stale (503).
+    """
+
+    def __init__(self, timeout=HEALTH_CHECK_TIMEOUT, stale_after=HEALTH_STALE_AFTER):
+        self.timeout = timeout
+        self.stale_after = stale_after
+        self.checks = {}
+        self.results = {}
+        self.stats = {'refreshes': 0, 'failures': 0}
+        self.snapshot = self._build_snapshot('starting', 0.0)
+
+    def add_check(self, name, func, critical=False, offload=False):
+        if name in self.checks:
+            raise ValueError(f"Перевірку '{name}' вже зареєстровано")
+        self.checks[name] = HealthCheck(name, func, critical, offload)
+        return self
+
+    def _build_snapshot(self, status, checked_at):
+        body = json.dumps({
+            'status': status,
+            'checked_at': time.time() if checked_at else None,
+            'checks': self.results,
+        }, ensure_ascii=False)
+        return status, body, checked_at
+
+    async def refresh(self):
+        """Виконання всіх перевірок одночасно та оновлення кешованого результату"""
+        checks = list(self.checks.values())
+        results = await asyncio.gather(*(check.run(self.timeout) for check in checks))
+        self.results = dict(zip((check.name for check in checks), results))
+
+        failed = [check for check, result in zip(checks, results) if not result['ok']]
+        if any(check.critical for check in failed):
+            status = 'unhealthy'
+        elif failed:
+            status = 'degraded'
+        else:
+            status = 'ok'
+
+        previous = self.snapshot[0]
+        self.snapshot = self._build_snapshot(status, time.monotonic())
+        self.stats['refreshes'] += 1
+        if failed:
+            self.stats['failures'] += 1
+        if status != previous and (previous != 'starting' or status != 'ok'):
+            names = ', '.join(check.name for check in failed) or '-'
+            logger.warning(f"⚠️ Стан здоров'я: {previous} -> {status} (не пройдено: {names})")
+
+    def response(self):
+        """(JSON, HTTP-код) з кешу, без жодних запитів"""
+        status, body, checked_at = self.snapshot
+        if checked_at and time.monotonic() - checked_at > self.stale_after:
+            status = 'stale'
+            body = body.replace('"status": "', '"status": "stale", "previous": "', 1)
+        return body, STATUS_CODES[status]
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'status': self.snapshot[0],
+            'checks': {name: result['ok'] for name, result in self.results.items()},
+        }
+
+
+# Глобальний екземпляр перевірки здоров'я
+health_monitor = HealthMonitor()
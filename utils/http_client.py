@@ -0,0 +1,126 @@
+import bisect
+import logging
+import time
+
+import httpx
+from telegram.request import HTTPXRequest
+
+from config import (
+    TELEGRAM_SEND_POOL_SIZE, TELEGRAM_UPDATES_POOL_SIZE, TELEGRAM_CONNECT_TIMEOUT,
+    TELEGRAM_READ_TIMEOUT, TELEGRAM_WRITE_TIMEOUT, TELEGRAM_POOL_TIMEOUT, TELEGRAM_KEEPALIVE_EXPIRY
+)
+from utils.metrics import BOT_API_SECONDS
+from utils.query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+# Межі кошиків гістограми затримок, с (останній кошик - все, що довше)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class EndpointMetrics:
+    """Гістограма затримок та лічильник помилок одного методу Bot API"""
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+        self.buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+
+    def observe(self, seconds, failed):
+        self.count += 1
+        self.total_seconds += seconds
+        self.buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        if failed:
+            self.errors += 1
+
+    def as_dict(self):
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS] + [f">{LATENCY_BUCKETS[-1]}"]
+        return {
+            'count': self.count,
+            'errors': self.errors,
+            'avg_ms': round(self.total_seconds / self.count * 1000, 1) if self.count else 0.0,
+            'histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class HttpMetrics:
+    """Метрики HTTP-запитів до Telegram, згруповані за пулом та методом"""
+
+    def __init__(self):
+        self.endpoints = {}
+        self.pool_sizes = {}
+        self.in_flight = {}
+
+    def register_pool(self, pool, size):
+        self.pool_sizes[pool] = size
+        self.in_flight.setdefault(pool, 0)
+
+    def observe(self, pool, endpoint, seconds, failed):
+        key = (pool, endpoint)
+        metrics = self.endpoints.get(key)
+        if metrics is None:
+            metrics = self.endpoints[key] = EndpointMetrics()
+        metrics.observe(seconds, failed)
+        BOT_API_SECONDS.observe(key, seconds, failed)
+
+    def get_stats(self):
+        stats = {}
+        for (pool, endpoint), metrics in sorted(self.endpoints.items()):
+            stats.setdefault(pool, {})[endpoint] = metrics.as_dict()
+        return stats
+
+
+class InstrumentedRequest(HTTPXRequest):
+    """HTTPXRequest з keep-alive пулом та вимірюванням кожного запиту до Bot API"""
+
+    def __init__(self, pool_name, connection_pool_size, read_timeout=TELEGRAM_READ_TIMEOUT):
+        super().__init__(
+            connection_pool_size=connection_pool_size,
+            read_timeout=read_timeout,
+            write_timeout=TELEGRAM_WRITE_TIMEOUT,
+            connect_timeout=TELEGRAM_CONNECT_TIMEOUT,
+            pool_timeout=TELEGRAM_POOL_TIMEOUT,
+        )
+        self.pool_name = pool_name
+        http_metrics.register_pool(pool_name, connection_pool_size)
+        # Стандартний HTTPXRequest не дає задати час життя keep-alive з'єднань
+        self._client_kwargs['limits'] = httpx.Limits(
+            max_connections=connection_pool_size,
+            max_keepalive_connections=connection_pool_size,
+            keepalive_expiry=TELEGRAM_KEEPALIVE_EXPIRY,
+        )
+        self._client = self._build_client()
+
+    async def do_request(self, url, method, *args, **kwargs):
+        endpoint = url.rsplit('/', 1)[-1]
+        query_budget.record_api(endpoint)
+        started = time.monotonic()
+        failed = True
+        http_metrics.in_flight[self.pool_name] += 1
+        try:
+            code, payload = await super().do_request(url, method, *args, **kwargs)
+            failed = code >= 400
+            return code, payload
+        finally:
+            http_metrics.in_flight[self.pool_name] -= 1
+            http_metrics.observe(self.pool_name, endpoint, time.monotonic() - started, failed)
+
+
+def build_requests():
+    """Окремі пули для відправки повідомлень та для getUpdates
+
+    getUpdates тримає з'єднання відкритим до кінця long polling, тому не повинен
+    займати з'єднання, потрібні обробникам і розсилкам.
+    """
+    send_request = InstrumentedRequest('send', TELEGRAM_SEND_POOL_SIZE)
+    updates_request = InstrumentedRequest('updates', TELEGRAM_UPDATES_POOL_SIZE)
+    logger.info(
+        f"✅ HTTP клієнт Telegram: пул відправки {TELEGRAM_SEND_POOL_SIZE}, "
+        f"пул оновлень {TELEGRAM_UPDATES_POOL_SIZE}"
+    )
+    return send_request, updates_request
+
+
+# Глобальний екземпляр метрик HTTP-запитів
+http_metrics = HttpMetrics()
@@ -0,0 +1,65 @@
+import logging
+from collections import deque
+
+from telegram import Update
+from telegram.ext import ApplicationHandlerStop, ContextTypes
+
+from config import UPDATE_DEDUP_WINDOW, UPDATE_DEDUP_USE_DB, UPDATE_DEDUP_DB_RETENTION_HOURS
+
+logger = logging.getLogger(__name__)
+
+# Раз на скільки нових оновлень очищати старі записи в БД
+DB_CLEANUP_EVERY = 1000
+
+
+class UpdateDeduplicator:
+    """Відкидає повторно доставлені оновлення Telegram ще до обробників
+
+    Пам'ятає останні window значень update_id. З use_db=True оновлення додатково
+    «захоплюється» в таблиці processed_updates, тож дублікат не обробить і інший екземпляр бота.
+    """
+
+    def __init__(self, window=UPDATE_DEDUP_WINDOW, use_db=UPDATE_DEDUP_USE_DB):
+        self.window = window
+        self.use_db = use_db
+        self.recent = deque()
+        self.recent_ids = set()
+        self.stats = {'processed': 0, 'duplicates': 0}
+
+    def remember(self, update_id):
+        self.recent.append(update_id)
+        self.recent_ids.add(update_id)
+        if len(self.recent) > self.window:
+            self.recent_ids.discard(self.recent.popleft())
+
+    def is_duplicate(self, update_id):
+        """True, якщо оновлення вже оброблялося (інакше воно запам'ятовується)"""
+        if update_id in self.recent_ids:
+            self.stats['duplicates'] += 1
+            return True
+
+        if self.use_db:
+            from database_postgres import db
+            if not db.claim_update(update_id):
+                self.remember(update_id)
+                self.stats['duplicates'] += 1
+                return True
+            if self.stats['processed'] % DB_CLEANUP_EVERY == 0:
+                db.cleanup_processed_updates(UPDATE_DEDUP_DB_RETENTION_HOURS)
+
+        self.remember(update_id)
+        self.stats['processed'] += 1
+        return False
+
+    async def check_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обробник групи -1: зупиняє обробку дубліката до решти обробників"""
+        if self.is_duplicate(update.update_id):
+            logger.warning(f"⚠️ Повторна доставка оновлення {update.update_id}, пропускаємо")
+            raise ApplicationHandlerStop
+
+    def get_stats(self):
+        return {**self.stats, 'window': len(self.recent)}
+
+
+# Глобальний екземпляр захисту від повторних оновлень
+update_deduplicator = UpdateDeduplicator()
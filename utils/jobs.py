@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import JOB_WORKERS, JOB_DEFAULT_JITTER
+
+logger = logging.getLogger(__name__)
+
+
+class Job:
+    """Періодичне завдання та його статистика"""
+
+    def __init__(self, name, func, interval, jitter=JOB_DEFAULT_JITTER, offload=False,
+                 timeout=None, initial_delay=None):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.jitter = jitter
+        self.offload = offload
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.running = None
+        self.worker = None
+        self.stats = {
+            'runs': 0, 'failures': 0, 'timeouts': 0, 'skipped_overlap': 0,
+            'last_duration': 0.0, 'max_duration': 0.0, 'total_duration': 0.0,
+            'last_run': None, 'last_error': None,
+        }
+
+    def next_delay(self):
+        """Інтервал з випадковим розкидом (частка jitter від інтервалу в обидва боки)"""
+        spread = self.interval * self.jitter
+        return max(0.0, self.interval + random.uniform(-spread, spread))
+
+    def get_stats(self):
+        runs = self.stats['runs']
+        return {
+            **self.stats,
+            'interval': self.interval,
+            'offload': self.offload,
+            'running': self.running is not None,
+            'avg_duration': round(self.stats['total_duration'] / runs, 3) if runs else 0.0,
+        }
+
+
+class JobScheduler:
+    """Планувальник періодичних завдань у циклі подій бота
+
+    Корутини виконуються в циклі подій, звичайні функції з offload=True - у пулі потоків,
+    щоб запити до БД та обчислення не блокували обробку повідомлень. Запуск, що
+    збігся з попереднім незавершеним, пропускається.
+    """
+
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self.jobs = {}
+        self.tasks = []
+        self.executor = None
+
+    def register(self, name, func, interval, **options):
+        if name in self.jobs:
+            raise ValueError(f"Завдання '{name}' вже зареєстровано")
+        self.jobs[name] = Job(name, func, interval, **options)
+        return self.jobs[name]
+
+    def start(self):
+        """Запуск усіх зареєстрованих завдань (викликається в циклі подій бота)"""
+        self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='job')
+        self.tasks = [asyncio.create_task(self._loop(job)) for job in self.jobs.values()]
+        logger.info(f"✅ Планувальник завдань: {', '.join(self.jobs) or 'немає завдань'}")
+
+    async def _loop(self, job):
+        delay = job.initial_delay if job.initial_delay is not None else job.next_delay()
+        while True:
+            await asyncio.sleep(delay)
+            delay = job.next_delay()
+            if job.running is not None:
+                job.stats['skipped_overlap'] += 1
+                logger.warning(f"⚠️ Завдання '{job.name}' ще виконується, запуск пропущено")
+                continue
+            # Окреме завдання, щоб довгий запуск не зсував розклад наступних
+            job.running = asyncio.create_task(self._run(job))
+
+    async def _call(self, job):
+        if asyncio.iscoroutinefunction(job.func):
+            return await job.func()
+        if job.offload:
+            # Майбутнє пулу (а не обгортка asyncio) завершується лише разом із самою функцією
+            job.worker = self.executor.submit(job.func)
+            return await asyncio.wrap_future(job.worker)
+        return job.func()
+
+    async def _run(self, job):
+        started = time.monotonic()
+        try:
+            if job.timeout:
+                return await asyncio.wait_for(self._call(job), job.timeout)
+            return await self._call(job)
+        except asyncio.TimeoutError:
+            # Функція в пулі потоків не переривається, але розклад іде далі
+            job.stats['timeouts'] += 1
+            job.stats['last_error'] = 'timeout'
+            logger.error(f"❌ Завдання '{job.name}' перевищило {job.timeout} с")
+        except Exception as e:
+            job.stats['failures'] += 1
+            job.stats['last_error'] = str(e)
+            logger.error(f"❌ Помилка завдання '{job.name}': {e}")
+        finally:
+            duration = time.monotonic() - started
+            job.stats['runs'] += 1
+            job.stats['last_duration'] = round(duration, 3)
+            job.stats['max_duration'] = round(max(job.stats['max_duration'], duration), 3)
+            job.stats['total_duration'] += duration
+            job.stats['last_run'] = time.time()
+            worker = job.worker
+            if worker is not None and not worker.done():
+                # Після таймауту функція в пулі ще працює: наступний запуск - лише після її завершення
+                loop = asyncio.get_running_loop()
+                worker.add_done_callback(lambda _: self._finish_threadsafe(loop, job))
+            else:
+                self._finish(job)
+
+    def _finish_threadsafe(self, loop, job):
+        try:
+            loop.call_soon_threadsafe(self._finish, job)
+        except RuntimeError:
+            # Цикл подій уже закрито (завершення процесу)
+            pass
+
+    def _finish(self, job):
+        job.worker = None
+        job.running = None
+
+    async def run_now(self, name):
+        """Позачерговий запуск (або очікування запуску, що вже виконується)"""
+        job = self.jobs[name]
+        if job.running is None:
+            job.running = asyncio.create_task(self._run(job))
+        return await asyncio.shield(job.running)
+
+    def get_stats(self):
+        return {name: job.get_stats() for name, job in self.jobs.items()}
+
+
+# Глобальний екземпляр планувальника завдань
+job_scheduler = JobScheduler()
@@ -0,0 +1,160 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+from datetime import datetime, timezone
+
+from config import LOG_LEVEL, LOG_FORMAT, LOG_QUEUE_SIZE, LOG_SAMPLE_RATES
+
+# Префікс логерів подій, що семплюються (events.like, events.view, ...)
+EVENT_LOGGER_PREFIX = 'events.'
+
+# Стандартні атрибути LogRecord (решта - додаткові поля з extra=...)
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+_exception_formatter = logging.Formatter()
+
+
+def event_logger(category):
+    """Логер частих подій категорії category (частка записів задається в LOG_SAMPLE_RATES)"""
+    return logging.getLogger(EVENT_LOGGER_PREFIX + category)
+
+
+def record_category(record):
+    category = getattr(record, 'category', None)
+    if category:
+        return category
+    if record.name.startswith(EVENT_LOGGER_PREFIX):
+        return record.name[len(EVENT_LOGGER_PREFIX):]
+    return None
+
+
+class SamplingFilter(logging.Filter):
+    """Пропускає лише частку записів INFO/DEBUG для кожної категорії; попередження та помилки - завжди"""
+
+    def __init__(self, rates=LOG_SAMPLE_RATES):
+        super().__init__()
+        self.rates = rates
+        self.stats = {'sampled_out': 0}
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self.rates.get(record_category(record), 1.0)
+        if rate >= 1.0 or random.random() < rate:
+            return True
+        self.stats['sampled_out'] += 1
+        return False
+
+
+class JsonFormatter(logging.Formatter):
+    """Один JSON-об'єкт на рядок: час, рівень, логер, повідомлення та поля з extra"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        category = record_category(record)
+        if category:
+            entry['category'] = category
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES and key not in entry:
+                entry[key] = value
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry['exc'] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class BoundedQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler з обмеженою чергою: при переповненні INFO/DEBUG відкидаються, а не блокують обробник"""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.stats = {'dropped': 0}
+
+    def prepare(self, record):
+        """Повідомлення форматується тут (лише для записів, що пройшли рівень і семплювання), traceback - окремо"""
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _exception_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if record.levelno >= logging.WARNING:
+                # Попередження та помилки не втрачаються - краще почекати на місце
+                self.queue.put(record)
+            else:
+                self.stats['dropped'] += 1
+
+
+class LogPipeline:
+    """Асинхронний запис логів: обробники лише кладуть запис у чергу, у потік виводу пише окремий потік"""
+
+    def __init__(self):
+        self.handler = None
+        self.listener = None
+        self.sampling = None
+
+    def setup(self, level=LOG_LEVEL, fmt=LOG_FORMAT, queue_size=LOG_QUEUE_SIZE):
+        if self.listener:
+            return self
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter(TEXT_FORMAT))
+
+        self.sampling = SamplingFilter()
+        self.handler = BoundedQueueHandler(queue.Queue(queue_size))
+        self.handler.addFilter(self.sampling)
+        self.listener = logging.handlers.QueueListener(self.handler.queue, output, respect_handler_level=True)
+
+        root = logging.getLogger()
+        for existing in list(root.handlers):
+            root.removeHandler(existing)
+        root.addHandler(self.handler)
+        root.setLevel(level)
+        # httpx логує кожен запит до Bot API на рівні INFO
+        logging.getLogger('httpx').setLevel(logging.WARNING)
+
+        self.listener.start()
+        atexit.register(self.stop)
+        return self
+
+    def stop(self):
+        """Дописати записи, що залишилися в черзі"""
+        if self.listener:
+            self.listener.stop()
+            self.listener = None
+
+    def get_stats(self):
+        if not self.handler:
+            return {}
+        return {
+            **self.handler.stats,
+            **self.sampling.stats,
+            'queued': self.handler.queue.qsize(),
+        }
+
+
+# Глобальний екземпляр конвеєра логів
+log_pipeline = LogPipeline()
+
+
+def setup_logging():
+    """Налаштування логування застосунку (викликається один раз при старті)"""
+    return log_pipeline.setup()
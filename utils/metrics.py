@@ -0,0 +1,210 @@
+import asyncio
+import bisect
+import functools
+import logging
+import time
+
+from config import LOOP_LAG_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Межі кошиків гістограм тривалості, с
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Series:
+    """Значення гістограми для одного набору міток"""
+
+    __slots__ = ('buckets', 'count', 'total', 'errors')
+
+    def __init__(self, size):
+        self.buckets = [0] * size
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+
+
+class Histogram:
+    """Гістограма тривалості з мітками (сумісна з форматом Prometheus)
+
+    observe() - це пошук кошика та кілька додавань, без блокувань: у CPython окремі
+    інкременти можуть зрідка втрачатися при одночасному записі з потоків, для метрик це прийнятно.
+    """
+
+    def __init__(self, name, description, label_names, buckets=DURATION_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.bounds = buckets
+        self.series = {}
+
+    def observe(self, labels, seconds, failed=False):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = Series(len(self.bounds) + 1)
+        series.buckets[bisect.bisect_left(self.bounds, seconds)] += 1
+        series.count += 1
+        series.total += seconds
+        if failed:
+            series.errors += 1
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        errors = []
+        # Знімок серій: record() з інших потоків може додати нову під час рендера
+        for labels, series in sorted(list(self.series.items())):
+            label_text = format_labels(self.label_names, labels)
+            cumulative = 0
+            for bound, count in zip(self.bounds + ('+Inf',), series.buckets):
+                cumulative += count
+                bucket_labels = format_labels(self.label_names + ('le',), labels + (bound,))
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{label_text} {series.total}")
+            lines.append(f"{self.name}_count{label_text} {series.count}")
+            errors.append(f"{self.name}_errors_total{label_text} {series.errors}")
+        lines.append(f"# TYPE {self.name}_errors_total counter")
+        return lines + errors
+
+
+class Gauge:
+    """Значення, що читається під час запиту /metrics (callback повертає число або {мітки: число})"""
+
+    def __init__(self, name, description, callback, label_names=(), kind='gauge'):
+        self.name = name
+        self.description = description
+        self.callback = callback
+        self.label_names = label_names
+        self.kind = kind
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        try:
+            value = self.callback()
+        except Exception as e:
+            logger.error(f"❌ Помилка читання метрики {self.name}: {e}")
+            return lines
+        if isinstance(value, dict):
+            for labels, item in sorted(value.items()):
+                labels = labels if isinstance(labels, tuple) else (labels,)
+                lines.append(f"{self.name}{format_labels(self.label_names, labels)} {float(item)}")
+        elif value is not None:
+            lines.append(f"{self.name} {float(value)}")
+        return lines
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ','.join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+    return '{' + pairs + '}'
+
+
+class MetricsRegistry:
+    """Реєстр метрик для ендпоінту /metrics"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def histogram(self, name, description, label_names):
+        if name not in self.metrics:
+            self.metrics[name] = Histogram(name, description, label_names)
+        return self.metrics[name]
+
+    def gauge(self, name, description, callback, label_names=(), kind='gauge'):
+        self.metrics[name] = Gauge(name, description, callback, label_names, kind)
+        return self.metrics[name]
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+def timed(histogram, label):
+    """Декоратор: тривалість виклику (звичайної функції або корутини) записується в гістограму"""
+    labels = (label,)
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                failed = True
+                try:
+                    result = await func(*args, **kwargs)
+                    failed = False
+                    return result
+                finally:
+                    histogram.observe(labels, time.perf_counter() - started, failed)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                histogram.observe(labels, time.perf_counter() - started, failed)
+        return wrapper
+
+    return decorator
+
+
+def instrument_methods(cls, histogram):
+    """Обгортає всі публічні методи класу декоратором timed (мітка - назва методу)"""
+    for name, attr in list(vars(cls).items()):
+        if name.startswith('_') or not callable(attr) or isinstance(attr, (staticmethod, classmethod, type)):
+            continue
+        setattr(cls, name, timed(histogram, name)(attr))
+    return cls
+
+
+class LoopLagMonitor:
+    """Затримка циклу подій бота: наскільки пізніше запланованого прокидається sleep()"""
+
+    def __init__(self, interval=LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self.last_lag = 0.0
+        self.max_lag = 0.0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, time.perf_counter() - started - self.interval)
+            self.last_lag = lag
+            self.max_lag = max(self.max_lag, lag)
+            LOOP_LAG_SECONDS.observe((), lag)
+
+
+# Глобальний реєстр метрик та основні гістограми
+metrics = MetricsRegistry()
+HANDLER_SECONDS = metrics.histogram(
+    'chatrix_handler_duration_seconds', 'Час роботи обробника повідомлення', ('handler',))
+UPDATE_SECONDS = metrics.histogram(
+    'chatrix_update_duration_seconds', 'Час обробки оновлення Telegram', ('kind',))
+DB_METHOD_SECONDS = metrics.histogram(
+    'chatrix_db_method_duration_seconds', 'Час виконання методу Database', ('method',))
+BOT_API_SECONDS = metrics.histogram(
+    'chatrix_bot_api_request_duration_seconds', 'Час запиту до Telegram Bot API', ('pool', 'method'))
+LOOP_LAG_SECONDS = metrics.histogram(
+    'chatrix_event_loop_lag_seconds', 'Затримка циклу подій бота', ())
+loop_lag_monitor = LoopLagMonitor()
@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_BULK_RATE, OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST,
+    OUTBOUND_GROUP_RATE, OUTBOUND_MAX_RETRIES, OUTBOUND_RETRY_JITTER
+)
+
+logger = logging.getLogger(__name__)
+
+# Пріоритет для масових розсилок: context.bot.send_message(..., rate_limit_args=BULK)
+BULK = 'bulk'
+
+# Максимальна довжина підпису до фото в Telegram
+CAPTION_LIMIT = 1024
+
+# Скільки останніх затримок зберігати для перцентилів
+LATENCY_WINDOW = 1000
+
+# Коли кількість лімітерів чатів перевищує це значення, неактивні видаляються
+CHAT_BUCKETS_CLEANUP_THRESHOLD = 5000
+
+
+class TokenBucket:
+    """Відро токенів з резервуванням: кожен запит отримує час, до якого має зачекати"""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self):
+        """Забрати токен і повернути кількість секунд очікування"""
+        self.refill()
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def pause(self, seconds):
+        """Заборонити відправку на вказаний час (після RetryAfter)"""
+        self.refill()
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def is_idle(self):
+        now = time.monotonic()
+        return self.tokens + (now - self.updated) * self.rate >= self.capacity
+
+
+class OutboundDispatcher(BaseRateLimiter):
+    """Єдина точка для всіх вихідних запитів бота
+
+    Підключається через Application.builder().rate_limiter(), тож через неї проходять
+    усі виклики context.bot.* та update.message.reply_* (обробники, NotificationSystem, розсилки).
+    """
+
+    def __init__(self, max_retries=OUTBOUND_MAX_RETRIES):
+        self.max_retries = max_retries
+        self.global_bucket = TokenBucket(OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_RATE)
+        self.bulk_bucket = TokenBucket(OUTBOUND_BULK_RATE, OUTBOUND_BULK_RATE)
+        self.chat_buckets = {}
+        self.pending = 0
+        self.in_flight = 0
+        self.max_pending = 0
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {
+            'requests': 0,
+            'throttled': 0,
+            'throttled_seconds': 0.0,
+            'retry_after': 0,
+            'failed': 0,
+        }
+        self.endpoints = {}
+
+    async def initialize(self):
+        logger.info(
+            f"✅ Диспетчер вихідних повідомлень: {OUTBOUND_GLOBAL_RATE}/с загалом, "
+            f"{OUTBOUND_CHAT_RATE}/с на чат"
+        )
+
+    async def shutdown(self):
+        logger.info(f"📊 Диспетчер вихідних повідомлень: {self.get_stats()}")
+
+    def chat_bucket(self, chat_id):
+        bucket = self.chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self.chat_buckets) >= CHAT_BUCKETS_CLEANUP_THRESHOLD:
+                self.chat_buckets = {key: value for key, value in self.chat_buckets.items() if not value.is_idle()}
+            # Від'ємний chat_id - групи та канали, для них ліміт значно суворіший
+            if isinstance(chat_id, int) and chat_id < 0:
+                bucket = TokenBucket(OUTBOUND_GROUP_RATE, 1)
+            else:
+                bucket = TokenBucket(OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST)
+            self.chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def acquire(self, chat_id, bulk):
+        """Очікування дозволу на відправку з урахуванням загального ліміту та ліміту чату"""
+        delay = max(self.global_bucket.reserve(), self.chat_bucket(chat_id).reserve())
+        if bulk:
+            delay = max(delay, self.bulk_bucket.reserve())
+        if delay > 0:
+            self.stats['throttled'] += 1
+            self.stats['throttled_seconds'] += delay
+            await asyncio.sleep(delay)
+
+    async def process_request(self, callback, args, kwargs, endpoint, data, rate_limit_args):
+        chat_id = data.get('chat_id')
+        try:
+            chat_id = int(chat_id)
+        except (TypeError, ValueError):
+            pass
+
+        self.stats['requests'] += 1
+        self.endpoints[endpoint] = self.endpoints.get(endpoint, 0) + 1
+        started = time.monotonic()
+
+        self.pending += 1
+        self.max_pending = max(self.max_pending, self.pending)
+        try:
+            for attempt in range(self.max_retries + 1):
+                # Запити без чату (getMe, setWebhook, answerCallbackQuery) не обмежуються
+                if chat_id is not None:
+                    await self.acquire(chat_id, rate_limit_args == BULK)
+
+                self.in_flight += 1
+                try:
+                    return await callback(*args, **kwargs)
+                except RetryAfter as e:
+                    self.stats['retry_after'] += 1
+                    if attempt == self.max_retries:
+                        logger.error(f"❌ Flood control для {endpoint} (чат {chat_id}) після {attempt} повторів")
+                        self.stats['failed'] += 1
+                        raise
+
+                    retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                    pause = retry_after + random.uniform(0, OUTBOUND_RETRY_JITTER)
+                    logger.warning(f"⚠️ Flood control для {endpoint} (чат {chat_id}), пауза {pause:.1f} с")
+
+                    # Telegram вимагає паузи для всього бота, а не лише для одного чату;
+                    # запити з чатом дочекаються її в acquire()
+                    self.global_bucket.pause(pause)
+                    if chat_id is not None:
+                        self.chat_bucket(chat_id).pause(pause)
+                    else:
+                        await asyncio.sleep(pause)
+                finally:
+                    self.in_flight -= 1
+        finally:
+            self.pending -= 1
+            self.latencies.append(time.monotonic() - started)
+
+    def get_stats(self):
+        """Поточні метрики: глибина черги, кількість запитів, затримки"""
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0.0
+            return round(latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000, 1)
+
+        return {
+            **self.stats,
+            'throttled_seconds': round(self.stats['throttled_seconds'], 2),
+            'queue_depth': self.pending - self.in_flight,
+            'in_flight': self.in_flight,
+            'max_pending': self.max_pending,
+            'latency_p50_ms': percentile(0.5),
+            'latency_p95_ms': percentile(0.95),
+            'latency_max_ms': percentile(1.0),
+            'chats_tracked': len(self.chat_buckets),
+            'endpoints': dict(self.endpoints),
+        }
+
+
+def fits_caption(text):
+    """Чи поміститься текст у підпис до фото"""
+    return len(text) <= CAPTION_LIMIT
+
+
+# Глобальний екземпляр диспетчера вихідних повідомлень
+outbound_dispatcher = OutboundDispatcher()
@@ -0,0 +1,82 @@
+import asyncio
+import logging
+
+from telegram.error import NetworkError, RetryAfter, TimedOut
+
+from config import POLLING_BATCH_SIZE, POLLING_TIMEOUT, TELEGRAM_READ_TIMEOUT
+from utils.scheduler import update_scheduler
+
+logger = logging.getLogger(__name__)
+
+# Пауза після помилки getUpdates, с
+POLLING_ERROR_DELAY = 3
+
+
+class UpdatePoller:
+    """Long polling: оновлення забираються пачками через getUpdates і обробляються паралельно
+
+    Оновлення передаються в той самий планувальник, що й у режимі вебхука.
+    Наступна пачка запитується, поки обробляється поточна.
+    """
+
+    def __init__(self, application, batch_size=POLLING_BATCH_SIZE, timeout=POLLING_TIMEOUT,
+                 scheduler=update_scheduler):
+        self.application = application
+        self.batch_size = batch_size
+        self.timeout = timeout
+        self.scheduler = scheduler
+        self.offset = None
+        self.running = False
+        self.stats = {'batches': 0, 'updates': 0, 'errors': 0}
+
+    async def run(self):
+        """Цикл отримання оновлень (працює до виклику stop())"""
+        self.running = True
+        logger.info(f"🔄 Long polling: пачки до {self.batch_size} оновлень, таймаут {self.timeout} с")
+        while self.running:
+            try:
+                updates = await self.application.bot.get_updates(
+                    offset=self.offset,
+                    limit=self.batch_size,
+                    timeout=self.timeout,
+                    read_timeout=self.timeout + TELEGRAM_READ_TIMEOUT
+                )
+            except RetryAfter as e:
+                retry_after = e.retry_after.total_seconds() if hasattr(e.retry_after, 'total_seconds') else e.retry_after
+                logger.warning(f"⚠️ Flood control для getUpdates, пауза {retry_after} с")
+                await asyncio.sleep(retry_after)
+                continue
+            except (NetworkError, TimedOut) as e:
+                self.stats['errors'] += 1
+                logger.warning(f"⚠️ Помилка getUpdates: {e}")
+                await asyncio.sleep(POLLING_ERROR_DELAY)
+                continue
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                self.stats['errors'] += 1
+                logger.error(f"❌ Помилка long polling: {e}", exc_info=True)
+                await asyncio.sleep(POLLING_ERROR_DELAY)
+                continue
+
+            if not updates:
+                continue
+
+            self.offset = updates[-1].update_id + 1
+            self.stats['batches'] += 1
+            self.stats['updates'] += len(updates)
+            # Якщо черги планувальника заповнені, submit чекає - це і є зворотний тиск на getUpdates
+            for update in updates:
+                await self.scheduler.submit(update)
+
+    async def stop(self):
+        """Зупинка циклу та очікування оновлень, що вже обробляються"""
+        self.running = False
+        await self.scheduler.join()
+
+    def get_stats(self):
+        batches = self.stats['batches']
+        return {
+            **self.stats,
+            'avg_batch_size': round(self.stats['updates'] / batches, 1) if batches else 0.0,
+        }
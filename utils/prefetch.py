@@ -0,0 +1,66 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilePrefetcher:
+    """Фонова підготовка наступної картки анкети, поки користувач читає поточну
+
+    На кожного користувача зберігається не більше одного завдання та однієї готової картки.
+    Картка прив'язана до сесії пошуку: після початку нового пошуку вона вже не видається.
+    """
+
+    def __init__(self):
+        self.tasks = {}
+        self.cards = {}
+        self.stats = {'scheduled': 0, 'hits': 0, 'misses': 0, 'failed': 0}
+
+    def schedule(self, user_id, session, telegram_id, loader):
+        """Запуск підготовки картки анкети telegram_id
+
+        loader - синхронна функція без аргументів, що повертає готову картку (або None);
+        виконується в окремому потоці, щоб запити до БД не блокували цикл подій
+        """
+        self.invalidate(user_id)
+        task = asyncio.create_task(self._prepare(user_id, session, telegram_id, loader))
+        self.tasks[user_id] = task
+        task.add_done_callback(lambda done: self._forget_task(user_id, done))
+        self.stats['scheduled'] += 1
+
+    async def _prepare(self, user_id, session, telegram_id, loader):
+        try:
+            card = await asyncio.to_thread(loader)
+        except Exception as e:
+            self.stats['failed'] += 1
+            logger.error(f"❌ Помилка попередньої підготовки анкети {telegram_id} для {user_id}: {e}")
+            return
+        # Поки картка готувалась, користувач міг почати новий пошук або перейти далі
+        if self.tasks.get(user_id) is not asyncio.current_task():
+            return
+        if card is not None:
+            self.cards[user_id] = (session, telegram_id, card)
+
+    def _forget_task(self, user_id, task):
+        if self.tasks.get(user_id) is task:
+            del self.tasks[user_id]
+
+    def take(self, user_id, session, telegram_id):
+        """Готова картка, якщо вона підготовлена саме для цієї анкети в цій сесії"""
+        prepared = self.cards.pop(user_id, None)
+        if prepared and prepared[0] == session and prepared[1] == telegram_id:
+            self.stats['hits'] += 1
+            return prepared[2]
+        self.stats['misses'] += 1
+        return None
+
+    def invalidate(self, user_id):
+        """Скасування підготовки та видалення картки (зміна сесії пошуку)"""
+        task = self.tasks.pop(user_id, None)
+        if task and not task.done():
+            task.cancel()
+        self.cards.pop(user_id, None)
+
+
+# Глобальний екземпляр попереднього завантаження анкет
+profile_prefetcher = ProfilePrefetcher()
@@ -0,0 +1,148 @@
+import contextvars
+import logging
+from collections import Counter, deque
+
+from config import QUERY_BUDGET_MODE, QUERY_BUDGETS
+from utils.query_stats import normalize_sql
+
+logger = logging.getLogger(__name__)
+
+# Скільки останніх перевищень бюджету показувати в /query_budgets
+RECENT_VIOLATIONS = 50
+
+# Лічильник поточного оновлення (контекст успадковується завданнями asyncio, створеними під час обробки)
+_current = contextvars.ContextVar('update_budget', default=None)
+
+
+def exceeds(count, limit):
+    """Чи перевищено ліміт (None - без ліміту)"""
+    return limit is not None and count > limit
+
+
+class QueryBudgetExceeded(Exception):
+    """Оновлення виконало більше SQL-запитів або викликів Bot API, ніж дозволяє бюджет"""
+
+    def __init__(self, usage, budget):
+        self.usage = usage
+        self.budget = budget
+        super().__init__(usage.describe(budget))
+
+
+class UpdateUsage:
+    """SQL-запити та виклики Bot API одного оновлення"""
+
+    __slots__ = ('update_id', 'route', 'queries', 'api_calls')
+
+    def __init__(self, update_id, route):
+        self.update_id = update_id
+        self.route = route
+        self.queries = []
+        self.api_calls = []
+
+    def offenders(self, limit=10):
+        """Запити, що повторювались найчастіше (повтор одного запиту - ознака N+1)"""
+        counts = Counter((caller, normalize_sql(query)) for caller, query in self.queries)
+        return [
+            {'caller': caller, 'sql': sql[:300], 'count': count}
+            for (caller, sql), count in counts.most_common(limit)
+        ]
+
+    def describe(self, budget):
+        lines = [
+            f"Оновлення {self.update_id} ({self.route}): SQL {len(self.queries)}/{budget['sql']}, "
+            f"Bot API {len(self.api_calls)}/{budget['api']}"
+        ]
+        for offender in self.offenders():
+            lines.append(f"  {offender['count']}x {offender['caller']}: {offender['sql'][:150]}")
+        if exceeds(len(self.api_calls), budget['api']):
+            lines.append(f"  Bot API: {', '.join(self.api_calls)}")
+        return '\n'.join(lines)
+
+    def as_dict(self, budget):
+        return {
+            'update_id': self.update_id,
+            'route': self.route,
+            'sql': len(self.queries),
+            'sql_budget': budget['sql'],
+            'api': len(self.api_calls),
+            'api_budget': budget['api'],
+            'api_calls': self.api_calls,
+            'queries': self.offenders(),
+        }
+
+
+class QueryBudget:
+    """Ліміт SQL-запитів та викликів Bot API на одне оновлення (захист від N+1)
+
+    Режими (QUERY_BUDGET_MODE): off - нічого не рахується; warn - перевищення пишуться
+    в лог і в /query_budgets; fail - обробка оновлення завершується QueryBudgetExceeded
+    (для тестових прогонів, наприклад python -m benchmarks load). Бюджет обирається за
+    назвою обробника з таблиці маршрутів, для решти оновлень - бюджет 'default'.
+    """
+
+    def __init__(self, mode=QUERY_BUDGET_MODE, budgets=QUERY_BUDGETS):
+        if mode not in ('off', 'warn', 'fail'):
+            raise ValueError(f"Невідомий режим бюджету запитів: {mode!r}")
+        self.mode = mode
+        self.budgets = budgets
+        self.recent = deque(maxlen=RECENT_VIOLATIONS)
+        self.stats = {'checked': 0, 'violations': 0}
+        self.violations_by_route = Counter()
+
+    @property
+    def enabled(self):
+        return self.mode != 'off'
+
+    def start(self, update_id, route='default'):
+        """Почати рахувати для оновлення; повертає токен для finish()"""
+        if not self.enabled:
+            return None
+        return _current.set(UpdateUsage(update_id, route))
+
+    def set_route(self, route):
+        usage = _current.get()
+        if usage is not None:
+            usage.route = route
+
+    def record_query(self, query, caller):
+        usage = _current.get()
+        if usage is not None:
+            usage.queries.append((caller, query))
+
+    def record_api(self, endpoint):
+        usage = _current.get()
+        if usage is not None:
+            usage.api_calls.append(endpoint)
+
+    def budget_for(self, route):
+        return self.budgets.get(route) or self.budgets['default']
+
+    def finish(self, token):
+        """Перевірка бюджету після обробки оновлення"""
+        if token is None:
+            return
+        usage = _current.get()
+        _current.reset(token)
+        budget = self.budget_for(usage.route)
+        self.stats['checked'] += 1
+        if not exceeds(len(usage.queries), budget['sql']) and not exceeds(len(usage.api_calls), budget['api']):
+            return
+
+        self.stats['violations'] += 1
+        self.violations_by_route[usage.route] += 1
+        self.recent.append(usage.as_dict(budget))
+        if self.mode == 'fail':
+            raise QueryBudgetExceeded(usage, budget)
+        logger.warning(f"⚠️ Перевищено бюджет запитів\n{usage.describe(budget)}")
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'mode': self.mode,
+            'by_route': dict(self.violations_by_route.most_common()),
+            'recent': list(self.recent),
+        }
+
+
+# Глобальний екземпляр бюджету запитів
+query_budget = QueryBudget()
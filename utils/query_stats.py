@@ -0,0 +1,177 @@
+import logging
+import random
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+from config import (
+    DB_SLOW_QUERY_MS, DB_EXPLAIN_SAMPLE_RATE, DB_EXPLAIN_MIN_INTERVAL, QUERY_STATS_MAX_FINGERPRINTS
+)
+
+logger = logging.getLogger(__name__)
+
+# Функції-посередники між методом Database та курсором (їх пропускаємо, шукаючи автора запиту)
+PASS_THROUGH_FRAMES = frozenset({'execute', 'execute_safe', 'fetch_safe', 'fetch_one_safe', 'wrapper', 'async_wrapper'})
+
+# Кеш нормалізованого тексту запитів (тексти запитів здебільшого сталі, тож кеш невеликий)
+NORMALIZED_CACHE_SIZE = 1000
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = re.compile(r"^\s*(select|with)\b", re.IGNORECASE)
+_WRITES = re.compile(r"\b(insert|update|delete)\b", re.IGNORECASE)
+
+
+def normalize_sql(query):
+    """Текст запиту без літералів та зайвих пробілів (значення параметрів однакові - %s)"""
+    query = _STRING_LITERAL.sub('?', query)
+    query = _NUMBER_LITERAL.sub('?', query)
+    return _WHITESPACE.sub(' ', query).strip()
+
+
+def caller_name():
+    """Назва методу Database, з якого надійшов запит"""
+    frame = sys._getframe(2)
+    while frame is not None and frame.f_code.co_name in PASS_THROUGH_FRAMES:
+        frame = frame.f_back
+    return frame.f_code.co_name if frame is not None else '?'
+
+
+class Fingerprint:
+    """Статистика одного виду запиту (нормалізований SQL + метод, що його виконує)"""
+
+    __slots__ = ('caller', 'sql', 'calls', 'errors', 'total', 'max', 'slow', 'plan', 'plan_at')
+
+    def __init__(self, caller, sql):
+        self.caller = caller
+        self.sql = sql
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.slow = 0
+        self.plan = None
+        self.plan_at = 0.0
+
+    def as_dict(self):
+        return {
+            'caller': self.caller,
+            'sql': self.sql,
+            'calls': self.calls,
+            'errors': self.errors,
+            'total_ms': round(self.total * 1000, 1),
+            'avg_ms': round(self.total / self.calls * 1000, 2) if self.calls else 0.0,
+            'max_ms': round(self.max * 1000, 1),
+            'slow': self.slow,
+            'plan': self.plan,
+        }
+
+
+class QueryProfiler:
+    """Час кожного SQL-запиту за відбитками, журнал повільних запитів та вибіркові плани
+
+    EXPLAIN (ANALYZE, BUFFERS) повторно виконує запит, тому знімається лише для
+    читаючих запитів, не частіше DB_EXPLAIN_MIN_INTERVAL на відбиток і не в потоці
+    обробника: повільний запит ставиться в чергу, а план знімає періодичне завдання.
+    """
+
+    def __init__(self, slow_ms=DB_SLOW_QUERY_MS, sample_rate=DB_EXPLAIN_SAMPLE_RATE,
+                 max_fingerprints=QUERY_STATS_MAX_FINGERPRINTS):
+        self.slow_seconds = slow_ms / 1000
+        self.sample_rate = sample_rate
+        self.max_fingerprints = max_fingerprints
+        self.fingerprints = OrderedDict()
+        self.normalized = OrderedDict()
+        self.explain_queue = {}
+        self.lock = threading.Lock()
+        self.stats = {'statements': 0, 'slow': 0, 'plans': 0, 'evicted': 0}
+
+    def normalize(self, query):
+        sql = self.normalized.get(query)
+        if sql is None:
+            sql = self.normalized[query] = normalize_sql(query)
+            if len(self.normalized) > NORMALIZED_CACHE_SIZE:
+                self.normalized.popitem(last=False)
+        return sql
+
+    def record(self, query, params, caller, seconds, failed):
+        sql = self.normalize(query)
+        key = (caller, sql)
+        with self.lock:
+            fingerprint = self.fingerprints.get(key)
+            if fingerprint is None:
+                fingerprint = self.fingerprints[key] = Fingerprint(caller, sql)
+                if len(self.fingerprints) > self.max_fingerprints:
+                    # Витісняється відбиток з найменшим загальним часом
+                    victim = min(self.fingerprints, key=lambda k: self.fingerprints[k].total)
+                    del self.fingerprints[victim]
+                    self.stats['evicted'] += 1
+            fingerprint.calls += 1
+            fingerprint.total += seconds
+            fingerprint.max = max(fingerprint.max, seconds)
+            if failed:
+                fingerprint.errors += 1
+            self.stats['statements'] += 1
+
+        if seconds < self.slow_seconds:
+            return
+        fingerprint.slow += 1
+        self.stats['slow'] += 1
+        logger.warning(f"🐢 Повільний запит {seconds * 1000:.0f} мс у {caller}: {sql[:200]}")
+        if (
+            _EXPLAINABLE.match(query) and not _WRITES.search(query)
+            and time.monotonic() - fingerprint.plan_at > DB_EXPLAIN_MIN_INTERVAL
+            and random.random() < self.sample_rate
+        ):
+            self.explain_queue[key] = (query, params)
+
+    def explain_pending(self, run_query):
+        """Зняти плани для відібраних повільних запитів (викликається планувальником завдань)"""
+        captured = 0
+        while self.explain_queue:
+            key, (query, params) = self.explain_queue.popitem()
+            fingerprint = self.fingerprints.get(key)
+            if fingerprint is None:
+                continue
+            try:
+                rows, _ = run_query(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT TEXT) {query}", params)
+                fingerprint.plan = '\n'.join(row['QUERY PLAN'] for row in rows)
+                fingerprint.plan_at = time.monotonic()
+                self.stats['plans'] += 1
+                captured += 1
+            except Exception as e:
+                logger.error(f"❌ Не вдалося зняти план запиту {fingerprint.caller}: {e}")
+        return captured
+
+    def top(self, limit=20, order='total'):
+        """Відбитки, відсортовані за загальним (total), середнім (avg) чи максимальним (max) часом"""
+        keys = {
+            'total': lambda f: f.total,
+            'avg': lambda f: f.total / f.calls if f.calls else 0.0,
+            'max': lambda f: f.max,
+            'calls': lambda f: f.calls,
+        }
+        with self.lock:
+            fingerprints = list(self.fingerprints.values())
+        fingerprints.sort(key=keys.get(order, keys['total']), reverse=True)
+        return [fingerprint.as_dict() for fingerprint in fingerprints[:limit]]
+
+    def reset(self):
+        with self.lock:
+            self.fingerprints.clear()
+            self.explain_queue.clear()
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'fingerprints': len(self.fingerprints),
+            'slow_threshold_ms': round(self.slow_seconds * 1000),
+            'explain_queue': len(self.explain_queue),
+        }
+
+
+# Глобальний екземпляр профілювальника запитів
+query_profiler = QueryProfiler()
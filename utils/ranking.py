@@ -0,0 +1,119 @@
+import logging
+import math
+import time
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+
+from config import FEED_WEIGHT_SET
+
+logger = logging.getLogger(__name__)
+
+# Ознаки, за якими оцінюються анкети (порядок стовпців матриці ознак)
+FEATURES = ('rating', 'recency', 'completeness', 'photo', 'likeback', 'noise')
+
+# Набори ваг для ранжування стрічки
+WEIGHT_SETS = {
+    'default': {
+        'rating': 0.30, 'recency': 0.20, 'completeness': 0.15,
+        'photo': 0.15, 'likeback': 0.15, 'noise': 0.05,
+    },
+    'fresh': {
+        'rating': 0.15, 'recency': 0.40, 'completeness': 0.10,
+        'photo': 0.10, 'likeback': 0.15, 'noise': 0.10,
+    },
+    'mutual': {
+        'rating': 0.15, 'recency': 0.15, 'completeness': 0.10,
+        'photo': 0.10, 'likeback': 0.45, 'noise': 0.05,
+    },
+}
+
+# Сирі колонки кандидата, з яких будуються ознаки
+RAW_COLUMNS = ('rating', 'last_active_ts', 'profile_filled', 'has_photo', 'liked_me', 'seeks_viewer')
+_raw_getter = itemgetter(*RAW_COLUMNS)
+
+# Кількість полів анкети, що враховуються в повноті профілю (вік, стать, місто, ціль, опис)
+PROFILE_FIELDS_COUNT = 5
+
+# Ймовірність взаємного лайку
+LIKEBACK_LIKED_ME = 1.0
+LIKEBACK_COMPATIBLE = 0.3
+LIKEBACK_OTHER = 0.05
+
+
+def register_weight_set(name, weights):
+    """Реєстрація власного набору ваг"""
+    unknown = set(weights) - set(FEATURES)
+    if unknown:
+        raise ValueError(f"Невідомі ознаки: {', '.join(sorted(unknown))}")
+    WEIGHT_SETS[name] = {feature: float(weights.get(feature, 0.0)) for feature in FEATURES}
+
+
+class FeedRanker:
+    """Пакетне ранжування кандидатів для стрічки знайомств"""
+
+    def __init__(self, weights='default', recency_half_life_hours=72.0, seed=None):
+        self.weights = weights
+        self.recency_half_life_hours = recency_half_life_hours
+        self.rng = np.random.default_rng(seed)
+
+    def weight_vector(self, weights=None):
+        weights = weights or self.weights
+        if isinstance(weights, str):
+            if weights not in WEIGHT_SETS:
+                logger.warning(f"⚠️ Невідомий набір ваг '{weights}', використовуємо default")
+                weights = 'default'
+            weights = WEIGHT_SETS[weights]
+        return np.array([weights.get(feature, 0.0) for feature in FEATURES], dtype=np.float64)
+
+    def feature_matrix(self, candidates, now=None):
+        """Матриця ознак розміром (кількість кандидатів, кількість ознак)
+
+        Кандидати мають містити сирі колонки RAW_COLUMNS (див. db.get_discovery_candidates)
+        """
+        n = len(candidates)
+        now = now if now is not None else time.time()
+
+        raw = np.fromiter(
+            chain.from_iterable(map(_raw_getter, candidates)),
+            dtype=np.float64, count=n * len(RAW_COLUMNS)
+        ).reshape(n, len(RAW_COLUMNS))
+        rating, last_active_ts, profile_filled, has_photo, liked_me, seeks_viewer = raw.T
+
+        hours_idle = np.maximum(now - last_active_ts, 0.0) / 3600.0
+
+        matrix = np.empty((n, len(FEATURES)), dtype=np.float64)
+        matrix[:, 0] = np.clip(rating / 10.0, 0.0, 1.0)
+        matrix[:, 1] = np.exp(-hours_idle * (math.log(2) / self.recency_half_life_hours))
+        matrix[:, 2] = profile_filled / PROFILE_FIELDS_COUNT
+        matrix[:, 3] = has_photo
+        matrix[:, 4] = np.where(
+            liked_me > 0, LIKEBACK_LIKED_ME,
+            np.where(seeks_viewer > 0, LIKEBACK_COMPATIBLE, LIKEBACK_OTHER)
+        )
+        matrix[:, 5] = self.rng.random(n)
+        return matrix
+
+    def score(self, candidates, weights=None, now=None):
+        """Оцінки кандидатів (чим більше, тим вище в стрічці)"""
+        if not candidates:
+            return np.empty(0, dtype=np.float64)
+        return self.feature_matrix(candidates, now) @ self.weight_vector(weights)
+
+    def rank(self, candidates, top_n=None, weights=None):
+        """Кандидати, відсортовані за оцінкою (лише top_n найкращих, якщо задано)"""
+        scores = self.score(candidates, weights)
+        if scores.size == 0:
+            return []
+
+        if top_n is not None and top_n < scores.size:
+            top = np.argpartition(-scores, top_n - 1)[:top_n]
+            order = top[np.argsort(-scores[top], kind='stable')]
+        else:
+            order = np.argsort(-scores, kind='stable')
+        return [candidates[i] for i in order]
+
+
+# Глобальний екземпляр ранжувальника
+feed_ranker = FeedRanker(weights=FEED_WEIGHT_SET)
@@ -0,0 +1,86 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from config import RENDER_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Відображення значень профілю (будуються один раз при імпорті)
+GENDER_DISPLAY = {
+    'male': '👨 Чоловік',
+    'female': '👩 Жінка',
+}
+
+SEEKING_DISPLAY = {
+    'female': '👩 Дівчину',
+    'male': '👨 Хлопця',
+    'all': '👫 Всіх',
+}
+
+GOAL_DISPLAY = {
+    'Серйозні стосунки': '💞 Серйозні стосунки',
+    'Дружба': '👥 Дружба',
+    'Разові зустрічі': '🎉 Разові зустрічі',
+    'Активний відпочинок': '🏃 Активний відпочинок',
+}
+
+# Позначка "значення відсутнє", щоб кешувати й None (наприклад, анкету без фото)
+_MISSING = object()
+
+
+class RenderCache:
+    """LRU кеш готових карток анкет з ключем (telegram_id, версія профілю, шаблон)
+
+    Версія профілю (users.profile_version) збільшується при кожній зміні анкети, фото
+    чи рейтингу, тож застарілі картки просто перестають запитуватися і витісняються.
+    Кеш наповнюють і цикл подій, і фонові потоки (cache_warmup), тож звернення до
+    словника йдуть під блокуванням; render() виконується поза ним.
+    """
+
+    def __init__(self, max_size=RENDER_CACHE_SIZE):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'bypass': 0}
+
+    @staticmethod
+    def cache_key(user_data, template):
+        if not isinstance(user_data, dict):
+            return None
+        telegram_id = user_data.get('telegram_id')
+        version = user_data.get('profile_version')
+        if telegram_id is None or version is None:
+            return None
+        return telegram_id, version, template
+
+    def get_or_render(self, user_data, template, render):
+        """Готове значення з кешу або результат render() (який одразу кешується)"""
+        key = self.cache_key(user_data, template)
+        if key is None:
+            self.stats['bypass'] += 1
+            return render()
+
+        with self.lock:
+            value = self.entries.get(key, _MISSING)
+            if value is not _MISSING:
+                self.entries.move_to_end(key)
+                self.stats['hits'] += 1
+                return value
+            self.stats['misses'] += 1
+
+        value = render()
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Глобальний екземпляр кешу карток
+render_cache = RenderCache()
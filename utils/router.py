@@ -0,0 +1,124 @@
+import logging
+import time
+from collections import namedtuple
+
+from utils.metrics import HANDLER_SECONDS
+from utils.query_budget import query_budget
+from utils.states import user_states, States
+
+logger = logging.getLogger(__name__)
+
+# Маршрут: обробник та чи доступний він лише адміністратору
+Route = namedtuple('Route', ['handler', 'admin_only'])
+
+
+class Router:
+    """Декларативна маршрутизація повідомлень зі сталим часом вибору обробника
+
+    Порядок перевірки: фото -> точний текст кнопки -> стан користувача -> прапорці
+    очікування вводу в context.user_data -> обробник за замовчуванням.
+    Повторна реєстрація того самого тексту чи стану - помилка під час побудови.
+    """
+
+    def __init__(self, admin_id):
+        self.admin_id = admin_id
+        self.text_routes = {}
+        self.state_routes = {}
+        self.flag_routes = []
+        self.photo_route = None
+        self.photo_state_routes = {}
+        self.fallback = None
+
+    def _register(self, table, key, handler, admin_only, kind):
+        existing = table.get(key)
+        if existing is not None:
+            raise ValueError(
+                f"Дублікат маршруту {kind} {key!r}: {existing.handler.__name__} і {handler.__name__}"
+            )
+        table[key] = Route(handler, admin_only)
+
+    def text(self, labels, handler, admin_only=False):
+        """Обробник для точного тексту кнопки (або кількох)"""
+        if isinstance(labels, str):
+            labels = [labels]
+        for label in labels:
+            self._register(self.text_routes, label, handler, admin_only, 'для тексту')
+        return self
+
+    def state(self, states, handler, admin_only=False):
+        """Обробник для вільного вводу в певному стані користувача"""
+        if isinstance(states, States):
+            states = [states]
+        for state in states:
+            self._register(self.state_routes, state, handler, admin_only, 'для стану')
+        return self
+
+    def flag(self, name, handler):
+        """Обробник вводу, коли в context.user_data встановлено прапорець name"""
+        if any(flag_name == name for flag_name, _ in self.flag_routes):
+            raise ValueError(f"Дублікат маршруту для прапорця {name!r}")
+        self.flag_routes.append((name, Route(handler, False)))
+        return self
+
+    def photo(self, handler, states=None):
+        """Обробник фото (для певних станів або за замовчуванням)"""
+        if states is not None:
+            if isinstance(states, States):
+                states = [states]
+            for state in states:
+                self._register(self.photo_state_routes, state, handler, False, 'фото для стану')
+            return self
+        if self.photo_route is not None:
+            raise ValueError("Маршрут для фото вже зареєстровано")
+        self.photo_route = Route(handler, False)
+        return self
+
+    def default(self, handler):
+        self.fallback = Route(handler, False)
+        return self
+
+    def resolve(self, update, context):
+        """Вибір маршруту для повідомлення (None - немає відповідного маршруту)"""
+        message = update.message
+        user_id = update.effective_user.id
+        is_admin = user_id == self.admin_id
+
+        if message.photo:
+            return self.photo_state_routes.get(user_states.get(user_id), self.photo_route)
+
+        route = self.text_routes.get(message.text or "")
+        if route is not None and (is_admin or not route.admin_only):
+            return route
+
+        route = self.state_routes.get(user_states.get(user_id, States.START))
+        if route is not None and (is_admin or not route.admin_only):
+            return route
+
+        for name, route in self.flag_routes:
+            if context.user_data.get(name):
+                return route
+
+        return self.fallback
+
+    async def dispatch(self, update, context):
+        """Єдина точка входу для текстових повідомлень та фото"""
+        if not update.message:
+            return
+        route = self.resolve(update, context)
+        if route is None:
+            return
+        query_budget.set_route(route.handler.__name__)
+        started = time.perf_counter()
+        failed = True
+        try:
+            await route.handler(update, context)
+            failed = False
+        finally:
+            HANDLER_SECONDS.observe((route.handler.__name__,), time.perf_counter() - started, failed)
+
+    def describe(self):
+        """Кількість маршрутів кожного типу (для логів при старті)"""
+        return (
+            f"тексти: {len(self.text_routes)}, стани: {len(self.state_routes)}, "
+            f"прапорці: {len(self.flag_routes)}"
+        )
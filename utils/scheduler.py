@@ -0,0 +1,129 @@
+import asyncio
+import logging
+import time
+from collections import deque
+
+from config import UPDATE_CONCURRENCY, UPDATE_QUEUE_LIMIT, USER_QUEUE_LIMIT
+from utils.metrics import UPDATE_SECONDS
+from utils.query_budget import query_budget
+
+logger = logging.getLogger(__name__)
+
+
+def update_owner(update):
+    """Ключ черги: користувач, чат або саме оновлення (для оновлень без відправника)"""
+    user = getattr(update, 'effective_user', None)
+    if user:
+        return user.id
+    chat = getattr(update, 'effective_chat', None)
+    if chat:
+        return chat.id
+    return ('update', update.update_id)
+
+
+def update_kind(update):
+    """Тип оновлення для метрик"""
+    if update.message:
+        return 'message'
+    if update.callback_query:
+        return 'callback_query'
+    return 'other'
+
+
+class UpdateScheduler:
+    """Паралельна обробка оновлень різних користувачів зі строгим порядком для одного користувача
+
+    Кожен користувач має власну чергу, яку по черзі розбирає одне завдання, тож
+    кроки анкети в user_states ніколи не обробляються одночасно. Ліміт паралельності
+    рахує лише оновлення, що реально обробляються, а не ті, що чекають у черзі користувача.
+    """
+
+    def __init__(self, concurrency=UPDATE_CONCURRENCY, queue_limit=UPDATE_QUEUE_LIMIT,
+                 user_queue_limit=USER_QUEUE_LIMIT):
+        self.concurrency = concurrency
+        self.queue_limit = queue_limit
+        self.user_queue_limit = user_queue_limit
+        self.application = None
+        self.semaphore = None
+        self.has_capacity = None
+        self.queues = {}
+        self.workers = {}
+        self.pending = 0
+        self.active = 0
+        self.stats = {'processed': 0, 'failed': 0, 'dropped': 0, 'max_pending': 0, 'max_active': 0}
+
+    def start(self, application):
+        """Прив'язка до Application (викликається в циклі подій бота)"""
+        self.application = application
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.has_capacity = asyncio.Event()
+        self.has_capacity.set()
+        logger.info(f"✅ Планувальник оновлень: до {self.concurrency} користувачів одночасно")
+
+    async def submit(self, update):
+        """Додати оновлення в чергу його користувача (чекає, якщо загальна черга заповнена)"""
+        while self.pending >= self.queue_limit:
+            self.has_capacity.clear()
+            await self.has_capacity.wait()
+
+        owner = update_owner(update)
+        queue = self.queues.get(owner)
+        if queue is None:
+            queue = self.queues[owner] = deque()
+        elif len(queue) >= self.user_queue_limit:
+            self.stats['dropped'] += 1
+            logger.warning(f"⚠️ Черга користувача {owner} переповнена, оновлення {update.update_id} пропущено")
+            return
+
+        queue.append(update)
+        self.pending += 1
+        self.stats['max_pending'] = max(self.stats['max_pending'], self.pending)
+
+        if owner not in self.workers:
+            self.workers[owner] = asyncio.create_task(self._drain(owner))
+
+    async def _drain(self, owner):
+        queue = self.queues[owner]
+        try:
+            while queue:
+                update = queue[0]
+                async with self.semaphore:
+                    self.active += 1
+                    self.stats['max_active'] = max(self.stats['max_active'], self.active)
+                    started = time.perf_counter()
+                    failed = True
+                    budget_token = query_budget.start(update.update_id)
+                    try:
+                        await self.application.process_update(update)
+                        query_budget.finish(budget_token)
+                        self.stats['processed'] += 1
+                        failed = False
+                    except Exception as e:
+                        self.stats['failed'] += 1
+                        logger.error(f"❌ Помилка обробки оновлення {update.update_id}: {e}")
+                    finally:
+                        self.active -= 1
+                        UPDATE_SECONDS.observe((update_kind(update),), time.perf_counter() - started, failed)
+                queue.popleft()
+                self.pending -= 1
+                self.has_capacity.set()
+        finally:
+            del self.workers[owner]
+            del self.queues[owner]
+
+    async def join(self):
+        """Очікування обробки всіх оновлень у чергах"""
+        while self.workers:
+            await asyncio.gather(*list(self.workers.values()), return_exceptions=True)
+
+    def get_stats(self):
+        return {
+            **self.stats,
+            'pending': self.pending,
+            'active': self.active,
+            'users_queued': len(self.queues),
+        }
+
+
+# Глобальний екземпляр планувальника оновлень
+update_scheduler = UpdateScheduler()
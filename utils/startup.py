@@ -0,0 +1,47 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Етапи запуску в порядку виконання
+STARTUP_STAGES = ('database', 'migrations', 'bot')
+
+
+class StartupState:
+    """Стан поетапного запуску для ендпоінту готовності"""
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.stages = {name: {'status': 'pending'} for name in STARTUP_STAGES}
+
+    def run(self, name, step):
+        """Виконання етапу; повертає False, якщо етап завершився помилкою"""
+        self.stages[name] = {'status': 'running'}
+        started = time.monotonic()
+        try:
+            result = step()
+        except Exception as e:
+            logger.error(f"❌ Етап запуску '{name}' завершився помилкою: {e}")
+            self.stages[name] = {'status': 'failed', 'error': str(e)}
+            return False
+        seconds = round(time.monotonic() - started, 3)
+        if result is False:
+            self.stages[name] = {'status': 'failed', 'seconds': seconds}
+            return False
+        self.stages[name] = {'status': 'done', 'seconds': seconds}
+        logger.info(f"✅ Етап запуску '{name}' виконано за {seconds} с")
+        return True
+
+    def is_ready(self):
+        return all(stage['status'] == 'done' for stage in self.stages.values())
+
+    def get_stats(self):
+        return {
+            'ready': self.is_ready(),
+            'uptime_seconds': round(time.monotonic() - self.started_at, 1),
+            'stages': self.stages,
+        }
+
+
+# Глобальний стан запуску
+startup = StartupState()
@@ -28,5 +28,4 @@ class States(Enum):
 
 # Словники для зберігання станів користувачів
 user_states = {}
-user_profiles = {}
-gallery_view_data = {}
\ No newline at end of file
+user_profiles = {}
\ No newline at end of file